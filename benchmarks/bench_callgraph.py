@@ -0,0 +1,92 @@
+"""Build the project-wide call graph over synthetic facts and report its size.
+
+Usage: python benchmarks/bench_callgraph.py [--files 2000] [--methods 50] [--calls 10]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from models import CallSite, ClassFact, CodeFact, MethodFact, StructuralAnalysis  # noqa: E402
+from utils.callgraph import ProjectCallGraph  # noqa: E402
+
+
+def synthetic_project(files: int, methods: int, calls: int, seed: int = 13):
+    rng = random.Random(seed)
+    for f in range(files):
+        class_name = f"C{f}"
+        method_facts = [
+            MethodFact.model_construct(
+                class_name=class_name,
+                name=f"m{m}",
+                signature=f"m{m}(int a)",
+                start_line=m + 2,
+                end_line=m + 2,
+                parameter_count=1,
+            )
+            for m in range(methods)
+        ]
+        sites = [
+            CallSite.model_construct(
+                caller=f"{class_name}.m{m}",
+                method_name=f"m{rng.randrange(methods)}",
+                arg_count=1,
+                receiver="peer",
+                receiver_type=f"C{rng.randrange(files)}",
+            )
+            for m in range(methods)
+            for _ in range(calls)
+        ]
+        path = f"src/{class_name}.java"
+        code_facts = CodeFact.model_construct(
+            language="java",
+            file_path=path,
+            classes=[
+                ClassFact.model_construct(
+                    name=class_name,
+                    start_line=1,
+                    end_line=methods + 2,
+                    superclass=None,
+                    methods=method_facts,
+                )
+            ],
+            total_methods=methods,
+        )
+        yield code_facts, StructuralAnalysis.model_construct(file_path=path, call_sites=sites)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--methods", type=int, default=50)
+    parser.add_argument("--calls", type=int, default=10)
+    args = parser.parse_args()
+
+    facts = list(synthetic_project(args.files, args.methods, args.calls))
+    start = time.perf_counter()
+    graph = ProjectCallGraph.build(facts)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    ProjectCallGraph.build(facts)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    csr_bytes = (
+        graph.offsets.itemsize * len(graph.offsets)
+        + graph.targets.itemsize * len(graph.targets)
+    )
+    print(f"methods={len(graph.keys)} call_sites={args.files * args.methods * args.calls}")
+    print(f"edges={graph.edge_count} build={elapsed:.2f}s")
+    print(f"csr arrays={csr_bytes / 2**20:.1f} MiB  peak during build={peak / 2**20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Compare the compiled-query extractor against the cursor-walk extractor.
+
+Usage: python benchmarks/bench_extractors.py [--classes 200] [--methods 25] [--repeat 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from utils.extraction import extract_java_facts, fact_query  # noqa: E402
+
+
+def synthetic_file(classes: int, methods: int, seed: int = 11) -> str:
+    rng = random.Random(seed)
+    lines = ["package bench;", "", "import java.util.List;", "import java.util.Map;", ""]
+    for c in range(classes):
+        lines.append(f"class C{c} extends Base implements Comparable<C{c}> {{")
+        lines.append(f"    public Map<String, List<C{rng.randrange(classes)}>> index;")
+        lines.append("    private int count, total;")
+        for m in range(methods):
+            calls = " ".join(
+                f"local{k}.m{rng.randrange(methods)}(a, {k});" for k in range(3)
+            )
+            lines.append(
+                f"    public int m{m}(Map<String, Integer> a, int b) {{"
+                f" C{rng.randrange(classes)} local0 = null, local1 = null;"
+                f" List<String> local2 = null; {calls} return b; }}"
+            )
+        lines.append("}")
+    return "\n".join(lines)
+
+
+def best_of(repeat: int, fn) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--classes", type=int, default=200)
+    parser.add_argument("--methods", type=int, default=25)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    source = synthetic_file(args.classes, args.methods)
+    fact_query()  # compile outside the timed region; it happens once per process
+
+    query_result = extract_java_facts(source, engine="query")
+    walk_result = extract_java_facts(source, engine="walk")
+    assert query_result == walk_result
+
+    walk_s = best_of(args.repeat, lambda: extract_java_facts(source, engine="walk"))
+    query_s = best_of(args.repeat, lambda: extract_java_facts(source, engine="query"))
+
+    print(f"classes={args.classes} methods={args.classes * args.methods} "
+          f"lines={source.count(chr(10)) + 1} (identical output)")
+    print(f"walk:  {walk_s * 1000:10.1f} ms")
+    print(f"query: {query_s * 1000:10.1f} ms  ({walk_s / query_s:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Compare indexed fan-in/out against the previous per-call key scan.
+
+Usage: python benchmarks/bench_fan_metrics.py [--methods 5000] [--calls 4]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from utils.callgraph import MethodIndex, compute_fan_metrics  # noqa: E402
+from utils.extraction import extract_java_facts  # noqa: E402
+
+
+def synthetic_class(methods: int, calls: int, seed: int = 7) -> str:
+    rng = random.Random(seed)
+    lines = ["public class Generated {"]
+    for i in range(methods):
+        body = " ".join(
+            f"m{rng.randrange(methods)}({rng.randrange(3)});" for _ in range(calls)
+        )
+        lines.append(f"    void m{i}(int a) {{ {body} }}")
+    lines.append("}")
+    return "\n".join(lines)
+
+
+def scan_fan_metrics(method_calls: dict[str, set[str]]) -> dict[str, dict[str, int]]:
+    """The pre-index implementation: every callee scans every method key."""
+    fan = {key: {"fan_in": 0, "fan_out": len(c)} for key, c in method_calls.items()}
+    for callees in method_calls.values():
+        for callee in callees:
+            simple = callee.split(".")[-1]
+            targets = [k for k in method_calls if k.endswith("." + simple)]
+            if len(targets) == 1:
+                fan[targets[0]]["fan_in"] += 1
+    return fan
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--methods", type=int, default=5000)
+    parser.add_argument("--calls", type=int, default=4)
+    args = parser.parse_args()
+
+    source = synthetic_class(args.methods, args.calls)
+    _, structural = extract_java_facts(source, file_path="Generated.java")
+
+    method_calls: dict[str, set[tuple[str, int | None]]] = {}
+    for edge in structural.call_relationships:
+        method_calls.setdefault(edge.caller, set()).add((edge.callee, 1))
+    for fan in structural.fan_metrics:
+        method_calls.setdefault(fan.method_key, set())
+    by_text = {k: {c for c, _ in v} for k, v in method_calls.items()}
+
+    start = time.perf_counter()
+    index = MethodIndex()
+    for key in method_calls:
+        index.add(key, 1)
+    indexed = compute_fan_metrics(method_calls, index)
+    indexed_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scanned = scan_fan_metrics(by_text)
+    scan_s = time.perf_counter() - start
+
+    assert indexed == scanned
+    print(f"methods={args.methods} call_sites={sum(map(len, by_text.values()))}")
+    print(f"key scan: {scan_s * 1000:10.1f} ms")
+    print(f"indexed:  {indexed_s * 1000:10.1f} ms  ({scan_s / indexed_s:.0f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""Time each static-analysis stage over a synthetic corpus.
+
+Usage: python benchmarks/bench_pipeline.py [--files 200] [--classes 2] [--methods 20]
+       [--depth 3] [--calls 0.3] [--statements 8] [--seed 7]
+       [--output results.json] [--compare baseline.json]
+
+Stages run one file at a time, in process and without the result cache:
+
+  parse        Tree-sitter parse of the source
+  facts        JavaTreeSitterAnalyzer.analyze_source
+  structural   run_structural_analysis
+  correlate    correlate_evidence over synthetic PMD findings
+  format       format_evidence_text
+  serialize    AnalysisEvidence JSON dump
+
+``facts`` and ``structural`` each run the full single-pass extraction, as
+their callers do. PMD is left out because its runtime is the JVM's. Results
+are printed and, with ``--output``, written as JSON. ``--compare`` prints the
+ratio of each stage's p50 to that of an earlier JSON result.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from corpus import add_spec_arguments, spec_from_args, write_corpus  # noqa: E402
+from models import AnalysisEvidence, CodeFact, PmdFinding  # noqa: E402
+from utils.correlator import correlate_evidence, format_evidence_text  # noqa: E402
+from utils.extraction import java_parser  # noqa: E402
+from utils.structural import run_structural_analysis  # noqa: E402
+from utils.treesitter import JavaTreeSitterAnalyzer  # noqa: E402
+
+STAGES = ("parse", "facts", "structural", "correlate", "format", "serialize")
+
+
+def synthetic_findings(code_facts: CodeFact) -> list[PmdFinding]:
+    """A GodClass finding per class and a CyclomaticComplexity per fifth method."""
+    findings = []
+    for cls in code_facts.classes:
+        findings.append(
+            PmdFinding(
+                rule="GodClass",
+                message=f"Possible God Class (WMC=60, ATFD=8, TCC=10.000%) {cls.name}",
+                file_path=code_facts.file_path,
+                line=cls.start_line,
+                class_name=cls.name,
+            )
+        )
+        for method in cls.methods[::5]:
+            findings.append(
+                PmdFinding(
+                    rule="CyclomaticComplexity",
+                    message=f"The method '{method.name}()' has a cyclomatic complexity of 12.",
+                    file_path=code_facts.file_path,
+                    line=method.start_line,
+                    class_name=cls.name,
+                    method_name=method.name,
+                )
+            )
+    return findings
+
+
+def run_file(path: Path, timings: dict[str, list[float]]) -> None:
+    source = path.read_text(encoding="utf-8")
+    file_path = str(path)
+
+    start = time.perf_counter()
+    java_parser().parse(source.encode("utf-8"))
+    timings["parse"].append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    code_facts = JavaTreeSitterAnalyzer().analyze_source(source, file_path=file_path)
+    timings["facts"].append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    structural = run_structural_analysis(source, file_path=file_path)
+    timings["structural"].append(time.perf_counter() - start)
+
+    findings = synthetic_findings(code_facts)
+    start = time.perf_counter()
+    correlated = correlate_evidence(findings, code_facts)
+    timings["correlate"].append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    text = format_evidence_text(correlated, code_facts, structural)
+    timings["format"].append(time.perf_counter() - start)
+
+    evidence = AnalysisEvidence(
+        language="java",
+        file_path=file_path,
+        pmd_findings=findings,
+        code_facts=code_facts,
+        structural_analysis=structural,
+        correlated_findings=correlated,
+        evidence_text=text,
+    )
+    start = time.perf_counter()
+    evidence.model_dump_json()
+    timings["serialize"].append(time.perf_counter() - start)
+
+
+def summarize(values: list[float], files: int, lines: int) -> dict[str, float]:
+    total = sum(values)
+    quantiles = statistics.quantiles(values, n=100) if len(values) > 1 else values * 99
+    return {
+        "total_s": round(total, 6),
+        "p50_ms": round(quantiles[49] * 1000, 4),
+        "p95_ms": round(quantiles[94] * 1000, 4),
+        "files_per_s": round(files / total, 2) if total else 0.0,
+        "loc_per_s": round(lines / total, 1) if total else 0.0,
+    }
+
+
+def peak_rss_mib() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_spec_arguments(parser)
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--compare", type=Path, default=None)
+    args = parser.parse_args()
+    spec = spec_from_args(args)
+
+    timings: dict[str, list[float]] = {stage: [] for stage in STAGES}
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_corpus(spec, Path(tmp))
+        lines = sum(p.read_text(encoding="utf-8").count("\n") for p in paths)
+        java_parser()  # load the grammar outside the timed region
+        for path in paths:
+            run_file(path, timings)
+
+    files = len(paths)
+    per_file = [sum(stage_times) for stage_times in zip(*timings.values())]
+    result = {
+        "benchmark": "pipeline",
+        "corpus": spec.as_dict(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "files": files,
+        "lines": lines,
+        "stages": {stage: summarize(timings[stage], files, lines) for stage in STAGES},
+        "total": summarize(per_file, files, lines),
+        "peak_rss_mib": peak_rss_mib(),
+    }
+
+    print(f"files={files} lines={lines} peak_rss={result['peak_rss_mib']} MiB")
+    print(f"{'stage':<11} {'p50 ms':>9} {'p95 ms':>9} {'files/s':>10} {'LOC/s':>12}")
+    for name, row in [*result["stages"].items(), ("total", result["total"])]:
+        print(
+            f"{name:<11} {row['p50_ms']:9.3f} {row['p95_ms']:9.3f}"
+            f" {row['files_per_s']:10.1f} {row['loc_per_s']:12.0f}"
+        )
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        if baseline.get("corpus") != result["corpus"]:
+            print("warning: baseline was measured on a different corpus", file=sys.stderr)
+        print(f"\np50 relative to {args.compare}:")
+        for name in [*STAGES, "total"]:
+            before = (baseline["stages"].get(name) if name != "total" else baseline["total"]) or {}
+            after = result["stages"][name] if name != "total" else result["total"]
+            if before.get("p50_ms"):
+                print(f"{name:<11} {after['p50_ms'] / before['p50_ms']:6.2f}x")
+
+    if args.output:
+        args.output.write_text(json.dumps(result, indent=2) + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
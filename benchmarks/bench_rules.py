@@ -0,0 +1,129 @@
+"""Compare the native design-rule engine with PMD: agreement per rule and speed.
+
+Usage: python benchmarks/bench_rules.py [DIR ...] [--files 100] [--classes 2] [--methods 20]
+       [--depth 3] [--calls 0.3] [--statements 8] [--seed 7]
+       [--output parity.json] [--native-only]
+
+Without DIR, the seeded synthetic corpus from ``corpus.py`` is analyzed.
+Both engines check the same files without the result cache. A finding
+matches when both report the same rule on the same file and line. For each
+rule the script prints matched, PMD-only and native-only counts, and
+precision and recall of the native engine against PMD. Disagreements are
+listed in the ``--output`` JSON. ``--native-only`` (or PMD missing from
+PATH) times the native engine alone.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from corpus import add_spec_arguments, spec_from_args, write_corpus  # noqa: E402
+from models import PMD_DESIGN_RULES, PmdFinding  # noqa: E402
+from utils.extraction import java_parser  # noqa: E402
+from utils.native_rules import NativeRuleAnalyzer  # noqa: E402
+from utils.pmd import PmdAnalyzer  # noqa: E402
+
+Key = tuple[str, str, int]
+
+
+def run(analyzer, paths: list[Path]) -> tuple[dict[str, list[PmdFinding]], float]:
+    start = time.perf_counter()
+    results = analyzer.analyze_paths(paths)
+    return results, time.perf_counter() - start
+
+
+def keys(results: dict[str, list[PmdFinding]]) -> set[Key]:
+    return {(f.rule, path, f.line) for path, findings in results.items() for f in findings}
+
+
+def parity(pmd: set[Key], native: set[Key]) -> dict[str, dict[str, float | int]]:
+    matched = Counter(rule for rule, _, _ in pmd & native)
+    pmd_only = Counter(rule for rule, _, _ in pmd - native)
+    native_only = Counter(rule for rule, _, _ in native - pmd)
+    rows = {}
+    for rule in PMD_DESIGN_RULES:
+        hit, missed, extra = matched[rule], pmd_only[rule], native_only[rule]
+        rows[rule] = {
+            "matched": hit,
+            "pmd_only": missed,
+            "native_only": extra,
+            "precision": round(hit / (hit + extra), 4) if hit + extra else 1.0,
+            "recall": round(hit / (hit + missed), 4) if hit + missed else 1.0,
+        }
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("dirs", type=Path, nargs="*", help="Java source roots to compare on")
+    add_spec_arguments(parser)
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--native-only", action="store_true")
+    args = parser.parse_args()
+    spec = spec_from_args(args)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.dirs:
+            paths = sorted(p for d in args.dirs for p in d.resolve().rglob("*.java"))
+        else:
+            paths = write_corpus(spec, Path(tmp))
+        lines = sum(p.read_text(encoding="utf-8").count("\n") for p in paths)
+        java_parser()  # load the grammar outside the timed region
+        native, native_s = run(NativeRuleAnalyzer(), paths)
+        pmd = pmd_s = None
+        if not args.native_only and shutil.which("pmd"):
+            pmd, pmd_s = run(PmdAnalyzer(), paths)
+        elif not args.native_only:
+            print("PMD not on PATH; timing the native engine only.", file=sys.stderr)
+
+    result = {
+        "benchmark": "rules",
+        "corpus": [str(d) for d in args.dirs] if args.dirs else spec.as_dict(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "files": len(paths),
+        "lines": lines,
+        "native_s": round(native_s, 4),
+        "pmd_s": round(pmd_s, 4) if pmd_s is not None else None,
+    }
+    print(f"files={len(paths)} lines={lines}")
+    print(f"native {native_s:8.3f} s  {lines / native_s if native_s else 0:12.0f} LOC/s")
+    if pmd is None:
+        result["native_findings"] = dict(
+            Counter(f.rule for findings in native.values() for f in findings)
+        )
+    else:
+        print(f"pmd    {pmd_s:8.3f} s  {lines / pmd_s if pmd_s else 0:12.0f} LOC/s")
+        pmd_keys, native_keys = keys(pmd), keys(native)
+        result["rules"] = parity(pmd_keys, native_keys)
+        result["pmd_only"] = sorted(pmd_keys - native_keys)
+        result["native_only"] = sorted(native_keys - pmd_keys)
+        print(
+            f"\n{'rule':<24} {'matched':>8} {'pmd-only':>9} {'native-only':>12}"
+            f" {'precision':>10} {'recall':>7}"
+        )
+        for rule, row in result["rules"].items():
+            print(
+                f"{rule:<24} {row['matched']:8d} {row['pmd_only']:9d} {row['native_only']:12d}"
+                f" {row['precision']:10.3f} {row['recall']:7.3f}"
+            )
+
+    if args.output:
+        args.output.write_text(json.dumps(result, indent=2) + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Measure watch-mode refresh latency for single-method edits.
+
+Usage: python benchmarks/bench_watch.py [--methods 60] [--edits 50]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from utils.extraction import extract_java_facts  # noqa: E402
+from utils.watch import WatchSession  # noqa: E402
+
+
+def synthetic_class(methods: int, seed: int = 3) -> str:
+    rng = random.Random(seed)
+    lines = ["import java.util.List;", "", "public class Service {"]
+    for i in range(methods):
+        lines.append(f"    private List<String> items{i};")
+    for i in range(methods):
+        lines.append(f"    public int m{i}(int a, List<String> b) {{")
+        for _ in range(5):
+            lines.append(f"        int v = m{rng.randrange(methods)}(a, b) + a;")
+        lines.append("        return a;")
+        lines.append("    }")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--methods", type=int, default=60)
+    parser.add_argument("--edits", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    source = synthetic_class(args.methods)
+    with tempfile.TemporaryDirectory() as tmp:
+        target = Path(tmp) / "Service.java"
+        target.write_text(source, encoding="utf-8")
+        session = WatchSession([Path(tmp)])
+        session.poll()
+
+        refresh_ms: list[float] = []
+        full_ms: list[float] = []
+        for n in range(args.edits):
+            method = rng.randrange(args.methods)
+            source = source.replace(
+                f"    public int m{method}(int a, List<String> b) {{\n",
+                f"    public int m{method}(int a, List<String> b) {{\n        a += {n};\n",
+                1,
+            )
+            target.write_text(source, encoding="utf-8")
+            os.utime(target, ns=(n + 1, n + 1))
+
+            start = time.perf_counter()
+            updates = session.poll()
+            refresh_ms.append((time.perf_counter() - start) * 1000)
+            assert updates and updates[0].rescanned == 1
+
+            start = time.perf_counter()
+            expected = extract_java_facts(source, file_path=str(target.resolve()))
+            full_ms.append((time.perf_counter() - start) * 1000)
+            assert updates[0].evidence.code_facts == expected[0]
+        session.close()
+
+    def pct(values: list[float], q: float) -> float:
+        return statistics.quantiles(values, n=100)[q - 1] if len(values) > 1 else values[0]
+
+    print(f"lines={source.count(chr(10))} methods={args.methods} edits={args.edits}")
+    print(f"watch refresh: p50 {pct(refresh_ms, 50):6.1f} ms  p95 {pct(refresh_ms, 95):6.1f} ms")
+    print(f"full extract:  p50 {pct(full_ms, 50):6.1f} ms  p95 {pct(full_ms, 95):6.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Seeded generator for synthetic Java projects used by the benchmarks.
+
+Usage: python benchmarks/corpus.py OUT_DIR [--files 100] [--classes 2] [--methods 20]
+       [--depth 3] [--calls 0.3] [--statements 8] [--seed 7]
+
+The same parameters and seed always produce byte-identical files, so
+timings from different runs or machines measure the same input.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+
+@dataclass(frozen=True)
+class CorpusSpec:
+    files: int = 100
+    classes: int = 2  # top-level classes per file
+    methods: int = 20  # methods per class
+    depth: int = 3  # maximum nesting of if/for blocks in a method body
+    calls: float = 0.3  # probability that a statement is a method call
+    statements: int = 8  # statements per block
+    seed: int = 7
+
+    def as_dict(self) -> dict[str, float | int]:
+        return asdict(self)
+
+
+def generate_file(spec: CorpusSpec, index: int) -> str:
+    """Source of file ``index``; depends only on ``spec`` and ``index``."""
+    rng = random.Random(f"{spec.seed}:{index}")
+    package = f"bench.p{index % 10}"
+    lines = [f"package {package};", "", "import java.util.List;", "import java.util.Map;", ""]
+    for c in range(spec.classes):
+        name = _class_name(index, c)
+        peer = _class_name(rng.randrange(spec.files), rng.randrange(spec.classes))
+        visibility = "public " if c == 0 else ""
+        lines.append(f"{visibility}class {name} {{")
+        lines.append(f"    private {peer} peer;")
+        lines.append("    private List<String> items;")
+        lines.append("    private Map<String, Integer> counts;")
+        lines.append("    private int total;")
+        for m in range(spec.methods):
+            params = ", ".join(f"int a{p}" for p in range(rng.randrange(1, 5)))
+            lines.append(f"    public int m{m}({params}) {{")
+            lines.append("        int v = a0;")
+            _block(lines, rng, spec, depth=0, indent=2)
+            lines.append("        return v;")
+            lines.append("    }")
+        lines.append("}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def write_corpus(spec: CorpusSpec, out_dir: Path) -> list[Path]:
+    """Write the corpus under ``out_dir`` in package directories; return the paths."""
+    paths = []
+    for index in range(spec.files):
+        directory = out_dir / "bench" / f"p{index % 10}"
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{_class_name(index, 0)}.java"
+        path.write_text(generate_file(spec, index), encoding="utf-8")
+        paths.append(path)
+    return paths
+
+
+def _class_name(file_index: int, class_index: int) -> str:
+    return f"Service{file_index}" if class_index == 0 else f"Helper{file_index}x{class_index}"
+
+
+def _block(lines: list[str], rng: random.Random, spec: CorpusSpec, *, depth: int, indent: int) -> None:
+    pad = "    " * indent
+    for s in range(spec.statements):
+        roll = rng.random()
+        if roll < spec.calls:
+            target = rng.choice(("", "this.", "peer."))
+            lines.append(f"{pad}v += {target}m{rng.randrange(spec.methods)}(v);")
+        elif depth < spec.depth and roll < spec.calls + 0.15:
+            keyword = rng.choice(("if (v > {0})", "for (int i{1} = 0; i{1} < {0}; i{1}++)"))
+            lines.append(pad + keyword.format(rng.randrange(100), f"{depth}_{s}") + " {")
+            _block(lines, rng, spec, depth=depth + 1, indent=indent + 1)
+            lines.append(pad + "}")
+        elif roll < 0.8:
+            lines.append(f"{pad}total += v * {rng.randrange(1, 9)};")
+        else:
+            lines.append(f'{pad}items.add("s{rng.randrange(1000)}");')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("out_dir", type=Path)
+    add_spec_arguments(parser)
+    args = parser.parse_args()
+    paths = write_corpus(spec_from_args(args), args.out_dir)
+    lines = sum(p.read_text(encoding="utf-8").count("\n") for p in paths)
+    print(f"wrote {len(paths)} file(s), {lines} line(s) under {args.out_dir}")
+
+
+def add_spec_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = CorpusSpec()
+    parser.add_argument("--files", type=int, default=defaults.files)
+    parser.add_argument("--classes", type=int, default=defaults.classes)
+    parser.add_argument("--methods", type=int, default=defaults.methods)
+    parser.add_argument("--depth", type=int, default=defaults.depth)
+    parser.add_argument("--calls", type=float, default=defaults.calls)
+    parser.add_argument("--statements", type=int, default=defaults.statements)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def spec_from_args(args: argparse.Namespace) -> CorpusSpec:
+    return CorpusSpec(
+        files=args.files,
+        classes=args.classes,
+        methods=args.methods,
+        depth=args.depth,
+        calls=args.calls,
+        statements=args.statements,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    main()
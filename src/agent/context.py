@@ -0,0 +1,227 @@
+"""Select the source lines the issue localizer sees, within a token budget.
+
+Flagged members are sent in full, then the methods that call them or that
+they call. Other members shrink to their signatures, and everything left out
+is replaced by a one-line ``// ... N line(s) omitted`` marker, so line
+structure and nesting stay readable.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from models import ClassFact, CodeFact, CorrelatedFinding, MethodFact, StructuralAnalysis
+
+DEFAULT_CONTEXT_TOKENS = 2000
+
+_CHARS_PER_TOKEN = 4
+# Budget set aside for each omission marker a chunk may introduce.
+_MARKER_CHARS = 40
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // _CHARS_PER_TOKEN)
+
+
+def build_source_context(
+    source: str,
+    *,
+    code_facts: CodeFact | None,
+    structural: StructuralAnalysis | None = None,
+    correlated: Iterable[CorrelatedFinding] = (),
+    token_budget: int = DEFAULT_CONTEXT_TOKENS,
+) -> str:
+    """Return ``source`` sliced around the findings in ``correlated``.
+
+    Sources that already fit the budget are returned unchanged. Without
+    class facts to slice by, the first ``token_budget`` tokens are kept.
+    """
+    if estimate_tokens(source) <= token_budget:
+        return source
+    if code_facts is None or not code_facts.classes:
+        return source[: token_budget * _CHARS_PER_TOKEN]
+
+    plan = _SlicePlan(source.splitlines(), code_facts, token_budget * _CHARS_PER_TOKEN)
+    flagged_classes, flagged_methods = _flagged(code_facts, correlated)
+    neighbours = _call_neighbours(code_facts, structural, flagged_methods)
+
+    # Priority 0: what PMD flagged, with the declarations of its classes.
+    for cls in flagged_classes:
+        plan.add_class(cls, with_fields=True)
+    for cls, method in flagged_methods:
+        plan.add_class(cls, with_fields=False)
+        plan.add_method(method, body=True)
+    # Priority 1: direct callers and callees of flagged methods.
+    for cls, method in neighbours:
+        plan.add_class(cls, with_fields=False)
+        plan.add_method(method, body=True)
+    # Priority 2: signatures of the rest of the classes already shown, then
+    # priority 3: the outline of every other class.
+    shown = [cls for cls in code_facts.classes if id(cls) in plan.classes]
+    for cls in shown:
+        for method in cls.methods:
+            plan.add_method(method, body=False)
+    for cls in code_facts.classes:
+        if id(cls) in plan.classes:
+            continue
+        plan.add_class(cls, with_fields=False)
+        for method in cls.methods:
+            plan.add_method(method, body=False)
+    return plan.render()
+
+
+@dataclass
+class _SlicePlan:
+    lines: list[str]
+    code_facts: CodeFact
+    budget_chars: int
+    kept: set[int] = field(default_factory=set)
+    classes: set[int] = field(default_factory=set)
+    methods: set[int] = field(default_factory=set)
+    spent: int = 0
+
+    def add_class(self, cls: ClassFact, *, with_fields: bool) -> bool:
+        """Keep the class header and closing line, plus its fields if asked."""
+        first = cls.start_line
+        wanted = set(range(first, self._opening_line(first, cls.end_line) + 1))
+        wanted.add(cls.end_line)
+        if with_fields:
+            wanted |= self._own_lines(cls)
+        if not self._take(wanted):
+            return False
+        self.classes.add(id(cls))
+        return True
+
+    def add_method(self, method: MethodFact, *, body: bool) -> bool:
+        if body:
+            if self._take(set(range(method.start_line, method.end_line + 1))):
+                self.methods.add(id(method))
+                return True
+            body = False
+        if id(method) in self.methods:
+            return True
+        signature_end = self._opening_line(method.start_line, method.end_line)
+        wanted = set(range(method.start_line, signature_end + 1))
+        wanted.add(method.end_line)
+        if not self._take(wanted):
+            return False
+        self.methods.add(id(method))
+        return True
+
+    def render(self) -> str:
+        out: list[str] = []
+        line_no = 1
+        total = len(self.lines)
+        while line_no <= total:
+            if line_no in self.kept:
+                out.append(self.lines[line_no - 1])
+                line_no += 1
+                continue
+            start = line_no
+            while line_no <= total and line_no not in self.kept:
+                line_no += 1
+            skipped = self.lines[start - 1 : line_no - 1]
+            indent = next(
+                (line[: len(line) - len(line.lstrip())] for line in skipped if line.strip()),
+                "",
+            )
+            out.append(f"{indent}// ... {len(skipped)} line(s) omitted")
+        return "\n".join(out)
+
+    def _take(self, wanted: set[int]) -> bool:
+        new = {n for n in wanted if 1 <= n <= len(self.lines)} - self.kept
+        cost = sum(len(self.lines[n - 1]) + 1 for n in new) + _MARKER_CHARS
+        if new and self.spent + cost > self.budget_chars:
+            return False
+        self.kept |= new
+        self.spent += cost if new else 0
+        return True
+
+    def _opening_line(self, start: int, end: int) -> int:
+        """The line ending a declaration's header: its ``{``, or ``;`` if abstract."""
+        for n in range(start, min(end, len(self.lines)) + 1):
+            text = self.lines[n - 1]
+            if "{" in text or text.rstrip().endswith(";"):
+                return n
+        return start
+
+    def _own_lines(self, cls: ClassFact) -> set[int]:
+        """Lines of ``cls`` outside its methods and nested classes (fields etc.)."""
+        lines = set(range(cls.start_line, cls.end_line + 1))
+        for method in cls.methods:
+            lines -= set(range(method.start_line, method.end_line + 1))
+        for other in self.code_facts.classes:
+            if other is not cls and cls.start_line < other.start_line <= cls.end_line:
+                lines -= set(range(other.start_line, other.end_line + 1))
+        return lines
+
+
+def _flagged(
+    code_facts: CodeFact, correlated: Iterable[CorrelatedFinding]
+) -> tuple[list[ClassFact], list[tuple[ClassFact, MethodFact]]]:
+    """Map findings onto this file's facts, in finding order, without repeats."""
+    by_class = {(c.name, c.start_line): c for c in code_facts.classes}
+    by_method = {
+        (m.class_name, m.name, m.start_line): (c, m)
+        for c in code_facts.classes
+        for m in c.methods
+    }
+    classes: dict[int, ClassFact] = {}
+    methods: dict[int, tuple[ClassFact, MethodFact]] = {}
+    for finding in correlated:
+        if finding.method_fact is not None:
+            m = finding.method_fact
+            hit = by_method.get((m.class_name, m.name, m.start_line))
+            if hit is not None:
+                methods.setdefault(id(hit[1]), hit)
+        elif finding.class_fact is not None:
+            c = finding.class_fact
+            cls = by_class.get((c.name, c.start_line))
+            if cls is not None:
+                classes.setdefault(id(cls), cls)
+    return list(classes.values()), list(methods.values())
+
+
+def _call_neighbours(
+    code_facts: CodeFact,
+    structural: StructuralAnalysis | None,
+    flagged: list[tuple[ClassFact, MethodFact]],
+) -> list[tuple[ClassFact, MethodFact]]:
+    """Methods in this file that directly call, or are called by, a flagged method."""
+    if structural is None or not flagged:
+        return []
+    by_key: dict[str, list[tuple[ClassFact, MethodFact]]] = {}
+    for cls in code_facts.classes:
+        for method in cls.methods:
+            by_key.setdefault(f"{cls.name}.{method.name}", []).append((cls, method))
+
+    edges: set[tuple[str, str]] = set()
+    if structural.call_sites:
+        for site in structural.call_sites:
+            owner = site.receiver_type
+            if owner is None and site.receiver in (None, "this"):
+                owner = site.caller.split(".", 1)[0]
+            if owner is not None:
+                edges.add((site.caller, f"{owner}.{site.method_name}"))
+    else:
+        for rel in structural.call_relationships:
+            if "." not in rel.callee:
+                edges.add((rel.caller, f"{rel.caller.split('.', 1)[0]}.{rel.callee}"))
+            elif rel.callee_file in (None, rel.file_path):
+                edges.add((rel.caller, rel.callee))
+
+    flagged_keys = {f"{cls.name}.{method.name}" for cls, method in flagged}
+    flagged_ids = {id(method) for _, method in flagged}
+    found: dict[int, tuple[ClassFact, MethodFact]] = {}
+    for caller, callee in sorted(edges):
+        if caller in flagged_keys:
+            targets = by_key.get(callee, [])
+        elif callee in flagged_keys:
+            targets = by_key.get(caller, [])
+        else:
+            continue
+        for hit in targets:
+            if id(hit[1]) not in flagged_ids:
+                found.setdefault(id(hit[1]), hit)
+    return list(found.values())
@@ -0,0 +1,281 @@
+"""Deterministic offline chat model for running the workflow without an API.
+
+``MODEL=fake`` makes ``get_llm`` return :class:`FakeChatModel`. It plays each
+node's part the way a cooperative model would:
+
+- with the evidence tools bound, it calls ``run_pmd``, ``run_treesitter`` and
+  ``run_structural_metrics``, then ``correlate_evidence`` with their outputs;
+- with the localizer tools bound, it reads the correlated findings once;
+- asked for ``LocalizationOutput`` or ``RankedResult``, it derives them from
+  the evidence quoted in the prompt.
+
+Replies depend only on the messages, so runs are reproducible. Latency and
+output token counts can be simulated for load tests.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from typing import Any, Callable, Sequence
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import BaseChatModel, LanguageModelInput
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import Runnable
+from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+FAKE_MODEL_NAME = "fake"
+
+_CHARS_PER_TOKEN = 4
+_EVIDENCE_TOOLS = ("run_pmd", "run_treesitter", "run_structural_metrics")
+
+# Issue type and refactoring suggested for each PMD design rule.
+_RULE_ADVICE: dict[str, tuple[str, str]] = {
+    "GodClass": ("modularity", "move method"),
+    "CouplingBetweenObjects": ("modularity", "move method"),
+    "DataClass": ("information hiding", "move method"),
+    "LawOfDemeter": ("modularity", "move method"),
+    "ExcessiveParameterList": ("complexity", "parameterize variable"),
+    "TooManyMethods": ("complexity", "move method"),
+    "ExcessivePublicCount": ("information hiding", "inline method"),
+    "CyclomaticComplexity": ("complexity", "inline method"),
+}
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that answers every workflow prompt without a network call."""
+
+    model_name: str = FAKE_MODEL_NAME
+    latency: float = 0.0
+    output_tokens: int | None = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    @property
+    def _identifying_params(self) -> dict[str, Any]:
+        return {"model_name": self.model_name}
+
+    def bind_tools(
+        self,
+        tools: Sequence[dict[str, Any] | type | Callable | BaseTool],
+        *,
+        tool_choice: str | None = None,
+        **kwargs: Any,
+    ) -> Runnable[LanguageModelInput, BaseMessage]:
+        formatted = [convert_to_openai_tool(tool) for tool in tools]
+        return super().bind(tools=formatted, tool_choice=tool_choice, **kwargs)
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._reply(messages, kwargs.get("tools") or [])
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._reply(messages, kwargs.get("tools") or [])
+
+    def _reply(self, messages: list[BaseMessage], tools: list[dict[str, Any]]) -> ChatResult:
+        names = [tool["function"]["name"] for tool in tools]
+        prompt = _first_human_text(messages)
+        if "LocalizationOutput" in names:
+            message = _structured("LocalizationOutput", _localization(prompt))
+        elif "RankedResult" in names:
+            message = _structured("RankedResult", _ranking(prompt))
+        elif all(name in names for name in _EVIDENCE_TOOLS):
+            message = _evidence_turn(prompt, messages)
+        elif "get_correlated_findings" in names and not _tool_outputs(messages):
+            message = _tool_call_message([("get_correlated_findings", {})])
+        else:
+            message = AIMessage(content=_exploration(messages))
+
+        input_tokens = sum(_tokens(_message_text(m)) for m in messages)
+        output_tokens = (
+            self.output_tokens
+            if self.output_tokens is not None
+            else _tokens(_message_text(message))
+        )
+        message.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+        message.response_metadata = {"model_name": self.model_name}
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def _evidence_turn(prompt: str, messages: list[BaseMessage]) -> AIMessage:
+    outputs = _tool_outputs(messages)
+    file_path = _line_value(prompt, "file_path:")
+    if not outputs:
+        return _tool_call_message(
+            [(name, {"file_path": file_path}) for name in _EVIDENCE_TOOLS]
+        )
+    if "correlate_evidence" not in outputs:
+        pmd = _parse(outputs.get("run_pmd", "[]"))
+        return _tool_call_message(
+            [
+                (
+                    "correlate_evidence",
+                    {
+                        "pmd_findings_json": json.dumps(
+                            pmd.get("findings", []) if isinstance(pmd, dict) else pmd
+                        ),
+                        "code_facts_json": outputs.get("run_treesitter", ""),
+                        "structural_analysis_json": outputs.get("run_structural_metrics", ""),
+                        "source_code": "",
+                        "file_path": file_path,
+                    },
+                )
+            ]
+        )
+    return AIMessage(content="Evidence collected with all four tools.")
+
+
+def _localization(prompt: str) -> dict[str, Any]:
+    findings = _json_after(prompt, "Evidence summary:") or []
+    issues: list[str] = []
+    refactorings: list[str] = []
+    targets: list[dict[str, Any]] = []
+    seen: set[tuple[str, str]] = set()
+    for item in findings:
+        rule = item["pmd"]["rule"]
+        issue, refactoring = _RULE_ADVICE.get(rule, ("modularity", "move method"))
+        if issue not in issues:
+            issues.append(issue)
+        refactorings.append(refactoring)
+        cls = item.get("class") or {}
+        method = item.get("method") or {}
+        class_name = cls.get("name") or item["pmd"].get("class_name")
+        method_name = method.get("name") or next(
+            (m["name"] for m in cls.get("methods", [])), None
+        )
+        if not class_name or not method_name or (class_name, method_name) in seen:
+            continue
+        seen.add((class_name, method_name))
+        targets.append(
+            {
+                "class_name": class_name,
+                "function_name": method_name,
+                "function_signature": method.get("signature"),
+                "refactoring_type": refactoring,
+                "rationale": f"{rule}: {item['pmd']['message']}",
+                "pmd_rules": [rule],
+            }
+        )
+    return {
+        "design_issues": issues or ["modularity"],
+        "refactoring_type": max(refactorings, key=refactorings.count)
+        if refactorings
+        else "move method",
+        "targets": targets,
+    }
+
+
+def _ranking(prompt: str) -> dict[str, Any]:
+    targets = _json_after(prompt, "Targets:") or []
+    ranked = [{**target, "rank": rank} for rank, target in enumerate(targets, start=1)]
+    lines = ["# Design Issue Report", ""]
+    for target in ranked:
+        lines.append(
+            f"{target['rank']}. `{target['class_name']}.{target['function_name']}` — "
+            f"{target['refactoring_type']}: {target['rationale']}"
+        )
+    if not ranked:
+        lines.append("No refactoring targets were identified.")
+    return {"ranked_targets": ranked, "final_report": "\n".join(lines)}
+
+
+def _exploration(messages: list[BaseMessage]) -> str:
+    outputs = _tool_outputs(messages)
+    findings = _parse(outputs.get("get_correlated_findings", "[]")) or []
+    if not isinstance(findings, list) or not findings:
+        return "No correlated findings to explore."
+    rules = sorted({item["pmd"]["rule"] for item in findings})
+    return f"Explored {len(findings)} correlated finding(s): {', '.join(rules)}."
+
+
+def _structured(name: str, args: dict[str, Any]) -> AIMessage:
+    return _tool_call_message([(name, args)])
+
+
+def _tool_call_message(calls: list[tuple[str, dict[str, Any]]]) -> AIMessage:
+    return AIMessage(
+        content="",
+        tool_calls=[
+            {"name": name, "args": args, "id": f"call_{i}_{name}", "type": "tool_call"}
+            for i, (name, args) in enumerate(calls)
+        ],
+    )
+
+
+def _tool_outputs(messages: list[BaseMessage]) -> dict[str, str]:
+    return {
+        message.name: str(message.content)
+        for message in messages
+        if isinstance(message, ToolMessage) and message.name
+    }
+
+
+def _first_human_text(messages: list[BaseMessage]) -> str:
+    for message in messages:
+        if isinstance(message, HumanMessage):
+            return str(message.content)
+    return ""
+
+
+def _line_value(text: str, label: str) -> str:
+    for line in text.splitlines():
+        if line.startswith(label):
+            return line[len(label) :].strip()
+    return ""
+
+
+def _json_after(text: str, label: str) -> Any:
+    start = text.find(label)
+    if start < 0:
+        return None
+    try:
+        value, _ = json.JSONDecoder().raw_decode(text[start + len(label) :].lstrip())
+    except json.JSONDecodeError:
+        return None
+    return value
+
+
+def _parse(content: str) -> Any:
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError:
+        return None
+
+
+def _message_text(message: BaseMessage) -> str:
+    text = str(message.content)
+    for call in getattr(message, "tool_calls", None) or []:
+        text += json.dumps(call["args"])
+    return text
+
+
+def _tokens(text: str) -> int:
+    return -(-len(text) // _CHARS_PER_TOKEN)
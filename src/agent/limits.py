@@ -0,0 +1,216 @@
+"""Concurrency, rate limits and retries for every request to the LLM API.
+
+The limits live in an httpx transport rather than around individual model
+calls. Everything that reaches the API goes through the same transport:
+ReAct agent turns, structured-output calls, and sync or async invocations
+alike.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import threading
+import time
+import weakref
+from dataclasses import dataclass, field
+from typing import Callable
+
+import httpx
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_MAX_RETRIES = 5
+
+# Rough prompt size in tokens; only used to pace the tokens-per-minute bucket.
+_BYTES_PER_TOKEN = 4
+
+
+class TokenBucket:
+    """Refill ``per_minute`` units evenly over a minute, up to one minute's worth.
+
+    ``reserve`` always succeeds and returns how long the caller must wait
+    before using what it took. The level may go negative, which queues later
+    callers behind earlier ones without needing a lock across the wait.
+    """
+
+    def __init__(
+        self, per_minute: float, *, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        if per_minute <= 0:
+            raise ValueError("per_minute must be positive")
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self._clock = clock
+        self._level = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float = 1.0) -> float:
+        with self._lock:
+            now = self._clock()
+            self._level = min(
+                self.capacity, self._level + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            # A single request larger than the bucket waits for a full bucket
+            # instead of forever.
+            self._level -= min(amount, self.capacity)
+            return 0.0 if self._level >= 0 else -self._level / self.rate
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Exponential backoff with full jitter, honouring ``Retry-After``."""
+
+    max_retries: int = DEFAULT_MAX_RETRIES
+    base_delay: float = 0.5
+    max_delay: float = 30.0
+
+    def delay(self, attempt: int, response: httpx.Response | None = None) -> float:
+        ceiling = min(self.max_delay, self.base_delay * 2**attempt)
+        wait = random.uniform(0, ceiling)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                wait = max(wait, min(self.max_delay, float(retry_after)))
+            except ValueError:
+                pass
+        return wait
+
+
+@dataclass
+class RequestLimits:
+    """Limits shared by every request in the process.
+
+    ``requests_per_minute`` and ``tokens_per_minute`` are ``None`` for no
+    limit. Request tokens are estimated from the body size plus
+    ``max_tokens``, since the real count is only known after the response.
+    """
+
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+    requests_per_minute: float | None = None
+    tokens_per_minute: float | None = None
+    retry: RetryPolicy = field(default_factory=RetryPolicy)
+    _requests: TokenBucket | None = field(init=False, repr=False, default=None)
+    _tokens: TokenBucket | None = field(init=False, repr=False, default=None)
+    _thread_slots: threading.BoundedSemaphore = field(init=False, repr=False)
+    _loop_slots: weakref.WeakKeyDictionary = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        if self.requests_per_minute:
+            self._requests = TokenBucket(self.requests_per_minute)
+        if self.tokens_per_minute:
+            self._tokens = TokenBucket(self.tokens_per_minute)
+        self._thread_slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._loop_slots = weakref.WeakKeyDictionary()
+
+    def pacing_delay(self, request: httpx.Request) -> float:
+        """Reserve rate-limit budget for ``request``; return the wait it needs."""
+        delay = 0.0
+        if self._requests is not None:
+            delay = self._requests.reserve()
+        if self._tokens is not None:
+            delay = max(delay, self._tokens.reserve(estimate_tokens(request)))
+        return delay
+
+    def async_slots(self) -> asyncio.Semaphore:
+        """The in-flight semaphore for the running event loop.
+
+        asyncio primitives belong to one loop, so each loop gets its own
+        semaphore of ``max_concurrency`` slots.
+        """
+        loop = asyncio.get_running_loop()
+        slots = self._loop_slots.get(loop)
+        if slots is None:
+            slots = self._loop_slots[loop] = asyncio.Semaphore(self.max_concurrency)
+        return slots
+
+
+def estimate_tokens(request: httpx.Request) -> int:
+    body = request.content
+    tokens = len(body) // _BYTES_PER_TOKEN
+    try:
+        payload = json.loads(body) if body else {}
+    except ValueError:
+        return tokens
+    if isinstance(payload, dict):
+        completion = payload.get("max_completion_tokens") or payload.get("max_tokens")
+        if isinstance(completion, int):
+            tokens += completion
+    return tokens
+
+
+class LimitedTransport(httpx.BaseTransport):
+    """Blocking transport that applies ``limits`` around ``inner``."""
+
+    def __init__(
+        self, limits: RequestLimits, inner: httpx.BaseTransport | None = None
+    ) -> None:
+        self.limits = limits
+        self.inner = inner or httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        retry = self.limits.retry
+        attempt = 0
+        while True:
+            # Wait for rate-limit budget before taking a slot, so paced
+            # requests do not hold up ones that may go now.
+            time.sleep(self.limits.pacing_delay(request))
+            with self.limits._thread_slots:
+                try:
+                    response = self.inner.handle_request(request)
+                except httpx.TransportError:
+                    if attempt >= retry.max_retries:
+                        raise
+                    response = None
+            if response is not None and (
+                response.status_code not in RETRY_STATUSES
+                or attempt >= retry.max_retries
+            ):
+                return response
+            if response is not None:
+                response.close()
+            time.sleep(retry.delay(attempt, response))
+            attempt += 1
+
+    def close(self) -> None:
+        self.inner.close()
+
+
+class AsyncLimitedTransport(httpx.AsyncBaseTransport):
+    """Async counterpart of :class:`LimitedTransport`."""
+
+    def __init__(
+        self, limits: RequestLimits, inner: httpx.AsyncBaseTransport | None = None
+    ) -> None:
+        self.limits = limits
+        self.inner = inner or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        retry = self.limits.retry
+        attempt = 0
+        while True:
+            await asyncio.sleep(self.limits.pacing_delay(request))
+            async with self.limits.async_slots():
+                try:
+                    response = await self.inner.handle_async_request(request)
+                except httpx.TransportError:
+                    if attempt >= retry.max_retries:
+                        raise
+                    response = None
+            if response is not None and (
+                response.status_code not in RETRY_STATUSES
+                or attempt >= retry.max_retries
+            ):
+                return response
+            if response is not None:
+                await response.aclose()
+            await asyncio.sleep(retry.delay(attempt, response))
+            attempt += 1
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
@@ -2,15 +2,238 @@
 
 from __future__ import annotations
 
+import asyncio
 import os
+import weakref
+from typing import Any
+from uuid import UUID
 
+import httpx
+from httpx._utils import get_environment_proxies
+from langchain_core.caches import BaseCache
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models import BaseChatModel
 from langchain_openai import ChatOpenAI
 
+from agent.fake_llm import FAKE_MODEL_NAME, FakeChatModel
+from agent.limits import AsyncLimitedTransport, LimitedTransport, RequestLimits
+from utils.metrics import record_llm_usage
+from utils.tracing import Span, Tracer, active_tracer
 
-def get_llm() -> ChatOpenAI:
+# Same defaults as the OpenAI SDK; per-request timeouts still override them.
+_HTTP_TIMEOUT = httpx.Timeout(600.0, connect=5.0)
+
+_response_cache: BaseCache | None = None
+_limits = RequestLimits()
+_http_client: httpx.Client | None = None
+_async_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def configure_llm_cache(cache: BaseCache | None) -> None:
+    """Set the response cache used by every model from ``get_llm`` (``None`` disables it)."""
+    global _response_cache
+    _response_cache = cache
+
+
+def configure_llm_limits(limits: RequestLimits | None) -> None:
+    """Set the concurrency, rate limits and retries for every LLM request.
+
+    ``None`` restores the defaults. Shared HTTP clients are rebuilt lazily
+    with the new limits.
+    """
+    global _limits, _http_client
+    _limits = limits or RequestLimits()
+    if _http_client is not None:
+        _http_client.close()
+    _http_client = None
+    _async_clients.clear()
+
+
+def llm_limits() -> RequestLimits:
+    return _limits
+
+
+def shared_http_client() -> httpx.Client:
+    """The process-wide blocking client; connections are pooled across calls."""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.Client(
+            transport=LimitedTransport(_limits),
+            mounts={
+                pattern: LimitedTransport(_limits, httpx.HTTPTransport(proxy=proxy))
+                for pattern, proxy in _environment_proxies().items()
+            },
+            timeout=_HTTP_TIMEOUT,
+        )
+    return _http_client
+
+
+def shared_async_client() -> httpx.AsyncClient | None:
+    """The async client for the running event loop, or ``None`` outside one.
+
+    Async connections belong to the loop that opened them, so each loop gets
+    one client, reused by every node and file running on it.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = httpx.AsyncClient(
+            transport=AsyncLimitedTransport(_limits),
+            mounts={
+                pattern: AsyncLimitedTransport(
+                    _limits, httpx.AsyncHTTPTransport(proxy=proxy)
+                )
+                for pattern, proxy in _environment_proxies().items()
+            },
+            timeout=_HTTP_TIMEOUT,
+        )
+    return client
+
+
+def _environment_proxies() -> dict[str, str | None]:
+    """``HTTP(S)_PROXY``/``ALL_PROXY``/``NO_PROXY`` as httpx URL patterns.
+
+    httpx only reads them when it builds its own transport, so the limited
+    transports are mounted per pattern here. ``None`` means no proxy.
+    """
+    return get_environment_proxies()
+
+
+async def aclose_shared_client() -> None:
+    """Close the running loop's async client; call before the loop ends."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+class LLMSpanHandler(BaseCallbackHandler):
+    """Record an ``llm.call`` span, with token usage, for every model call."""
+
+    # Run in the caller's thread or task so spans land in the right lane.
+    run_inline = True
+
+    def __init__(self, tracer: Tracer, model: str) -> None:
+        self.tracer = tracer
+        self.model = model
+        self._spans: dict[UUID, Span] = {}
+
+    def on_chat_model_start(
+        self,
+        serialized: dict[str, Any],
+        messages: list[list[Any]],
+        *,
+        run_id: UUID,
+        **kwargs: Any,
+    ) -> None:
+        tools = (kwargs.get("invocation_params") or {}).get("tools") or []
+        self._spans[run_id] = self.tracer.start(
+            "llm.call",
+            "llm",
+            model=self.model,
+            messages=len(messages[0]) if messages else 0,
+            tools=len(tools),
+        )
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        trace_span = self._spans.pop(run_id, None)
+        if trace_span is None:
+            return
+        generations = response.generations[0] if response.generations else []
+        message = getattr(generations[0], "message", None) if generations else None
+        usage = getattr(message, "usage_metadata", None) or {}
+        trace_span.set(
+            input_tokens=usage.get("input_tokens", 0),
+            output_tokens=usage.get("output_tokens", 0),
+            tool_calls=len(getattr(message, "tool_calls", None) or []),
+        )
+        trace_span.end()
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        trace_span = self._spans.pop(run_id, None)
+        if trace_span is not None:
+            trace_span.set(error=type(error).__name__)
+            trace_span.end()
+
+
+class LLMUsageHandler(BaseCallbackHandler):
+    """Count prompt and completion tokens, and estimated cost, per graph node."""
+
+    run_inline = True
+
+    def __init__(self, model: str) -> None:
+        self.model = model
+        self._nodes: dict[UUID, str] = {}
+
+    def on_chat_model_start(
+        self,
+        serialized: dict[str, Any],
+        messages: list[list[Any]],
+        *,
+        run_id: UUID,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        self._nodes[run_id] = _graph_node(metadata or {})
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        node = self._nodes.pop(run_id, "none")
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage = getattr(message, "usage_metadata", None) or {}
+                record_llm_usage(
+                    node,
+                    self.model,
+                    usage.get("input_tokens", 0),
+                    usage.get("output_tokens", 0),
+                )
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._nodes.pop(run_id, None)
+
+
+def _graph_node(metadata: dict[str, Any]) -> str:
+    # Inside a ReAct subgraph ``langgraph_node`` is the subgraph's "agent";
+    # the checkpoint namespace starts with the outer workflow node.
+    namespace = metadata.get("langgraph_checkpoint_ns") or ""
+    if namespace:
+        return namespace.split("|", 1)[0].split(":", 1)[0]
+    return metadata.get("langgraph_node") or "none"
+
+
+def get_llm() -> BaseChatModel:
+    """The chat model named by ``MODEL``; ``MODEL=fake`` needs no network or key.
+
+    The fake model's simulated latency (seconds) and output token count come
+    from ``FAKE_LLM_LATENCY`` and ``FAKE_LLM_OUTPUT_TOKENS``.
+    """
     model = (
         os.getenv("MODEL")
         or os.getenv("OPENAI_MODEL_NAME")
         or "gpt-4o-mini"
     )
-    return ChatOpenAI(model=model, temperature=0)
+    tracer = active_tracer()
+    callbacks: list[BaseCallbackHandler] = [LLMUsageHandler(model)]
+    if tracer is not None:
+        callbacks.append(LLMSpanHandler(tracer, model))
+    if model == FAKE_MODEL_NAME:
+        output_tokens = os.getenv("FAKE_LLM_OUTPUT_TOKENS")
+        return FakeChatModel(
+            cache=_response_cache,
+            callbacks=callbacks,
+            latency=float(os.getenv("FAKE_LLM_LATENCY") or 0),
+            output_tokens=int(output_tokens) if output_tokens else None,
+        )
+    return ChatOpenAI(
+        model=model,
+        temperature=0,
+        cache=_response_cache,
+        callbacks=callbacks,
+        # Retries happen in the shared transport, with jittered backoff.
+        max_retries=0,
+        http_client=shared_http_client(),
+        http_async_client=shared_async_client(),
+    )
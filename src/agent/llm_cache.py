@@ -0,0 +1,114 @@
+"""Persistent LangChain response cache backed by the analysis SQLite store."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Sequence
+
+from langchain_core.caches import BaseCache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+
+from utils.cache import AnalysisCache
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Per-message fields that vary between otherwise identical conversations.
+_VOLATILE_MESSAGE_FIELDS = ("id", "response_metadata", "usage_metadata")
+
+
+class LLMResponseCache(BaseCache):
+    """Cache chat completions keyed by normalized messages and model settings.
+
+    LangChain passes the serialized message list as ``prompt`` and a string
+    covering the model name, temperature and any bound tools or structured
+    output schema as ``llm_string``. Message ids and response metadata are
+    dropped before hashing so replayed conversations map to the same key.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path | None = None,
+        *,
+        ttl_seconds: float | None = DEFAULT_TTL_SECONDS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        self.store = AnalysisCache(
+            cache_dir,
+            max_bytes=max_bytes,
+            ttl_seconds=ttl_seconds,
+            db_name="llm_responses.sqlite3",
+        )
+
+    @property
+    def hits(self) -> int:
+        return self.store.hits
+
+    @property
+    def misses(self) -> int:
+        return self.store.misses
+
+    def stats(self) -> dict[str, int]:
+        return self.store.stats()
+
+    def lookup(self, prompt: str, llm_string: str) -> Sequence[Generation] | None:
+        cached = self.store.get(_cache_key(prompt, llm_string))
+        if cached is None:
+            return None
+        return [_generation_from_dict(item) for item in cached]
+
+    def update(
+        self, prompt: str, llm_string: str, return_val: Sequence[Generation]
+    ) -> None:
+        self.store.put(
+            _cache_key(prompt, llm_string),
+            "llm",
+            [_generation_to_dict(generation) for generation in return_val],
+        )
+
+    def clear(self, **kwargs: Any) -> None:
+        self.store.clear()
+
+
+def _generation_to_dict(generation: Generation) -> dict[str, Any]:
+    data: dict[str, Any] = {
+        "text": generation.text,
+        "generation_info": generation.generation_info,
+    }
+    if isinstance(generation, ChatGeneration):
+        data["message"] = message_to_dict(generation.message)
+    return data
+
+
+def _generation_from_dict(data: dict[str, Any]) -> Generation:
+    if "message" in data:
+        message = messages_from_dict([data["message"]])[0]
+        return ChatGeneration(message=message, generation_info=data["generation_info"])
+    return Generation(text=data["text"], generation_info=data["generation_info"])
+
+
+def _cache_key(prompt: str, llm_string: str) -> str:
+    try:
+        normalized = json.dumps(_normalize(json.loads(prompt)), sort_keys=True)
+    except json.JSONDecodeError:
+        normalized = prompt
+    raw = f"{normalized}\0{llm_string}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _normalize(data: Any) -> Any:
+    if isinstance(data, list):
+        return [_normalize(item) for item in data]
+    if not isinstance(data, dict):
+        return data
+    if data.get("type") == "constructor" and isinstance(data.get("kwargs"), dict):
+        kwargs = {
+            k: _normalize(v)
+            for k, v in data["kwargs"].items()
+            if k not in _VOLATILE_MESSAGE_FIELDS
+        }
+        return {**data, "kwargs": kwargs}
+    return {k: _normalize(v) for k, v in data.items()}
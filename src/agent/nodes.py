@@ -2,23 +2,31 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 from typing import Any
 
 from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
 from langgraph.prebuilt import create_react_agent
 
+from pydantic import ValidationError
+
 from utils.correlator import build_analysis_evidence
+from agent.context import DEFAULT_CONTEXT_TOKENS, build_source_context
 from agent.llm import get_llm
-from agent.state import AnalysisState, LocalizationOutput, RankedResult
-from agent.tools import EVIDENCE_TOOLS, correlate_evidence
-from models import RefactoringTarget
-from utils.structural import (
-    merge_fan_metrics_into_code_facts,
-    run_structural_analysis,
+from agent.state import AnalysisState, LocalizationOutput, RankedResult, as_model
+from agent.tools import EVIDENCE_TOOLS, correlated_to_payload, evidence_from_payload
+from models import (
+    AnalysisEvidence,
+    CodeFact,
+    PmdFinding,
+    RefactoringTarget,
+    StructuralAnalysis,
 )
-from utils.pmd import PmdAnalyzer, PmdNotAvailableError
-from utils.treesitter import JavaTreeSitterAnalyzer
+from utils.cache import default_cache
+from utils.extraction import extract_java_facts
+from utils.rules_engine import design_rule_analyzer, rules_engine
+from utils.tracing import span
 
 
 def _message_text(messages: list[Any]) -> str:
@@ -43,13 +51,13 @@ def _parse_json(content: str) -> Any:
         return None
 
 
-def _apply_correlated_payload(state: AnalysisState, payload: dict[str, Any]) -> AnalysisState:
+def _evidence_update(state: AnalysisState, evidence: AnalysisEvidence) -> AnalysisState:
     return AnalysisState(
-        pmd_findings=payload.get("pmd_findings", []),
-        code_facts=payload.get("code_facts"),
-        structural_analysis=payload.get("structural_analysis"),
-        correlated_findings=payload.get("correlated_findings", []),
-        raw_llm_output=state.get("raw_llm_output", "") + "\n" + (payload.get("evidence_text") or ""),
+        pmd_findings=evidence.pmd_findings,
+        code_facts=evidence.code_facts,
+        structural_analysis=evidence.structural_analysis,
+        correlated_findings=evidence.correlated_findings,
+        raw_llm_output=state.get("raw_llm_output", "") + "\n" + (evidence.evidence_text or ""),
     )
 
 
@@ -57,50 +65,67 @@ def _collect_evidence_deterministic(state: AnalysisState) -> AnalysisState:
     file_path = state["file_path"]
     source_code = state["source_code"]
 
-    code_facts = JavaTreeSitterAnalyzer().analyze_source(
-        source_code, file_path=file_path
-    )
-    structural = run_structural_analysis(source_code, file_path=file_path)
-    code_facts = merge_fan_metrics_into_code_facts(code_facts, structural)
-
+    cache = default_cache()
+    with span("extract_facts", "analysis", file=file_path, bytes=len(source_code)) as trace_span:
+        code_facts, structural = extract_java_facts(
+            source_code, file_path=file_path, cache=cache
+        )
+        trace_span.set(classes=len(code_facts.classes), methods=code_facts.total_methods)
+
+    with span(
+        "pmd.analyze", "pmd", file=file_path, bytes=len(source_code), engine=rules_engine()
+    ) as trace_span:
+        try:
+            pmd_findings = design_rule_analyzer(cache).analyze_source(
+                source_code, file_name=file_path.rsplit("/", 1)[-1]
+            )
+        except RuntimeError as exc:  # PMD missing, failed or timed out
+            pmd_findings = []
+            trace_span.set(error=type(exc).__name__)
+        trace_span.set(findings=len(pmd_findings))
+
+    with span("correlate", "analysis", file=file_path) as trace_span:
+        evidence = build_analysis_evidence(
+            language="java",
+            file_path=file_path,
+            project_path=None,
+            source_code=source_code,
+            pmd_findings=pmd_findings,
+            code_facts=code_facts,
+            structural_analysis=structural,
+        )
+        trace_span.set(findings=len(evidence.correlated_findings))
+    return _evidence_update(state, evidence)
+
+
+def _evidence_from_tool_outputs(
+    state: AnalysisState,
+    pmd_json: str | None,
+    treesitter_json: str | None,
+    structural_json: str | None,
+) -> AnalysisEvidence | None:
+    pmd_data = _parse_json(pmd_json or "[]")
+    if isinstance(pmd_data, dict):
+        pmd_data = pmd_data.get("findings", [])
+    code_facts_data = _parse_json(treesitter_json or "null")
+    structural_data = _parse_json(structural_json or "null")
     try:
-        pmd_findings = PmdAnalyzer().analyze_source(
-            source_code, file_name=file_path.rsplit("/", 1)[-1]
+        pmd_findings = [PmdFinding.model_validate(item) for item in pmd_data or []]
+        code_facts = CodeFact.model_validate(code_facts_data) if code_facts_data else None
+        structural = (
+            StructuralAnalysis.model_validate(structural_data) if structural_data else None
         )
-    except PmdNotAvailableError:
-        pmd_findings = []
-
-    evidence = build_analysis_evidence(
+    except ValidationError:
+        return None
+    return build_analysis_evidence(
         language="java",
-        file_path=file_path,
+        file_path=state["file_path"],
         project_path=None,
-        source_code=source_code,
+        source_code=state["source_code"],
         pmd_findings=pmd_findings,
         code_facts=code_facts,
         structural_analysis=structural,
     )
-    payload = json.loads(
-        correlate_evidence.invoke(
-            {
-                "pmd_findings_json": json.dumps(
-                    [f.model_dump(mode="json") for f in evidence.pmd_findings]
-                ),
-                "code_facts_json": json.dumps(
-                    evidence.code_facts.model_dump(mode="json")
-                    if evidence.code_facts
-                    else {}
-                ),
-                "structural_analysis_json": json.dumps(
-                    evidence.structural_analysis.model_dump(mode="json")
-                    if evidence.structural_analysis
-                    else {}
-                ),
-                "source_code": source_code,
-                "file_path": file_path,
-            }
-        )
-    )
-    return _apply_correlated_payload(state, payload)
 
 
 def _extract_evidence_from_messages(
@@ -114,30 +139,24 @@ def _extract_evidence_from_messages(
     if "correlate_evidence" in results:
         payload = _parse_json(results["correlate_evidence"])
         if isinstance(payload, dict):
-            merged = _apply_correlated_payload(state, payload)
-            return AnalysisState(**{**state, **merged, **update})
+            try:
+                evidence = evidence_from_payload(payload)
+            except ValidationError:
+                evidence = None
+            if evidence is not None:
+                merged = _evidence_update(state, evidence)
+                return AnalysisState(**{**state, **merged, **update})
 
     pmd_json = results.get("run_pmd")
     treesitter_json = results.get("run_treesitter")
     structural_json = results.get("run_structural_metrics")
 
     if pmd_json or treesitter_json or structural_json:
-        pmd_data = _parse_json(pmd_json or "[]")
-        if isinstance(pmd_data, dict):
-            pmd_data = pmd_data.get("findings", [])
-        payload = _parse_json(
-            correlate_evidence.invoke(
-                {
-                    "pmd_findings_json": json.dumps(pmd_data or []),
-                    "code_facts_json": treesitter_json or "{}",
-                    "structural_analysis_json": structural_json or "{}",
-                    "source_code": state["source_code"],
-                    "file_path": state["file_path"],
-                }
-            )
+        evidence = _evidence_from_tool_outputs(
+            state, pmd_json, treesitter_json, structural_json
         )
-        if isinstance(payload, dict):
-            merged = _apply_correlated_payload(state, payload)
+        if evidence is not None:
+            merged = _evidence_update(state, evidence)
             return AnalysisState(**{**state, **merged, **update})
 
     if not state.get("correlated_findings"):
@@ -145,109 +164,167 @@ def _extract_evidence_from_messages(
     return AnalysisState(**{**state, **update})
 
 
+def deterministic_evidence_node(state: AnalysisState) -> AnalysisState:
+    """Run the static tools in-process without asking the model to call them."""
+    collected = _collect_evidence_deterministic(state)
+    return AnalysisState(**{**state, **collected})
+
+
+def _evidence_agent_prompt(state: AnalysisState) -> list[HumanMessage]:
+    return [
+        HumanMessage(
+            content=(
+                "Collect static analysis evidence for the Java file.\n"
+                f"file_path: {state['file_path']}\n"
+                "Call run_pmd, run_treesitter, and run_structural_metrics on the file_path, "
+                "then call correlate_evidence with their JSON outputs plus source_code and file_path.\n"
+                "Use all tools before finishing."
+            )
+        )
+    ]
+
+
 def evidence_collector_node(state: AnalysisState) -> AnalysisState:
-    llm = get_llm()
-    agent = create_react_agent(llm, EVIDENCE_TOOLS)
-    prompt = (
-        "Collect static analysis evidence for the Java file.\n"
-        f"file_path: {state['file_path']}\n"
-        "Call run_pmd, run_treesitter, and run_structural_metrics on the file_path, "
-        "then call correlate_evidence with their JSON outputs plus source_code and file_path.\n"
-        "Use all tools before finishing."
-    )
-    result = agent.invoke({"messages": [HumanMessage(content=prompt)]})
+    agent = create_react_agent(get_llm(), EVIDENCE_TOOLS)
+    result = agent.invoke({"messages": _evidence_agent_prompt(state)})
     extracted = _extract_evidence_from_messages(state, result["messages"])
     return AnalysisState(**{**state, **extracted})
 
 
+async def aevidence_collector_node(state: AnalysisState) -> AnalysisState:
+    agent = create_react_agent(get_llm(), EVIDENCE_TOOLS)
+    result = await agent.ainvoke({"messages": _evidence_agent_prompt(state)})
+    # The fallback may run the static tools, so keep it off the event loop.
+    extracted = await asyncio.to_thread(
+        _extract_evidence_from_messages, state, result["messages"]
+    )
+    return AnalysisState(**{**state, **extracted})
+
+
 def _make_localizer_tools(state: AnalysisState):
     from langchain_core.tools import tool
 
     @tool
     def get_correlated_findings() -> str:
         """Return correlated PMD and structural findings from collected evidence."""
-        return json.dumps(state.get("correlated_findings", []), indent=2)
+        return json.dumps(
+            correlated_to_payload(state.get("correlated_findings", [])), indent=2
+        )
 
     @tool
     def get_class_details(class_name: str) -> str:
         """Return Tree-sitter class facts for a class name."""
-        code_facts = state.get("code_facts") or {}
-        for cls in code_facts.get("classes", []):
-            if cls.get("name") == class_name:
-                return json.dumps(cls, indent=2)
+        code_facts = state.get("code_facts")
+        for cls in code_facts.classes if code_facts else []:
+            if cls.name == class_name:
+                return cls.model_dump_json(indent=2)
         return json.dumps({"error": f"Class not found: {class_name}"})
 
     @tool
     def get_method_details(class_name: str, method_name: str) -> str:
         """Return method facts including fan-in/out for a class.method pair."""
-        code_facts = state.get("code_facts") or {}
-        for cls in code_facts.get("classes", []):
-            if cls.get("name") != class_name:
+        code_facts = state.get("code_facts")
+        for cls in code_facts.classes if code_facts else []:
+            if cls.name != class_name:
                 continue
-            for method in cls.get("methods", []):
-                if method.get("name") == method_name:
-                    return json.dumps(method, indent=2)
+            for method in cls.methods:
+                if method.name == method_name:
+                    return method.model_dump_json(indent=2)
         return json.dumps({"error": f"Method not found: {class_name}.{method_name}"})
 
     return [get_correlated_findings, get_class_details, get_method_details]
 
 
-def issue_localizer_node(state: AnalysisState) -> AnalysisState:
-    llm = get_llm()
-    tools = _make_localizer_tools(state)
-    agent = create_react_agent(llm, tools)
-    prompt = (
-        "Analyze the collected evidence and identify Java design issues.\n"
-        "Allowed design issue types: modularity, complexity, information hiding.\n"
-        "Allowed refactoring types: move method, parameterize variable, inline variable, inline method.\n"
-        "Use the tools to inspect correlated findings and class/method details.\n"
-        f"Source code:\n{state['source_code'][:8000]}"
+def _localizer_prompt(state: AnalysisState) -> list[HumanMessage]:
+    source = build_source_context(
+        state["source_code"],
+        code_facts=state.get("code_facts"),
+        structural=state.get("structural_analysis"),
+        correlated=state.get("correlated_findings", []),
+        token_budget=state.get("context_tokens") or DEFAULT_CONTEXT_TOKENS,
     )
-    result = agent.invoke({"messages": [HumanMessage(content=prompt)]})
-    exploration = _message_text(result["messages"])
+    return [
+        HumanMessage(
+            content=(
+                "Analyze the collected evidence and identify Java design issues.\n"
+                "Allowed design issue types: modularity, complexity, information hiding.\n"
+                "Allowed refactoring types: move method, parameterize variable, inline variable, inline method.\n"
+                "Use the tools to inspect correlated findings and class/method details.\n"
+                "Source code (flagged members and their direct callers/callees in full, "
+                "other members as signatures):\n"
+                f"{source}"
+            )
+        )
+    ]
 
-    structured = llm.with_structured_output(LocalizationOutput).invoke(
-        [
-            HumanMessage(
-                content=(
-                    "Based on the evidence exploration below, return structured localization output.\n"
-                    f"Evidence summary:\n{json.dumps(state.get('correlated_findings', [])[:10], indent=2)}\n\n"
-                    f"Agent exploration:\n{exploration}\n\n"
-                    "Return design_issues, refactoring_type, and concrete targets with rationale."
-                )
+
+def _localization_request(state: AnalysisState, exploration: str) -> list[HumanMessage]:
+    return [
+        HumanMessage(
+            content=(
+                "Based on the evidence exploration below, return structured localization output.\n"
+                f"Evidence summary:\n{json.dumps(correlated_to_payload(state.get('correlated_findings', [])[:10]), indent=2)}\n\n"
+                f"Agent exploration:\n{exploration}\n\n"
+                "Return design_issues, refactoring_type, and concrete targets with rationale."
             )
-        ]
-    )
+        )
+    ]
+
 
-    targets = [target.model_dump(mode="json") for target in structured.targets]
+def _localized(
+    state: AnalysisState, structured: LocalizationOutput, exploration: str
+) -> AnalysisState:
     return AnalysisState(
         **{
             **state,
             "design_issues": structured.design_issues,
             "refactoring_type": structured.refactoring_type,
-            "targets": targets,
+            "targets": structured.targets,
             "raw_llm_output": state.get("raw_llm_output", "") + "\n" + exploration,
         }
     )
 
 
-def ranker_node(state: AnalysisState) -> AnalysisState:
+def issue_localizer_node(state: AnalysisState) -> AnalysisState:
     llm = get_llm()
-    structured = llm.with_structured_output(RankedResult).invoke(
-        [
-            HumanMessage(
-                content=(
-                    "Rank refactoring targets by impact and produce a final markdown report.\n"
-                    f"Design issues: {state.get('design_issues', [])}\n"
-                    f"Refactoring type: {state.get('refactoring_type')}\n"
-                    f"Targets:\n{json.dumps(state.get('targets', []), indent=2)}\n"
-                    f"Evidence:\n{json.dumps(state.get('correlated_findings', [])[:15], indent=2)}"
-                )
-            )
-        ]
+    agent = create_react_agent(llm, _make_localizer_tools(state))
+    result = agent.invoke({"messages": _localizer_prompt(state)})
+    exploration = _message_text(result["messages"])
+
+    structured = llm.with_structured_output(LocalizationOutput).invoke(
+        _localization_request(state, exploration)
     )
+    return _localized(state, structured, exploration)
+
 
-    ranked = [target.model_dump(mode="json") for target in structured.ranked_targets]
+async def aissue_localizer_node(state: AnalysisState) -> AnalysisState:
+    llm = get_llm()
+    agent = create_react_agent(llm, _make_localizer_tools(state))
+    result = await agent.ainvoke({"messages": _localizer_prompt(state)})
+    exploration = _message_text(result["messages"])
+
+    structured = await llm.with_structured_output(LocalizationOutput).ainvoke(
+        _localization_request(state, exploration)
+    )
+    return _localized(state, structured, exploration)
+
+
+def _ranking_request(state: AnalysisState) -> list[HumanMessage]:
+    return [
+        HumanMessage(
+            content=(
+                "Rank refactoring targets by impact and produce a final markdown report.\n"
+                f"Design issues: {state.get('design_issues', [])}\n"
+                f"Refactoring type: {state.get('refactoring_type')}\n"
+                f"Targets:\n{json.dumps([t.model_dump(mode='json') for t in state.get('targets', [])], indent=2)}\n"
+                f"Evidence:\n{json.dumps(correlated_to_payload(state.get('correlated_findings', [])[:15]), indent=2)}"
+            )
+        )
+    ]
+
+
+def _ranked(state: AnalysisState, structured: RankedResult) -> AnalysisState:
+    ranked = structured.ranked_targets
     return AnalysisState(
         **{
             **state,
@@ -259,6 +336,20 @@ def ranker_node(state: AnalysisState) -> AnalysisState:
     )
 
 
+def ranker_node(state: AnalysisState) -> AnalysisState:
+    structured = get_llm().with_structured_output(RankedResult).invoke(
+        _ranking_request(state)
+    )
+    return _ranked(state, structured)
+
+
+async def aranker_node(state: AnalysisState) -> AnalysisState:
+    structured = await get_llm().with_structured_output(RankedResult).ainvoke(
+        _ranking_request(state)
+    )
+    return _ranked(state, structured)
+
+
 def targets_from_state(state: AnalysisState) -> list[RefactoringTarget]:
     ranked = state.get("ranked_targets") or state.get("targets") or []
-    return [RefactoringTarget.model_validate(item) for item in ranked]
+    return [as_model(RefactoringTarget, item) for item in ranked]
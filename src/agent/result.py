@@ -2,14 +2,12 @@
 
 from __future__ import annotations
 
-from agent.state import AnalysisState
+from agent.state import AnalysisState, as_model
 from models import (
     AnalysisEvidence,
-    ClassFact,
     CodeFact,
     CorrelatedFinding,
     LocalizationResult,
-    MethodFact,
     PmdFinding,
     RefactoringTarget,
     StructuralAnalysis,
@@ -18,37 +16,33 @@ from models import (
 
 def state_to_result(state: AnalysisState) -> LocalizationResult:
     correlated = [
-        CorrelatedFinding(
-            pmd=PmdFinding.model_validate(item["pmd"]),
-            class_fact=ClassFact.model_validate(item["class"]) if item.get("class") else None,
-            method_fact=MethodFact.model_validate(item["method"]) if item.get("method") else None,
-            summary=item.get("summary"),
-        )
-        for item in state.get("correlated_findings", [])
+        as_model(CorrelatedFinding, item) for item in state.get("correlated_findings", [])
     ]
 
     code_facts_data = state.get("code_facts")
     structural_data = state.get("structural_analysis")
 
-    evidence = AnalysisEvidence(
+    evidence = AnalysisEvidence.model_construct(
         language="java",
         file_path=state.get("file_path"),
+        project_path=None,
         source_code=state.get("source_code"),
-        pmd_findings=[PmdFinding.model_validate(f) for f in state.get("pmd_findings", [])],
-        code_facts=CodeFact.model_validate(code_facts_data) if code_facts_data else None,
+        pmd_findings=[as_model(PmdFinding, f) for f in state.get("pmd_findings", [])],
+        code_facts=as_model(CodeFact, code_facts_data) if code_facts_data else None,
         structural_analysis=(
-            StructuralAnalysis.model_validate(structural_data) if structural_data else None
+            as_model(StructuralAnalysis, structural_data) if structural_data else None
         ),
         correlated_findings=correlated,
+        metrics=[],
         evidence_text=state.get("final_report") or _summarise(correlated),
     )
 
     ranked = state.get("ranked_targets") or state.get("targets") or []
-    targets = [RefactoringTarget.model_validate(t) for t in ranked]
+    targets = [as_model(RefactoringTarget, t) for t in ranked]
 
-    return LocalizationResult(
+    return LocalizationResult.model_construct(
         evidence=evidence,
-        design_issues=state.get("design_issues", []),
+        design_issues=list(state.get("design_issues", [])),
         refactoring=state.get("refactoring_type"),
         targets=targets,
         raw_llm_output=state.get("raw_llm_output"),
@@ -0,0 +1,92 @@
+"""Run the localization workflow for many files on one event loop."""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Iterable
+
+from agent.llm import aclose_shared_client, llm_limits
+from agent.result import state_to_result
+from agent.state import initial_state
+from agent.workflow import build_graph
+from models import LocalizationResult
+
+
+@dataclass
+class LocalizationOutcome:
+    """The localization result for one file, or the error that stopped it."""
+
+    path: str
+    result: LocalizationResult | None = None
+    error: str | None = None
+
+
+async def alocalize_files(
+    paths: Iterable[Path],
+    *,
+    evidence_mode: str = "deterministic",
+    max_files: int | None = None,
+    context_tokens: int | None = None,
+) -> AsyncIterator[LocalizationOutcome]:
+    """Yield each file's outcome as soon as its graph run finishes.
+
+    All files share one compiled graph and the event loop's HTTP client;
+    requests from every file queue on the same concurrency and rate limits.
+    ``max_files`` caps how many graph runs are in progress at once, which
+    also bounds concurrent PMD processes (default: the LLM concurrency).
+    """
+    graph = build_graph(evidence_mode, asynchronous=True)
+    slots = asyncio.Semaphore(max_files or llm_limits().max_concurrency)
+
+    async def run(path: Path) -> LocalizationOutcome:
+        async with slots:
+            try:
+                source = path.read_text(encoding="utf-8")
+                state = await graph.ainvoke(
+                    initial_state(
+                        file_path=str(path),
+                        source_code=source,
+                        context_tokens=context_tokens,
+                    )
+                )
+            except Exception as exc:
+                return LocalizationOutcome(str(path), error=f"{type(exc).__name__}: {exc}")
+            return LocalizationOutcome(str(path), result=state_to_result(state))
+
+    tasks = [asyncio.ensure_future(run(Path(path))) for path in paths]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def localize_files(
+    paths: Iterable[Path],
+    *,
+    evidence_mode: str = "deterministic",
+    max_files: int | None = None,
+    context_tokens: int | None = None,
+) -> list[LocalizationOutcome]:
+    """Blocking wrapper around :func:`alocalize_files`, in input order."""
+    paths = [Path(path) for path in paths]
+
+    async def collect() -> list[LocalizationOutcome]:
+        try:
+            return [
+                outcome
+                async for outcome in alocalize_files(
+                    paths,
+                    evidence_mode=evidence_mode,
+                    max_files=max_files,
+                    context_tokens=context_tokens,
+                )
+            ]
+        finally:
+            await aclose_shared_client()
+
+    order = {str(path): i for i, path in enumerate(paths)}
+    return sorted(asyncio.run(collect()), key=lambda o: order[o.path])
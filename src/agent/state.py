@@ -2,24 +2,36 @@
 
 from __future__ import annotations
 
-from typing import TypedDict
+from typing import Any, TypedDict, TypeVar
 
 from pydantic import BaseModel, Field
 
-from models import RefactoringTarget
+from agent.context import DEFAULT_CONTEXT_TOKENS
+from models import (
+    CodeFact,
+    CorrelatedFinding,
+    PmdFinding,
+    RefactoringTarget,
+    StructuralAnalysis,
+)
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
 
 
 class AnalysisState(TypedDict, total=False):
+    """Graph state; evidence and targets stay typed models between nodes."""
+
     file_path: str
     source_code: str
-    pmd_findings: list[dict]
-    code_facts: dict | None
-    structural_analysis: dict | None
-    correlated_findings: list[dict]
+    context_tokens: int
+    pmd_findings: list[PmdFinding]
+    code_facts: CodeFact | None
+    structural_analysis: StructuralAnalysis | None
+    correlated_findings: list[CorrelatedFinding]
     design_issues: list[str]
     refactoring_type: str | None
-    targets: list[dict]
-    ranked_targets: list[dict]
+    targets: list[RefactoringTarget]
+    ranked_targets: list[RefactoringTarget]
     final_report: str
     raw_llm_output: str
 
@@ -43,10 +55,14 @@ class RankedResult(BaseModel):
     )
 
 
-def initial_state(*, file_path: str, source_code: str) -> AnalysisState:
+def initial_state(
+    *, file_path: str, source_code: str, context_tokens: int | None = None
+) -> AnalysisState:
+    """Start state for one file; ``context_tokens`` budgets the localizer's source excerpt."""
     return AnalysisState(
         file_path=file_path,
         source_code=source_code,
+        context_tokens=context_tokens or DEFAULT_CONTEXT_TOKENS,
         pmd_findings=[],
         code_facts=None,
         structural_analysis=None,
@@ -58,3 +74,8 @@ def initial_state(*, file_path: str, source_code: str) -> AnalysisState:
         final_report="",
         raw_llm_output="",
     )
+
+
+def as_model(model: type[ModelT], value: Any) -> ModelT:
+    """Return ``value`` unchanged if already typed, otherwise validate it."""
+    return value if isinstance(value, model) else model.model_validate(value)
@@ -4,44 +4,66 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
+from typing import Any
 
 from langchain_core.tools import tool
 
+from utils.cache import default_cache
 from utils.correlator import build_analysis_evidence
-from utils.pmd import PmdAnalyzer, PmdNotAvailableError
+from utils.pmd import PmdNotAvailableError
+from utils.rules_engine import design_rule_analyzer
 from utils.treesitter import JavaTreeSitterAnalyzer
-from models import CodeFact, PmdFinding, StructuralAnalysis
+from models import (
+    AnalysisEvidence,
+    ClassFact,
+    CodeFact,
+    CorrelatedFinding,
+    MethodFact,
+    PmdFinding,
+    StructuralAnalysis,
+)
 from utils.structural import run_structural_analysis
+from utils.tracing import span
 
 
 @tool
 def run_pmd(file_path: str) -> str:
     """Run PMD design-rule analysis on a Java file or directory path."""
     path = Path(file_path).resolve()
-    try:
-        findings = PmdAnalyzer().analyze_path(path)
-    except PmdNotAvailableError as exc:
-        return json.dumps({"error": str(exc), "findings": []})
-    except Exception as exc:
-        return json.dumps({"error": str(exc), "findings": []})
-    return json.dumps([finding.model_dump(mode="json") for finding in findings])
+    with span("tool.run_pmd", "tool", file=str(path)) as trace_span:
+        try:
+            findings = design_rule_analyzer(default_cache()).analyze_path(path)
+        except PmdNotAvailableError as exc:
+            trace_span.set(error=type(exc).__name__)
+            return json.dumps({"error": str(exc), "findings": []})
+        except Exception as exc:
+            trace_span.set(error=type(exc).__name__)
+            return json.dumps({"error": str(exc), "findings": []})
+        trace_span.set(findings=len(findings))
+        return json.dumps([finding.model_dump(mode="json") for finding in findings])
 
 
 @tool
 def run_treesitter(file_path: str) -> str:
     """Extract Java class and method facts from a file using Tree-sitter."""
     path = Path(file_path).resolve()
-    facts = JavaTreeSitterAnalyzer().analyze_file(path)
-    return json.dumps(facts.model_dump(mode="json"))
+    with span("tool.run_treesitter", "tool", file=str(path)) as trace_span:
+        facts = JavaTreeSitterAnalyzer(cache=default_cache()).analyze_file(path)
+        trace_span.set(classes=len(facts.classes), methods=facts.total_methods)
+        return json.dumps(facts.model_dump(mode="json"))
 
 
 @tool
 def run_structural_metrics(file_path: str) -> str:
     """Compute fan-in/out, call relationships, variable usage, and class coupling."""
     path = Path(file_path).resolve()
-    source = path.read_text(encoding="utf-8")
-    structural = run_structural_analysis(source, file_path=str(path))
-    return json.dumps(structural.model_dump(mode="json"))
+    with span("tool.run_structural_metrics", "tool", file=str(path)) as trace_span:
+        source = path.read_text(encoding="utf-8")
+        structural = run_structural_analysis(
+            source, file_path=str(path), cache=default_cache()
+        )
+        trace_span.set(bytes=len(source), calls=len(structural.call_relationships))
+        return json.dumps(structural.model_dump(mode="json"))
 
 
 @tool
@@ -53,19 +75,34 @@ def correlate_evidence(
     file_path: str,
 ) -> str:
     """Correlate PMD findings with Tree-sitter and structural metrics into evidence."""
+    with span(
+        "tool.correlate_evidence", "tool", file=file_path, bytes=len(source_code)
+    ) as trace_span:
+        payload = _correlate_tool_outputs(
+            pmd_findings_json, code_facts_json, structural_analysis_json, source_code, file_path
+        )
+        trace_span.set(findings=len(payload["correlated_findings"]))
+        return json.dumps(payload)
+
+
+def _correlate_tool_outputs(
+    pmd_findings_json: str,
+    code_facts_json: str,
+    structural_analysis_json: str,
+    source_code: str,
+    file_path: str,
+) -> dict[str, Any]:
     pmd_data = json.loads(pmd_findings_json)
     pmd_findings = [
         PmdFinding.model_validate(item) for item in (pmd_data if isinstance(pmd_data, list) else [])
     ]
-    code_facts = (
-        CodeFact.model_validate(json.loads(code_facts_json))
-        if code_facts_json.strip()
-        else None
+    code_facts_data = json.loads(code_facts_json) if code_facts_json.strip() else None
+    structural_data = (
+        json.loads(structural_analysis_json) if structural_analysis_json.strip() else None
     )
+    code_facts = CodeFact.model_validate(code_facts_data) if code_facts_data else None
     structural = (
-        StructuralAnalysis.model_validate(json.loads(structural_analysis_json))
-        if structural_analysis_json.strip()
-        else None
+        StructuralAnalysis.model_validate(structural_data) if structural_data else None
     )
     evidence = build_analysis_evidence(
         language="java",
@@ -76,33 +113,67 @@ def correlate_evidence(
         code_facts=code_facts,
         structural_analysis=structural,
     )
-    return json.dumps(
+    return evidence_to_payload(evidence)
+
+
+def evidence_to_payload(evidence: AnalysisEvidence) -> dict[str, Any]:
+    """Serialize evidence into the ``correlate_evidence`` tool output shape."""
+    return {
+        "pmd_findings": [f.model_dump(mode="json") for f in evidence.pmd_findings],
+        "code_facts": (
+            evidence.code_facts.model_dump(mode="json") if evidence.code_facts else None
+        ),
+        "structural_analysis": (
+            evidence.structural_analysis.model_dump(mode="json")
+            if evidence.structural_analysis
+            else None
+        ),
+        "correlated_findings": correlated_to_payload(evidence.correlated_findings),
+        "evidence_text": evidence.evidence_text,
+    }
+
+
+def evidence_from_payload(payload: dict[str, Any]) -> AnalysisEvidence:
+    """Rebuild typed evidence from a ``correlate_evidence`` tool output."""
+    code_facts = payload.get("code_facts")
+    structural = payload.get("structural_analysis")
+    return AnalysisEvidence(
+        language="java",
+        file_path=(code_facts or {}).get("file_path"),
+        pmd_findings=[
+            PmdFinding.model_validate(item) for item in payload.get("pmd_findings", [])
+        ],
+        code_facts=CodeFact.model_validate(code_facts) if code_facts else None,
+        structural_analysis=(
+            StructuralAnalysis.model_validate(structural) if structural else None
+        ),
+        correlated_findings=[
+            CorrelatedFinding(
+                pmd=PmdFinding.model_validate(item["pmd"]),
+                class_fact=(
+                    ClassFact.model_validate(item["class"]) if item.get("class") else None
+                ),
+                method_fact=(
+                    MethodFact.model_validate(item["method"]) if item.get("method") else None
+                ),
+                summary=item.get("summary"),
+            )
+            for item in payload.get("correlated_findings", [])
+        ],
+        evidence_text=payload.get("evidence_text"),
+    )
+
+
+def correlated_to_payload(findings: list[CorrelatedFinding]) -> list[dict[str, Any]]:
+    return [
         {
-            "pmd_findings": [f.model_dump(mode="json") for f in evidence.pmd_findings],
-            "code_facts": (
-                evidence.code_facts.model_dump(mode="json") if evidence.code_facts else None
-            ),
-            "structural_analysis": (
-                evidence.structural_analysis.model_dump(mode="json")
-                if evidence.structural_analysis
-                else None
-            ),
-            "correlated_findings": [
-                {
-                    "pmd": item.pmd.model_dump(mode="json"),
-                    "class": (
-                        item.class_fact.model_dump(mode="json") if item.class_fact else None
-                    ),
-                    "method": (
-                        item.method_fact.model_dump(mode="json") if item.method_fact else None
-                    ),
-                    "summary": item.summary,
-                }
-                for item in evidence.correlated_findings
-            ],
-            "evidence_text": evidence.evidence_text,
+            "pmd": item.pmd.model_dump(mode="json"),
+            "class": item.class_fact.model_dump(mode="json") if item.class_fact else None,
+            "method": item.method_fact.model_dump(mode="json") if item.method_fact else None,
+            "summary": item.summary,
         }
-    )
+        for item in findings
+    ]
 
 
 EVIDENCE_TOOLS = [run_pmd, run_treesitter, run_structural_metrics, correlate_evidence]
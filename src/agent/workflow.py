@@ -2,21 +2,52 @@
 
 from __future__ import annotations
 
+import inspect
+from functools import wraps
+from typing import Any, Callable
+
 from langgraph.graph import END, START, StateGraph
 
 from agent.nodes import (
+    aevidence_collector_node,
+    aissue_localizer_node,
+    aranker_node,
+    deterministic_evidence_node,
     evidence_collector_node,
     issue_localizer_node,
     ranker_node,
 )
 from agent.state import AnalysisState
+from utils.tracing import span
+
+EVIDENCE_MODES = ("deterministic", "agent")
+
+
+def build_graph(evidence_mode: str = "deterministic", *, asynchronous: bool = False):
+    """Compile the workflow.
 
+    ``evidence_mode="deterministic"`` collects evidence by calling the static
+    analyzers directly; ``"agent"`` lets a ReAct agent drive the same tools.
+    With ``asynchronous=True`` the LLM nodes await the model instead of
+    blocking, for use with ``ainvoke``; the deterministic stage still runs
+    in a worker thread.
+    """
+    if evidence_mode not in EVIDENCE_MODES:
+        raise ValueError(
+            f"Unknown evidence mode {evidence_mode!r}; expected one of {EVIDENCE_MODES}"
+        )
+    if evidence_mode == "deterministic":
+        collector = deterministic_evidence_node
+    else:
+        collector = aevidence_collector_node if asynchronous else evidence_collector_node
+
+    localizer = aissue_localizer_node if asynchronous else issue_localizer_node
+    ranker = aranker_node if asynchronous else ranker_node
 
-def build_graph():
     graph = StateGraph(AnalysisState)
-    graph.add_node("evidence_collector", evidence_collector_node)
-    graph.add_node("issue_localizer", issue_localizer_node)
-    graph.add_node("ranker", ranker_node)
+    graph.add_node("evidence_collector", _traced("evidence_collector", collector))
+    graph.add_node("issue_localizer", _traced("issue_localizer", localizer))
+    graph.add_node("ranker", _traced("ranker", ranker))
 
     graph.add_edge(START, "evidence_collector")
     graph.add_edge("evidence_collector", "issue_localizer")
@@ -24,3 +55,36 @@ def build_graph():
     graph.add_edge("ranker", END)
 
     return graph.compile()
+
+
+def _traced(name: str, node: Callable[[AnalysisState], Any]) -> Callable[[AnalysisState], Any]:
+    """Wrap ``node`` in a ``node.<name>`` span, keeping it sync or async."""
+
+    def attributes(state: AnalysisState) -> dict[str, Any]:
+        return {
+            "file": state.get("file_path"),
+            "bytes": len(state.get("source_code") or ""),
+        }
+
+    def finish(trace_span, update: AnalysisState) -> AnalysisState:
+        trace_span.set(
+            findings=len(update.get("correlated_findings") or []),
+            targets=len(update.get("targets") or []),
+        )
+        return update
+
+    if inspect.iscoroutinefunction(node):
+
+        @wraps(node)
+        async def run_async(state: AnalysisState) -> AnalysisState:
+            with span(f"node.{name}", "node", **attributes(state)) as trace_span:
+                return finish(trace_span, await node(state))
+
+        return run_async
+
+    @wraps(node)
+    def run(state: AnalysisState) -> AnalysisState:
+        with span(f"node.{name}", "node", **attributes(state)) as trace_span:
+            return finish(trace_span, node(state))
+
+    return run
@@ -3,40 +3,284 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
 import json
 import sys
+from contextlib import ExitStack
 from pathlib import Path
 
+from agent.context import DEFAULT_CONTEXT_TOKENS
+from agent.limits import (
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_MAX_RETRIES,
+    RequestLimits,
+    RetryPolicy,
+)
+from agent.llm import aclose_shared_client, configure_llm_cache, configure_llm_limits
+from agent.llm_cache import DEFAULT_TTL_SECONDS, LLMResponseCache
 from agent.result import state_to_result
+from agent.runner import alocalize_files, localize_files
 from agent.state import initial_state
-from agent.workflow import build_graph
+from agent.workflow import EVIDENCE_MODES, build_graph
+from utils.cache import AnalysisCache, configure_default_cache
+from utils.pmd import PmdNotAvailableError
+from utils.ndjson import (
+    NdjsonWriter,
+    RunSummary,
+    error_record,
+    file_record,
+    finding_records,
+)
+from utils.project import analyze_project, discover_java_files, iter_project_evidence
+from utils.rules_engine import RULES_ENGINES, configure_rules_engine, design_rule_analyzer
+from utils.metrics import METRICS_FORMATS, metrics_registry, serve_metrics
+from utils.tracing import TRACE_FORMATS, Tracer, configure_tracer
+from utils.watch import DEFAULT_PMD_DEBOUNCE, FileUpdate, WatchSession
 
 
 def main(argv: list[str] | None = None) -> int:
     parser = argparse.ArgumentParser(
         description="Localize Java design issues using autonomous LangGraph agents."
     )
-    parser.add_argument("--file", "-f", type=Path, required=True, help="Java source file to analyze")
-    parser.add_argument("--format", choices=("json", "text"), default="text", help="Output format")
+    parser.add_argument(
+        "--file",
+        "-f",
+        type=Path,
+        action="append",
+        default=[],
+        help="Java source file to analyze (repeatable)",
+    )
+    parser.add_argument(
+        "--dir",
+        "-d",
+        type=Path,
+        action="append",
+        default=[],
+        help="Directory to scan for .java files (repeatable); runs static analysis only",
+    )
+    parser.add_argument(
+        "--watch",
+        type=Path,
+        default=None,
+        metavar="DIR",
+        help="Keep re-analyzing .java files under DIR as they change (static analysis only)",
+    )
+    parser.add_argument(
+        "--pmd-debounce",
+        type=float,
+        default=DEFAULT_PMD_DEBOUNCE,
+        help="With --watch, seconds a file must stay unchanged before PMD re-runs on it",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes for multi-file analysis (default: CPU count)",
+    )
+    parser.add_argument(
+        "--agents",
+        action="store_true",
+        help="Also run the LLM agents on every file of a multi-file run, concurrently",
+    )
+    parser.add_argument(
+        "--evidence",
+        choices=EVIDENCE_MODES,
+        default="deterministic",
+        help="Collect evidence by running the static tools directly (default) "
+        "or through an LLM tool-calling agent",
+    )
+    parser.add_argument(
+        "--context-tokens",
+        type=int,
+        default=DEFAULT_CONTEXT_TOKENS,
+        help="Token budget for the source excerpt sent to the issue localizer",
+    )
+    parser.add_argument(
+        "--rules-engine",
+        choices=RULES_ENGINES,
+        default="pmd",
+        help="Design rules from PMD (default), the built-in Python engine that needs no "
+        "JVM, or both merged",
+    )
+    parser.add_argument(
+        "--pmd-shards",
+        type=int,
+        default=1,
+        help="Split multi-file PMD runs across this many concurrent PMD processes",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=None,
+        help="Static analysis cache directory (default: ~/.cache/localize-design)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Disable the static analysis result cache",
+    )
+    parser.add_argument(
+        "--llm-cache",
+        action="store_true",
+        help="Reuse cached LLM responses for identical prompts, model and tools",
+    )
+    parser.add_argument(
+        "--llm-cache-dir",
+        type=Path,
+        default=None,
+        help="LLM response cache directory (default: the static analysis cache directory)",
+    )
+    parser.add_argument(
+        "--llm-cache-ttl",
+        type=float,
+        default=DEFAULT_TTL_SECONDS,
+        help="Seconds before a cached LLM response expires (default: 7 days)",
+    )
+    parser.add_argument(
+        "--llm-concurrency",
+        type=int,
+        default=DEFAULT_MAX_CONCURRENCY,
+        help="Maximum LLM requests in flight at once, across all files",
+    )
+    parser.add_argument(
+        "--llm-rpm",
+        type=float,
+        default=None,
+        help="Limit LLM requests per minute (default: unlimited)",
+    )
+    parser.add_argument(
+        "--llm-tpm",
+        type=float,
+        default=None,
+        help="Limit estimated LLM tokens per minute (default: unlimited)",
+    )
+    parser.add_argument(
+        "--llm-retries",
+        type=int,
+        default=DEFAULT_MAX_RETRIES,
+        help="Retries with jittered backoff for LLM requests failing with 429 or 5xx",
+    )
+    parser.add_argument(
+        "--format",
+        choices=("json", "text", "ndjson"),
+        default="text",
+        help="Output format; ndjson streams one compact record per file as it finishes",
+    )
+    parser.add_argument(
+        "--ndjson-findings",
+        action="store_true",
+        help="With --format ndjson, also emit one record per correlated finding",
+    )
     parser.add_argument("-o", type=Path, help="Write output to a file (default: stdout)")
+    parser.add_argument(
+        "--trace",
+        type=Path,
+        default=None,
+        metavar="PATH",
+        help="Record spans for nodes, tools, PMD runs and LLM calls and write them to PATH",
+    )
+    parser.add_argument(
+        "--trace-format",
+        choices=TRACE_FORMATS,
+        default="chrome",
+        help="Trace file format: Chrome trace events (default) or OTLP/JSON",
+    )
+    parser.add_argument(
+        "--metrics-out",
+        type=Path,
+        default=None,
+        metavar="PATH",
+        help="Write token, cost, PMD, parse and cache metrics to PATH at exit",
+    )
+    parser.add_argument(
+        "--metrics-format",
+        choices=METRICS_FORMATS,
+        default="prometheus",
+        help="Metrics file format: Prometheus text exposition (default) or JSON",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        metavar="PORT",
+        help="Serve /metrics on 127.0.0.1:PORT while running (useful with --watch)",
+    )
 
     args = parser.parse_args(argv)
+    if not args.file and not args.dir and not args.watch:
+        parser.error("one of --file, --dir or --watch is required")
 
     _load_dotenv()
 
-    file_path = args.file.resolve()
+    cache = None if args.no_cache else AnalysisCache(args.cache_dir)
+    configure_default_cache(cache)
+    configure_rules_engine(args.rules_engine)
+
+    tracer = Tracer() if args.trace else None
+    configure_tracer(tracer)
+    metrics_server = (
+        serve_metrics(args.metrics_port) if args.metrics_port is not None else None
+    )
+    try:
+        if args.watch:
+            return _run_watch(args, cache)
+        if args.dir or len(args.file) > 1:
+            return _run_project(args, cache)
+        return _run_file(args)
+    finally:
+        configure_rules_engine(None)
+        if tracer is not None:
+            configure_tracer(None)
+            tracer.write(args.trace, args.trace_format)
+            print(
+                f"Trace: {len(tracer.spans)} span(s) written to {args.trace}",
+                file=sys.stderr,
+            )
+        if metrics_server is not None:
+            metrics_server.shutdown()
+            metrics_server.server_close()
+        if args.metrics_out is not None:
+            metrics_registry().write(args.metrics_out, args.metrics_format)
+            print(f"Metrics written to {args.metrics_out}", file=sys.stderr)
+
+
+def _run_file(args: argparse.Namespace) -> int:
+    file_path = args.file[0].resolve()
     if not file_path.is_file():
         print(f"Error: {file_path} does not exist or is not a file", file=sys.stderr)
         return 1
 
     source = file_path.read_text(encoding="utf-8")
 
+    llm_cache = _configure_llm(args)
+
     print("Starting Design Issue localization...", file=sys.stderr, flush=True)
-    state = build_graph().invoke(initial_state(file_path=str(file_path), source_code=source))
+    state = build_graph(args.evidence).invoke(
+        initial_state(
+            file_path=str(file_path),
+            source_code=source,
+            context_tokens=args.context_tokens,
+        )
+    )
     print("Done.", file=sys.stderr, flush=True)
+    _report_llm_cache(llm_cache)
 
     result = state_to_result(state)
 
+    if args.format == "ndjson":
+        with NdjsonWriter.open(args.o) as writer:
+            writer.write(
+                {
+                    "type": "result",
+                    "file_path": str(file_path),
+                    "result": result.to_json_dict(),
+                }
+            )
+            if args.ndjson_findings:
+                for record in finding_records(result.evidence):
+                    writer.write(record)
+        return 0
+
     if args.format == "json":
         out = json.dumps(result.to_json_dict(), indent=2)
     else:
@@ -46,6 +290,239 @@ def main(argv: list[str] | None = None) -> int:
     return 0
 
 
+def _run_project(args: argparse.Namespace, cache: AnalysisCache | None) -> int:
+    for path in [*args.file, *args.dir]:
+        if not path.exists():
+            print(f"Error: {path.resolve()} does not exist", file=sys.stderr)
+            return 1
+
+    if args.agents:
+        return _run_agents(args)
+    if args.format == "ndjson":
+        return _stream_project(args, cache)
+
+    project_path = args.dir[0].resolve() if len(args.dir) == 1 else None
+    print("Starting static analysis...", file=sys.stderr, flush=True)
+    project = analyze_project(
+        [*args.file, *args.dir],
+        workers=args.workers,
+        pmd_shards=args.pmd_shards,
+        project_path=project_path,
+        cache=cache,
+    )
+    print(
+        f"Done. Analyzed {len(project.files)} file(s).", file=sys.stderr, flush=True
+    )
+
+    if args.format == "json":
+        out = json.dumps(project.to_json_dict(), indent=2)
+    else:
+        out = project.evidence_text or ""
+
+    _write(out, args.o)
+    return 0 if not project.errors else 2
+
+
+def _stream_project(args: argparse.Namespace, cache: AnalysisCache | None) -> int:
+    """Write each file's record as soon as it is analyzed, then a summary.
+
+    Files written before PMD finishes and flagged by it are written again
+    with the findings; the later ``file`` record (and its ``finding``
+    records) replaces the earlier one. Only the paths of those early files
+    are kept, so memory stays small however many files run. Fan-in/out
+    stays per file because the project-wide call graph needs every file
+    before it can emit anything.
+    """
+    print("Starting static analysis...", file=sys.stderr, flush=True)
+    summary = RunSummary()
+    with NdjsonWriter.open(args.o) as writer:
+        for outcome in iter_project_evidence(
+            [*args.file, *args.dir],
+            workers=args.workers,
+            pmd_shards=args.pmd_shards,
+            cache=cache,
+        ):
+            if outcome.evidence is None:
+                summary.errors += 1
+                writer.write(error_record(outcome.path, outcome.error or ""))
+                continue
+            summary.add(outcome.evidence, replaces=outcome.replaces)
+            writer.write(file_record(outcome.evidence))
+            if args.ndjson_findings:
+                for record in finding_records(outcome.evidence):
+                    writer.write(record)
+        writer.write(summary.record())
+    print(f"Done. Analyzed {summary.files} file(s).", file=sys.stderr, flush=True)
+    return 0 if not summary.errors else 2
+
+
+def _run_agents(args: argparse.Namespace) -> int:
+    """Run the whole workflow on every file, overlapping their LLM calls."""
+    files = discover_java_files([*args.file, *args.dir])
+    llm_cache = _configure_llm(args)
+    print(
+        f"Starting Design Issue localization for {len(files)} file(s)...",
+        file=sys.stderr,
+        flush=True,
+    )
+    if args.format == "ndjson":
+        with NdjsonWriter.open(args.o) as writer:
+            errors = asyncio.run(_stream_agents(args, files, writer))
+        print("Done.", file=sys.stderr, flush=True)
+        _report_llm_cache(llm_cache)
+        return 0 if not errors else 2
+
+    outcomes = localize_files(
+        files, evidence_mode=args.evidence, context_tokens=args.context_tokens
+    )
+    print("Done.", file=sys.stderr, flush=True)
+    _report_llm_cache(llm_cache)
+
+    errors = {o.path: o.error or "" for o in outcomes if o.result is None}
+    for path, message in errors.items():
+        print(f"Error: {path}: {message}", file=sys.stderr)
+    results = [o.result for o in outcomes if o.result is not None]
+
+    if args.format == "json":
+        payload = {"results": [r.to_json_dict() for r in results], "errors": errors}
+        _write(json.dumps(payload, indent=2), args.o)
+    else:
+        sections = [
+            f"# {r.evidence.file_path}\n\n{r.evidence.evidence_text or ''}" for r in results
+        ]
+        _write("\n\n".join(sections), args.o)
+    return 0 if not errors else 2
+
+
+async def _stream_agents(
+    args: argparse.Namespace, files: list[Path], writer: NdjsonWriter
+) -> int:
+    """Write each file's records as soon as its graph run finishes; return the error count."""
+    errors = 0
+    try:
+        async for outcome in alocalize_files(
+            files, evidence_mode=args.evidence, context_tokens=args.context_tokens
+        ):
+            if outcome.result is None:
+                errors += 1
+                print(f"Error: {outcome.path}: {outcome.error or ''}", file=sys.stderr)
+                writer.write(error_record(outcome.path, outcome.error or ""))
+                continue
+            result = outcome.result
+            writer.write(
+                {
+                    "type": "result",
+                    "file_path": result.evidence.file_path,
+                    "result": result.to_json_dict(),
+                }
+            )
+            if args.ndjson_findings:
+                for record in finding_records(result.evidence):
+                    writer.write(record)
+    finally:
+        await aclose_shared_client()
+    return errors
+
+
+def _run_watch(args: argparse.Namespace, cache: AnalysisCache | None) -> int:
+    root = args.watch.resolve()
+    if not root.is_dir():
+        print(f"Error: {root} is not a directory", file=sys.stderr)
+        return 1
+
+    pmd = design_rule_analyzer(cache)
+    try:
+        pmd.ensure_available()
+    except (PmdNotAvailableError, FileNotFoundError):
+        print("PMD not found; watching without PMD findings.", file=sys.stderr)
+        pmd = None
+    session = WatchSession([root], pmd=pmd, pmd_debounce=args.pmd_debounce)
+    outputs = ExitStack()
+    writer = (
+        outputs.enter_context(NdjsonWriter.open(args.o))
+        if args.format == "ndjson"
+        else None
+    )
+
+    def report(updates: list[FileUpdate]) -> None:
+        for update in updates:
+            if update.evidence is None:
+                status = "removed"
+            elif update.from_pmd:
+                status = f"PMD reported {len(update.evidence.pmd_findings)} finding(s)"
+            else:
+                status = (
+                    f"{update.rescanned} member(s) re-scanned, "
+                    f"{update.recorrelated} finding(s) re-correlated"
+                )
+            print(
+                f"{update.path}: {status} in {update.elapsed_ms:.1f} ms",
+                file=sys.stderr,
+                flush=True,
+            )
+        if writer is not None:
+            for update in updates:
+                if update.evidence is None:
+                    writer.write({"type": "removed", "file_path": str(update.path)})
+                    continue
+                writer.write(file_record(update.evidence))
+                if args.ndjson_findings:
+                    for record in finding_records(update.evidence):
+                        writer.write(record)
+            return
+        if args.o:
+            project = session.project(str(root))
+            if args.format == "json":
+                _write(json.dumps(project.to_json_dict(), indent=2), args.o)
+            else:
+                _write(project.evidence_text or "", args.o)
+            return
+        for update in updates:
+            if update.evidence is None:
+                continue
+            if args.format == "json":
+                _write(json.dumps(update.evidence.model_dump(mode="json")), None)
+            else:
+                _write(update.evidence.evidence_text or "", None)
+
+    print(f"Watching {root} (Ctrl+C to stop)...", file=sys.stderr, flush=True)
+    with outputs:
+        try:
+            session.run(report)
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+def _configure_llm(args: argparse.Namespace) -> LLMResponseCache | None:
+    configure_llm_limits(
+        RequestLimits(
+            max_concurrency=args.llm_concurrency,
+            requests_per_minute=args.llm_rpm,
+            tokens_per_minute=args.llm_tpm,
+            retry=RetryPolicy(max_retries=args.llm_retries),
+        )
+    )
+    llm_cache = None
+    if args.llm_cache:
+        llm_cache = LLMResponseCache(
+            args.llm_cache_dir or args.cache_dir, ttl_seconds=args.llm_cache_ttl
+        )
+    configure_llm_cache(llm_cache)
+    return llm_cache
+
+
+def _report_llm_cache(llm_cache: LLMResponseCache | None) -> None:
+    if llm_cache is None:
+        return
+    stats = llm_cache.stats()
+    print(
+        f"LLM cache: {stats['hits']} hit(s), {stats['misses']} miss(es)",
+        file=sys.stderr,
+        flush=True,
+    )
+
+
 def _load_dotenv() -> None:
     try:
         from dotenv import load_dotenv
@@ -69,6 +69,7 @@ class ClassFact(BaseModel):
     name: str
     start_line: int
     end_line: int
+    superclass: str | None = None
     method_count: int = 0
     field_count: int = 0
     public_member_count: int = 0
@@ -98,6 +99,17 @@ class CallRelationship(BaseModel):
     caller: str
     callee: str
     file_path: str | None = None
+    callee_file: str | None = None
+
+
+class CallSite(BaseModel):
+    """A method invocation with the static type of its receiver, when known."""
+
+    caller: str
+    method_name: str
+    arg_count: int | None = None
+    receiver: str | None = None
+    receiver_type: str | None = None
 
 
 class MethodVariableUsage(BaseModel):
@@ -128,6 +140,7 @@ class StructuralAnalysis(BaseModel):
     file_path: str | None = None
     fan_metrics: list[FanMetrics] = Field(default_factory=list)
     call_relationships: list[CallRelationship] = Field(default_factory=list)
+    call_sites: list[CallSite] = Field(default_factory=list)
     variable_usage: list[ClassVariableUsage] = Field(default_factory=list)
     class_coupling: list[ClassCoupling] = Field(default_factory=list)
 
@@ -180,3 +193,18 @@ class LocalizationResult(BaseModel):
 
     def to_json_dict(self) -> dict[str, Any]:
         return self.model_dump(mode="json")
+
+
+class ProjectAnalysis(BaseModel):
+    """Static analysis results for a set of Java files."""
+
+    project_path: str | None = None
+    files: list[AnalysisEvidence] = Field(default_factory=list)
+    errors: dict[str, str] = Field(default_factory=dict)
+    total_classes: int = 0
+    total_methods: int = 0
+    findings_by_rule: dict[str, int] = Field(default_factory=dict)
+    evidence_text: str | None = None
+
+    def to_json_dict(self) -> dict[str, Any]:
+        return self.model_dump(mode="json")
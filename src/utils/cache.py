@@ -0,0 +1,267 @@
+"""Content-addressed SQLite cache for static analysis results."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from functools import lru_cache
+from importlib import metadata
+from pathlib import Path
+from typing import Any
+
+from utils.metrics import record_cache_lookup
+
+# Bump when the cached payload layout or extraction semantics change.
+CACHE_SCHEMA_VERSION = "3"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    file_path TEXT,
+    payload BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (name, value) VALUES ('total_bytes', 0);
+"""
+
+
+def default_cache_dir() -> Path:
+    override = os.getenv("LOCALIZE_DESIGN_CACHE_DIR")
+    if override:
+        return Path(override).expanduser()
+    base = os.getenv("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(base) / "localize-design"
+
+
+def content_hash(data: str | bytes) -> str:
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+@lru_cache(maxsize=1)
+def tool_version() -> str:
+    try:
+        version = metadata.version("localize-design")
+    except metadata.PackageNotFoundError:
+        version = "0+unknown"
+    return f"{version}/schema{CACHE_SCHEMA_VERSION}"
+
+
+@lru_cache(maxsize=1)
+def grammar_version() -> str:
+    parts = []
+    for dist in ("tree-sitter", "tree-sitter-java"):
+        try:
+            parts.append(f"{dist}={metadata.version(dist)}")
+        except metadata.PackageNotFoundError:
+            parts.append(f"{dist}=unknown")
+    return ";".join(parts)
+
+
+class AnalysisCache:
+    """Persistent key/value store for serialized analysis results.
+
+    Entries are keyed by a hash of the file content and every tool version
+    that can change the result, so renamed or moved files still hit. Stored
+    ``file_path`` values are rewritten to the requesting path on read. When
+    the payload total exceeds ``max_bytes`` the least recently used entries
+    are evicted; entries older than ``ttl_seconds`` (if set) count as misses.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path | None = None,
+        *,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttl_seconds: float | None = None,
+        db_name: str = "analysis.sqlite3",
+    ) -> None:
+        self.cache_dir = (cache_dir or default_cache_dir()).expanduser()
+        self.db_name = db_name
+        self.db_path = self.cache_dir / db_name
+        self.name = Path(db_name).stem
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._pid = 0
+
+    @staticmethod
+    def make_key(kind: str, content_digest: str, *components: str) -> str:
+        raw = "\0".join((kind, content_digest, tool_version(), *components))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str, *, file_path: str | None = None) -> Any | None:
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT payload, file_path, size, created FROM entries WHERE key = ?",
+                (key,),
+            ).fetchone()
+            now = time.time()
+            if row is not None and self.ttl_seconds is not None:
+                if now - row[3] > self.ttl_seconds:
+                    self._delete(conn, key, row[2])
+                    row = None
+            if row is None:
+                self.misses += 1
+                record_cache_lookup(self.name, False)
+                return None
+            self.hits += 1
+            record_cache_lookup(self.name, True)
+            conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+            conn.commit()
+        data = json.loads(zlib.decompress(row[0]))
+        stored_path = row[1]
+        if file_path is not None and stored_path is not None and stored_path != file_path:
+            data = _rebase_paths(data, stored_path, file_path)
+        return data
+
+    def put(self, key: str, kind: str, data: Any, *, file_path: str | None = None) -> None:
+        payload = zlib.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"))
+        size = len(payload)
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                old = conn.execute(
+                    "SELECT size FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+                now = time.time()
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries "
+                    "(key, kind, file_path, payload, size, created, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, kind, file_path, payload, size, now, now),
+                )
+                delta = size - (old[0] if old else 0)
+                conn.execute(
+                    "UPDATE meta SET value = value + ? WHERE name = 'total_bytes'",
+                    (delta,),
+                )
+                self._evict(conn)
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT value FROM meta WHERE name = 'total_bytes'"
+            ).fetchone()
+        return int(row[0]) if row else 0
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM entries")
+                conn.execute("UPDATE meta SET value = 0 WHERE name = 'total_bytes'")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def __reduce__(self):
+        # Locks and SQLite connections stay in their process; pool workers
+        # unpickle to one shared instance per database and reconnect.
+        return (
+            open_cache,
+            (self.cache_dir, self.max_bytes, self.ttl_seconds, self.db_name),
+        )
+
+    def _delete(self, conn: sqlite3.Connection, key: str, size: int) -> None:
+        with conn:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            conn.execute(
+                "UPDATE meta SET value = value - ? WHERE name = 'total_bytes'", (size,)
+            )
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute(
+            "SELECT value FROM meta WHERE name = 'total_bytes'"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        freed = 0
+        doomed: list[str] = []
+        for key, size in conn.execute(
+            "SELECT key, size FROM entries ORDER BY last_access ASC"
+        ):
+            if total - freed <= target:
+                break
+            doomed.append(key)
+            freed += size
+        conn.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k in doomed])
+        conn.execute(
+            "UPDATE meta SET value = value - ? WHERE name = 'total_bytes'", (freed,)
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        # Connections must not cross a fork; reopen in pool workers.
+        if self._conn is None or self._pid != os.getpid():
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            conn.commit()
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+
+@lru_cache(maxsize=None)
+def open_cache(
+    cache_dir: Path | None = None,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    ttl_seconds: float | None = None,
+    db_name: str = "analysis.sqlite3",
+) -> AnalysisCache:
+    """Return one ``AnalysisCache`` per database for the current process."""
+    return AnalysisCache(
+        cache_dir, max_bytes=max_bytes, ttl_seconds=ttl_seconds, db_name=db_name
+    )
+
+
+_default_cache: AnalysisCache | None = None
+
+
+def configure_default_cache(cache: AnalysisCache | None) -> None:
+    """Set the cache used by the agent tools (``None`` disables caching)."""
+    global _default_cache
+    _default_cache = cache
+
+
+def default_cache() -> AnalysisCache | None:
+    return _default_cache
+
+
+def _rebase_paths(data: Any, old: str, new: str) -> Any:
+    if isinstance(data, dict):
+        return {
+            k: (new if k == "file_path" and v == old else _rebase_paths(v, old, new))
+            for k, v in data.items()
+        }
+    if isinstance(data, list):
+        return [_rebase_paths(item, old, new) for item in data]
+    return data
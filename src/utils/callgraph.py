@@ -0,0 +1,278 @@
+"""Method lookup index and fan-in/fan-out computation over call sites."""
+
+from __future__ import annotations
+
+from array import array
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Hashable, Iterable
+
+from models import CallRelationship, CallSite, CodeFact, FanMetrics, StructuralAnalysis
+
+
+class MethodIndex:
+    """Map simple method names to method keys, bucketed by arity.
+
+    Keys are ``Class.method`` strings (or any hashable id together with
+    ``name``), so overloads of one method share a key but register every
+    arity they accept. Varargs methods match any call with at least their
+    fixed parameter count.
+    """
+
+    def __init__(self) -> None:
+        self._by_name: dict[str, dict[int, set]] = defaultdict(
+            lambda: defaultdict(set)
+        )
+        self._varargs: dict[str, list[tuple[int, Hashable]]] = defaultdict(list)
+        self._all: dict[str, set] = defaultdict(set)
+
+    def add(
+        self, key: Hashable, arity: int, *, varargs: bool = False, name: str | None = None
+    ) -> None:
+        if name is None:
+            name = key.rsplit(".", 1)[-1]
+        self._all[name].add(key)
+        if varargs:
+            self._varargs[name].append((arity - 1, key))
+        else:
+            self._by_name[name][arity].add(key)
+
+    def resolve(self, name: str, arity: int | None = None) -> set:
+        """Return the method keys a call to ``name`` with ``arity`` arguments may target.
+
+        Falls back to every method with that name when no overload accepts
+        the argument count (or the count is unknown).
+        """
+        candidates = self._all.get(name)
+        if not candidates or arity is None:
+            return candidates or set()
+        matches = set(self._by_name[name].get(arity, ()))
+        for min_arity, key in self._varargs.get(name, ()):
+            if arity >= min_arity:
+                matches.add(key)
+        return matches or candidates
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._all
+
+
+def compute_fan_metrics(
+    method_calls: dict[str, set[tuple[str, int | None]]],
+    index: MethodIndex,
+) -> dict[str, dict[str, int]]:
+    """Fan-out is the number of distinct call targets written in a method; fan-in
+    is the number of distinct callers whose call resolves to exactly one method.
+
+    Each call is resolved through ``index`` in constant time, so the whole
+    computation is linear in the number of call sites.
+    """
+    fan: dict[str, dict[str, int]] = {
+        key: {"fan_in": 0, "fan_out": len({callee for callee, _ in calls})}
+        for key, calls in method_calls.items()
+    }
+    for caller, calls in method_calls.items():
+        resolved: set[str] = set()
+        for callee, arity in calls:
+            targets = index.resolve(callee.rsplit(".", 1)[-1], arity)
+            if len(targets) == 1:
+                resolved.update(targets)
+        for target in resolved:
+            if target in fan:
+                fan[target]["fan_in"] += 1
+    return fan
+
+
+@dataclass
+class _ClassSymbols:
+    name: str
+    file_path: str
+    superclass: str | None
+    methods: MethodIndex = field(default_factory=MethodIndex)
+
+
+class ProjectCallGraph:
+    """Method call graph across every file of a project.
+
+    Methods are numbered ``0..n-1`` (overloads of one method share an id), and
+    the callees of method ``i`` are ``targets[offsets[i]:offsets[i + 1]]``.
+    Both arrays are compact ``array('i')`` buffers, so a million edges take
+    about 4 MB. Call sites are resolved through a symbol table of class ->
+    methods by arity: the receiver's static type (from field, parameter and
+    local declarations, or the enclosing class) selects the class, and
+    superclasses known to the project are searched in turn. Calls on
+    receivers of unknown type fall back to a project-wide name/arity lookup,
+    and only calls that resolve to exactly one method become edges.
+    """
+
+    def __init__(self) -> None:
+        self.keys: list[str] = []
+        self.files: list[str] = []
+        self.offsets = array("i", [0])
+        self.targets = array("i")
+        self.fan_in = array("i")
+        self.fan_out = array("i")
+        self._ids: dict[tuple[str, str], int] = {}
+        self._file_ids: dict[str, range] = {}
+        self._classes: dict[str, list[_ClassSymbols]] = defaultdict(list)
+        self._methods = MethodIndex()
+
+    @classmethod
+    def build(
+        cls, files: Iterable[tuple[CodeFact, StructuralAnalysis]]
+    ) -> ProjectCallGraph:
+        graph = cls()
+        files = list(files)
+        for code_facts, _ in files:
+            graph._add_symbols(code_facts)
+        graph.fan_in = array("i", bytes(4 * len(graph.keys)))
+        graph.fan_out = array("i", bytes(4 * len(graph.keys)))
+
+        # Ids are assigned file by file in caller order, so edges can be
+        # appended straight into CSR form.
+        for code_facts, structural in files:
+            by_caller: dict[int, tuple[set[int], set[str]]] = {}
+            for site in structural.call_sites:
+                caller = graph._ids.get((code_facts.file_path, site.caller))
+                if caller is None:
+                    continue
+                resolved, unresolved = by_caller.setdefault(caller, (set(), set()))
+                target = graph.resolve(site, code_facts.file_path)
+                if target is None:
+                    unresolved.add(_site_text(site))
+                else:
+                    resolved.add(target)
+            for caller in graph._file_ids.get(code_facts.file_path, ()):
+                resolved, unresolved = by_caller.get(caller, ((), ()))
+                for target in sorted(resolved):
+                    graph.targets.append(target)
+                    graph.fan_in[target] += 1
+                graph.fan_out[caller] = len(resolved) + len(unresolved)
+                graph.offsets.append(len(graph.targets))
+        return graph
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.targets)
+
+    def method_id(self, file_path: str, key: str) -> int | None:
+        return self._ids.get((file_path, key))
+
+    def callees(self, method_id: int) -> list[int]:
+        return self.targets[self.offsets[method_id] : self.offsets[method_id + 1]].tolist()
+
+    def resolve(self, site: CallSite, file_path: str) -> int | None:
+        """Return the single method id ``site`` calls, or ``None``."""
+        if site.receiver_type is not None:
+            candidates = self._resolve_in_type(
+                site.receiver_type, site.method_name, site.arg_count, file_path
+            )
+        else:
+            candidates = self._methods.resolve(site.method_name, site.arg_count)
+        return next(iter(candidates)) if len(candidates) == 1 else None
+
+    def link(
+        self, code_facts: CodeFact, structural: StructuralAnalysis
+    ) -> tuple[CodeFact, StructuralAnalysis]:
+        """Return copies of one file's facts with project-wide fan-in/out and edges."""
+        file_path = code_facts.file_path
+        fan_metrics: list[FanMetrics] = []
+        classes = []
+        for class_fact in code_facts.classes:
+            methods = []
+            for method in class_fact.methods:
+                method_id = self._ids[(file_path, f"{class_fact.name}.{method.name}")]
+                methods.append(
+                    method.model_copy(
+                        update={
+                            "fan_in": self.fan_in[method_id],
+                            "fan_out": self.fan_out[method_id],
+                        }
+                    )
+                )
+            classes.append(class_fact.model_copy(update={"methods": methods}))
+        for key, method_id in sorted(
+            (self.keys[method_id], method_id)
+            for method_id in self._file_ids.get(file_path, ())
+        ):
+            class_name, method_name = key.split(".", 1)
+            fan_metrics.append(
+                FanMetrics(
+                    method_key=key,
+                    class_name=class_name,
+                    method_name=method_name,
+                    fan_in=self.fan_in[method_id],
+                    fan_out=self.fan_out[method_id],
+                    file_path=file_path,
+                )
+            )
+
+        edges: dict[tuple[str, str], str | None] = {}
+        for site in structural.call_sites:
+            target = self.resolve(site, file_path)
+            if target is None:
+                edges.setdefault((site.caller, _site_text(site)), None)
+            else:
+                edges[(site.caller, self.keys[target])] = self.files[target]
+        call_relationships = [
+            CallRelationship(
+                caller=caller, callee=callee, file_path=file_path, callee_file=callee_file
+            )
+            for (caller, callee), callee_file in sorted(edges.items())
+        ]
+        return (
+            code_facts.model_copy(update={"classes": classes}),
+            structural.model_copy(
+                update={
+                    "fan_metrics": fan_metrics,
+                    "call_relationships": call_relationships,
+                }
+            ),
+        )
+
+    def _add_symbols(self, code_facts: CodeFact) -> None:
+        file_path = code_facts.file_path
+        first_id = len(self.keys)
+        for class_fact in code_facts.classes:
+            symbols = _ClassSymbols(class_fact.name, file_path, class_fact.superclass)
+            self._classes[class_fact.name].append(symbols)
+            for method in class_fact.methods:
+                key = f"{class_fact.name}.{method.name}"
+                method_id = self._ids.get((file_path, key))
+                if method_id is None:
+                    method_id = self._ids[(file_path, key)] = len(self.keys)
+                    self.keys.append(key)
+                    self.files.append(file_path)
+                varargs = "..." in (method.signature or "")
+                symbols.methods.add(
+                    method_id, method.parameter_count, varargs=varargs, name=method.name
+                )
+                self._methods.add(
+                    method_id, method.parameter_count, varargs=varargs, name=method.name
+                )
+        self._file_ids[file_path] = range(first_id, len(self.keys))
+
+    def _resolve_in_type(
+        self, type_name: str, name: str, arity: int | None, file_path: str
+    ) -> set[int]:
+        seen: set[str] = set()
+        symbols = self._pick_class(type_name, file_path)
+        while symbols is not None and symbols.name not in seen:
+            seen.add(symbols.name)
+            if name in symbols.methods:
+                return symbols.methods.resolve(name, arity)
+            if symbols.superclass is None:
+                break
+            symbols = self._pick_class(symbols.superclass, symbols.file_path)
+        return set()
+
+    def _pick_class(self, name: str, file_path: str) -> _ClassSymbols | None:
+        # Simple names can repeat across packages; prefer the caller's file
+        # and give up when the choice is still ambiguous.
+        candidates = self._classes.get(name, [])
+        if len(candidates) > 1:
+            candidates = [c for c in candidates if c.file_path == file_path]
+        return candidates[0] if len(candidates) == 1 else None
+
+
+def _site_text(site: CallSite) -> str:
+    return f"{site.receiver}.{site.method_name}" if site.receiver else site.method_name
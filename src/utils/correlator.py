@@ -2,6 +2,9 @@
 
 from __future__ import annotations
 
+from bisect import bisect_right
+from typing import Generic, TypeVar
+
 from models import (
     AnalysisEvidence,
     ClassFact,
@@ -13,6 +16,61 @@ from models import (
     StructuralAnalysis,
 )
 
+T = TypeVar("T")
+
+
+class ScopeIndex(Generic[T]):
+    """Line-range lookup over nested scopes (classes, methods).
+
+    Scopes are sorted by start line once; each query bisects to the last
+    scope starting at or before the line and follows parent links outward,
+    so the innermost enclosing scope wins in O(log n + depth).
+    """
+
+    def __init__(self, scopes: list[tuple[int, int, T]]) -> None:
+        ordered = sorted(scopes, key=lambda s: (s[0], -s[1]))
+        self._starts = [start for start, _, _ in ordered]
+        self._ends = [end for _, end, _ in ordered]
+        self._items = [item for _, _, item in ordered]
+        self._parents: list[int] = []
+        stack: list[int] = []
+        for i, (start, end, _) in enumerate(ordered):
+            while stack and self._ends[stack[-1]] < start:
+                stack.pop()
+            self._parents.append(stack[-1] if stack else -1)
+            stack.append(i)
+
+    def innermost(self, line: int, end_line: int | None = None) -> T | None:
+        """Return the innermost scope containing ``line`` through ``end_line``."""
+        last = end_line if end_line is not None and end_line >= line else line
+        i = bisect_right(self._starts, line) - 1
+        while i >= 0:
+            if self._ends[i] >= last:
+                return self._items[i]
+            i = self._parents[i]
+        return None
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class _FactIndex:
+    def __init__(self, code_facts: CodeFact | None) -> None:
+        self.classes_by_name: dict[str, ClassFact] = {}
+        self.methods_by_key: dict[str, list[MethodFact]] = {}
+        class_scopes: list[tuple[int, int, ClassFact]] = []
+        method_scopes: list[tuple[int, int, MethodFact]] = []
+        if code_facts:
+            for cls in code_facts.classes:
+                self.classes_by_name.setdefault(cls.name, cls)
+                class_scopes.append((cls.start_line, cls.end_line, cls))
+                for method in cls.methods:
+                    key = f"{cls.name}.{method.name}"
+                    self.methods_by_key.setdefault(key, []).append(method)
+                    method_scopes.append((method.start_line, method.end_line, method))
+        self.classes = ScopeIndex(class_scopes)
+        self.methods = ScopeIndex(method_scopes)
+
 
 def correlate_evidence(
     pmd_findings: list[PmdFinding],
@@ -21,36 +79,65 @@ def correlate_evidence(
     if not pmd_findings:
         return []
 
-    classes_by_name: dict[str, ClassFact] = {}
-    methods_by_key: dict[str, MethodFact] = {}
-    methods_by_line: list[tuple[int, MethodFact]] = []
+    index = _FactIndex(code_facts)
+    return [_correlate(finding, index) for finding in pmd_findings]
 
-    if code_facts:
-        for cls in code_facts.classes:
-            classes_by_name[cls.name] = cls
-            for method in cls.methods:
-                key = f"{cls.name}.{method.name}"
-                methods_by_key[key] = method
-                methods_by_line.append((method.start_line, method))
 
+def recorrelate_evidence(
+    previous: list[CorrelatedFinding],
+    pmd_findings: list[PmdFinding],
+    code_facts: CodeFact | None,
+) -> tuple[list[CorrelatedFinding], int]:
+    """Correlate again after an edit, keeping entries that are still valid.
+
+    A previous entry is reused when it holds the same ``PmdFinding`` object
+    and its class fact is unchanged in ``code_facts``; everything else is
+    resolved again. Each previous class fact is compared once, however many
+    findings share it. Returns the correlations and how many were recomputed.
+    """
+    if not pmd_findings:
+        return [], 0
+
+    index = _FactIndex(code_facts)
+    by_finding = {id(item.pmd): item for item in previous}
+    # id(previous class fact) -> still current; ``previous`` keeps them alive.
+    unchanged: dict[int, bool] = {}
     correlated: list[CorrelatedFinding] = []
+    recomputed = 0
     for finding in pmd_findings:
-        class_fact = _resolve_class(finding, classes_by_name, code_facts)
-        method_fact = _resolve_method(
-            finding, class_fact, methods_by_key, methods_by_line
-        )
-        metrics = _build_metrics(finding, class_fact, method_fact)
-        summary = _build_summary(finding, class_fact, method_fact, metrics)
-        correlated.append(
-            CorrelatedFinding(
-                pmd=finding,
-                class_fact=class_fact,
-                method_fact=method_fact,
-                metrics=metrics,
-                summary=summary,
-            )
-        )
-    return correlated
+        item = by_finding.get(id(finding))
+        if item is None or item.class_fact is None or not _class_unchanged(
+            item.class_fact, index, unchanged
+        ):
+            item = _correlate(finding, index)
+            recomputed += 1
+        correlated.append(item)
+    return correlated, recomputed
+
+
+def _class_unchanged(
+    class_fact: ClassFact, index: _FactIndex, unchanged: dict[int, bool]
+) -> bool:
+    key = id(class_fact)
+    result = unchanged.get(key)
+    if result is None:
+        current = index.classes_by_name.get(class_fact.name)
+        result = unchanged[key] = current is class_fact or current == class_fact
+    return result
+
+
+def _correlate(finding: PmdFinding, index: _FactIndex) -> CorrelatedFinding:
+    class_fact = _resolve_class(finding, index)
+    method_fact = _resolve_method(finding, class_fact, index)
+    metrics = _build_metrics(finding, class_fact, method_fact)
+    summary = _build_summary(finding, class_fact, method_fact, metrics)
+    return CorrelatedFinding(
+        pmd=finding,
+        class_fact=class_fact,
+        method_fact=method_fact,
+        metrics=metrics,
+        summary=summary,
+    )
 
 
 def build_analysis_evidence(
@@ -62,8 +149,11 @@ def build_analysis_evidence(
     pmd_findings: list[PmdFinding],
     code_facts: CodeFact | None,
     structural_analysis: StructuralAnalysis | None = None,
+    correlated: list[CorrelatedFinding] | None = None,
 ) -> AnalysisEvidence:
-    correlated = correlate_evidence(pmd_findings, code_facts)
+    """Assemble evidence; pass ``correlated`` to skip correlating again."""
+    if correlated is None:
+        correlated = correlate_evidence(pmd_findings, code_facts)
     metrics: list[MetricFinding] = []
     if code_facts:
         metrics.append(
@@ -144,7 +234,10 @@ def _format_structural_analysis(structural: StructuralAnalysis) -> list[str]:
 
     lines.extend(["", "## Call Relationships (ACR)", ""])
     for edge in structural.call_relationships:
-        lines.append(f"- {edge.caller} -> {edge.callee}")
+        if edge.callee_file and edge.callee_file != edge.file_path:
+            lines.append(f"- {edge.caller} -> {edge.callee} ({edge.callee_file})")
+        else:
+            lines.append(f"- {edge.caller} -> {edge.callee}")
 
     lines.extend(["", "## Variable Usage (AVU)", ""])
     for usage in structural.variable_usage:
@@ -169,44 +262,40 @@ def _format_structural_analysis(structural: StructuralAnalysis) -> list[str]:
     return lines
 
 
-def _resolve_class(
-    finding: PmdFinding,
-    classes_by_name: dict[str, ClassFact],
-    code_facts: CodeFact | None,
-) -> ClassFact | None:
-    if finding.class_name and finding.class_name in classes_by_name:
-        return classes_by_name[finding.class_name]
-
-    if code_facts:
-        for cls in code_facts.classes:
-            if cls.start_line <= finding.line <= cls.end_line:
-                return cls
-    return None
+def _resolve_class(finding: PmdFinding, index: _FactIndex) -> ClassFact | None:
+    if finding.class_name and finding.class_name in index.classes_by_name:
+        return index.classes_by_name[finding.class_name]
+    return index.classes.innermost(finding.line, finding.end_line) or (
+        index.classes.innermost(finding.line) if finding.end_line is not None else None
+    )
 
 
 def _resolve_method(
     finding: PmdFinding,
     class_fact: ClassFact | None,
-    methods_by_key: dict[str, MethodFact],
-    methods_by_line: list[tuple[int, MethodFact]],
+    index: _FactIndex,
 ) -> MethodFact | None:
-    if finding.class_name and finding.method_name:
-        key = f"{finding.class_name}.{finding.method_name}"
-        if key in methods_by_key:
-            return methods_by_key[key]
-
-    if class_fact and finding.method_name:
-        for method in class_fact.methods:
-            if method.name == finding.method_name:
-                return method
-
-    candidate: MethodFact | None = None
-    for start_line, method in sorted(methods_by_line, key=lambda x: x[0], reverse=True):
-        if start_line <= finding.line:
-            if class_fact is None or method.class_name == class_fact.name:
-                candidate = method
-                break
-    return candidate
+    if finding.method_name:
+        for class_name in (finding.class_name, class_fact.name if class_fact else None):
+            if not class_name:
+                continue
+            named = index.methods_by_key.get(f"{class_name}.{finding.method_name}")
+            if named:
+                return _closest_overload(named, finding.line)
+
+    method = index.methods.innermost(finding.line, finding.end_line)
+    if method is None and finding.end_line is not None:
+        method = index.methods.innermost(finding.line)
+    if method is not None and class_fact is not None and method.class_name != class_fact.name:
+        return None
+    return method
+
+
+def _closest_overload(methods: list[MethodFact], line: int) -> MethodFact:
+    for method in methods:
+        if method.start_line <= line <= method.end_line:
+            return method
+    return methods[0]
 
 
 def _build_metrics(
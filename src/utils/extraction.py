@@ -0,0 +1,741 @@
+"""Single-pass Java extraction of code facts and structural metrics."""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable
+
+from models import (
+    CallRelationship,
+    CallSite,
+    ClassCoupling,
+    ClassFact,
+    ClassVariableUsage,
+    CodeFact,
+    FanMetrics,
+    MethodFact,
+    MethodVariableUsage,
+    StructuralAnalysis,
+)
+from utils.cache import AnalysisCache, content_hash, grammar_version
+from utils.callgraph import MethodIndex, compute_fan_metrics
+from utils.metrics import observe_parse
+from utils.traversal import iter_nodes
+
+try:
+    import tree_sitter_java as tsjava
+    from tree_sitter import Language, Parser
+except ImportError:  # pragma: no cover
+    tsjava = None
+    Language = None
+    Parser = None
+
+try:
+    from tree_sitter import Query
+except ImportError:  # pragma: no cover
+    Query = None
+
+try:
+    from tree_sitter import QueryCursor
+except ImportError:  # pragma: no cover - tree-sitter < 0.25
+    QueryCursor = None
+
+ENGINES = ("query", "walk")
+
+_TYPE_NODES = ("class_declaration", "interface_declaration", "enum_declaration")
+_METHOD_NODES = ("method_declaration", "constructor_declaration")
+_TYPE_REF_NODES = frozenset(("type_identifier", "scoped_type_identifier"))
+_METHOD_BODY_NODES = _TYPE_REF_NODES | {
+    "method_invocation",
+    "local_variable_declaration",
+    "enhanced_for_statement",
+}
+
+# Everything below the declarations that the extractor needs, matched in a
+# single pass by the Tree-sitter runtime.
+_FACT_QUERY = """
+(type_identifier) @type_ref
+(scoped_type_identifier) @type_ref
+(method_invocation) @call
+(local_variable_declaration declarator: (variable_declarator) @local)
+(enhanced_for_statement) @foreach
+(formal_parameters (formal_parameter) @param)
+(formal_parameters (spread_parameter) @varargs)
+(modifiers "public" @public)
+"""
+
+_local = threading.local()
+
+
+@lru_cache(maxsize=1)
+def java_language():
+    if Language is None or tsjava is None:
+        raise ImportError(
+            "tree-sitter and tree-sitter-java are required. "
+            "Install with: pip install tree-sitter tree-sitter-java"
+        )
+    return Language(tsjava.language())
+
+
+def java_parser():
+    """Return a Java parser reused by the current thread."""
+    parser = getattr(_local, "parser", None)
+    if parser is None:
+        parser = Parser(java_language())
+        _local.parser = parser
+    return parser
+
+
+@lru_cache(maxsize=1)
+def fact_query():
+    """Compile the fact query once per process (``None`` if unsupported)."""
+    language = java_language()
+    if Query is not None:
+        return Query(language, _FACT_QUERY)
+    query = getattr(language, "query", None)  # pragma: no cover
+    return query(_FACT_QUERY) if query else None  # pragma: no cover
+
+
+def query_captures(query, node) -> dict[str, list[Any]]:
+    """Run ``query`` over ``node`` and return captured nodes grouped by name."""
+    if QueryCursor is not None:
+        return QueryCursor(query).captures(node)
+    captures = query.captures(node)  # pragma: no cover - tree-sitter < 0.25
+    if isinstance(captures, dict):  # pragma: no cover
+        return captures
+    grouped: dict[str, list[Any]] = defaultdict(list)  # pragma: no cover
+    for captured, name in captures:  # pragma: no cover
+        grouped[name].append(captured)
+    return grouped  # pragma: no cover
+
+
+class ParsedSource:
+    """Java source and its Tree-sitter tree, parsed on first use.
+
+    Stages that look at the same file share one instance, so the file is
+    parsed at most once, and not at all when every stage hits the cache.
+    """
+
+    def __init__(self, source_code: str) -> None:
+        self.text = source_code
+        self.source = bytes(source_code, "utf-8")
+        self._tree = None
+
+    @property
+    def tree(self):
+        if self._tree is None:
+            self._tree = _timed_parse(java_parser(), self.source)
+        return self._tree
+
+
+def extract_java_facts(
+    source_code: str,
+    *,
+    file_path: str = "<inline>",
+    cache: AnalysisCache | None = None,
+    engine: str = "query",
+    parsed: ParsedSource | None = None,
+) -> tuple[CodeFact, StructuralAnalysis]:
+    """Parse Java source once and build code facts and structural metrics together.
+
+    Declarations are read from the top of the tree; type references, method
+    invocations, local variables, parameters and modifiers beneath each
+    member come from a Tree-sitter query compiled once per process
+    (``engine="query"``) or from a cursor walk (``engine="walk"``). Both
+    engines produce identical
+    facts, and fan-in/out is attached to the returned ``MethodFact`` entries.
+    With a ``cache``, results for previously seen content are returned
+    without parsing. ``parsed`` reuses the tree another stage built for
+    ``source_code``.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown extraction engine {engine!r}; expected one of {ENGINES}")
+    if cache is None:
+        return _extract(source_code, file_path, engine, parsed)
+
+    key = cache.make_key("facts", content_hash(source_code), grammar_version())
+    cached = cache.get(key, file_path=file_path)
+    if cached is not None:
+        return (
+            CodeFact.model_validate(cached["code_facts"]),
+            StructuralAnalysis.model_validate(cached["structural_analysis"]),
+        )
+
+    code_facts, structural = _extract(source_code, file_path, engine, parsed)
+    cache.put(
+        key,
+        "facts",
+        {
+            "code_facts": code_facts.model_dump(mode="json"),
+            "structural_analysis": structural.model_dump(mode="json"),
+        },
+        file_path=file_path,
+    )
+    return code_facts, structural
+
+
+class IncrementalExtractor:
+    """Re-extract one file after edits, reusing the work for untouched members.
+
+    The previous tree is edited in place and handed to the parser as
+    ``old_tree`` so Tree-sitter reuses unchanged subtrees. Members (methods,
+    fields, nested types and header clauses) outside the edited byte range
+    and the ranges Tree-sitter reports as changed keep their previous scan;
+    only the rest are scanned again before the facts are rebuilt.
+    """
+
+    def __init__(self, file_path: str = "<inline>", *, engine: str = "query") -> None:
+        if engine not in ENGINES:
+            raise ValueError(
+                f"Unknown extraction engine {engine!r}; expected one of {ENGINES}"
+            )
+        self.file_path = file_path
+        self.engine = engine
+        self.last_edit: SourceEdit | None = None
+        self.rescanned = 0
+        self.reused = 0
+        self._source = b""
+        self._tree = None
+        self._scans: dict[tuple[int, str], tuple[int, _MemberScan]] = {}
+        self._result: tuple[CodeFact, StructuralAnalysis] | None = None
+
+    def update(self, source_code: str) -> tuple[CodeFact, StructuralAnalysis]:
+        source = bytes(source_code, "utf-8")
+        self.last_edit = None
+        self.rescanned = self.reused = 0
+        if self._result is not None and source == self._source:
+            return self._result
+
+        parser = java_parser()
+        changed: list[tuple[int, int]] = []
+        if self._tree is None:
+            tree = _timed_parse(parser, source)
+        else:
+            edit = source_edit(self._source, source)
+            self._tree.edit(
+                start_byte=edit.start_byte,
+                old_end_byte=edit.old_end_byte,
+                new_end_byte=edit.new_end_byte,
+                start_point=edit.start_point,
+                old_end_point=edit.old_end_point,
+                new_end_point=edit.new_end_point,
+            )
+            tree = _timed_parse(parser, source, self._tree)
+            changed = [
+                (r.start_byte, r.end_byte) for r in self._tree.changed_ranges(tree)
+            ]
+            changed.append((edit.start_byte, edit.new_end_byte))
+            self.last_edit = edit
+
+        previous = self._scans
+        scans: dict[tuple[int, str], tuple[int, _MemberScan]] = {}
+        scan_member = _scanner(self.engine, source)
+        edit = self.last_edit
+
+        def scan(member) -> _MemberScan:
+            start, end = member.start_byte, member.end_byte
+            cached = None
+            if edit is not None and not any(s <= end and start <= e for s, e in changed):
+                old_start = start
+                if start >= edit.new_end_byte:
+                    old_start += edit.old_end_byte - edit.new_end_byte
+                cached = previous.get((old_start, member.type))
+            if cached is not None and cached[0] == end - start:
+                self.reused += 1
+                result = cached[1]
+            else:
+                self.rescanned += 1
+                result = scan_member(member)
+            scans[(start, member.type)] = (end - start, result)
+            return result
+
+        types = _declarations(tree.root_node, source, scan)
+        self._result = _build_facts(types, source, self.file_path)
+        self._source = source
+        self._tree = tree
+        self._scans = scans
+        return self._result
+
+
+@dataclass(frozen=True)
+class SourceEdit:
+    """The single byte range that differs between two versions of a file."""
+
+    start_byte: int
+    old_end_byte: int
+    new_end_byte: int
+    start_point: tuple[int, int]
+    old_end_point: tuple[int, int]
+    new_end_point: tuple[int, int]
+
+
+def source_edit(old: bytes, new: bytes) -> SourceEdit:
+    """Describe ``new`` as one replacement within ``old`` (common prefix/suffix)."""
+    prefix = _common_prefix(old, new)
+    suffix = _common_prefix(old[prefix:][::-1], new[prefix:][::-1])
+    old_end = len(old) - suffix
+    new_end = len(new) - suffix
+    return SourceEdit(
+        start_byte=prefix,
+        old_end_byte=old_end,
+        new_end_byte=new_end,
+        start_point=_point(old, prefix),
+        old_end_point=_point(old, old_end),
+        new_end_point=_point(new, new_end),
+    )
+
+
+def _common_prefix(a: bytes, b: bytes) -> int:
+    # Binary search over slice comparisons keeps the scan in C.
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _point(source: bytes, offset: int) -> tuple[int, int]:
+    row = source.count(b"\n", 0, offset)
+    return row, offset - (source.rfind(b"\n", 0, offset) + 1)
+
+
+@dataclass
+class _MemberScan:
+    refs: set[str] = field(default_factory=set)
+    calls: set[tuple[str, int | None]] = field(default_factory=set)
+    local_count: int = 0
+    arity: int = 0
+    varargs: bool = False
+    is_public: bool = False
+    variables: dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class _MethodSlot:
+    node: Any
+    name: str
+    scan: _MemberScan
+
+
+@dataclass
+class _TypeSlot:
+    node: Any
+    name: str
+    body: Any
+    superclass: str | None = None
+    scans: list[_MemberScan] = field(default_factory=list)
+    methods: list[_MethodSlot] = field(default_factory=list)
+    fields: list[tuple[Any, _MemberScan]] = field(default_factory=list)
+
+
+def _extract(
+    source_code: str, file_path: str, engine: str, parsed: ParsedSource | None = None
+) -> tuple[CodeFact, StructuralAnalysis]:
+    parsed = parsed or ParsedSource(source_code)
+    source = parsed.source
+    types = _declarations(parsed.tree.root_node, source, _scanner(engine, source))
+    return _build_facts(types, source, file_path)
+
+
+def _timed_parse(parser, source: bytes, old_tree=None):
+    start = time.perf_counter()
+    tree = parser.parse(source) if old_tree is None else parser.parse(source, old_tree)
+    observe_parse(time.perf_counter() - start, source.count(b"\n") + 1)
+    return tree
+
+
+def _scanner(engine: str, source: bytes) -> Callable[[Any], _MemberScan]:
+    query = fact_query() if engine == "query" else None
+    if query is not None:
+        return lambda member: _scan_with_query(member, query, source)
+    return lambda member: _scan_with_walk(member, source)
+
+
+def _declarations(
+    root, source: bytes, scan: Callable[[Any], _MemberScan]
+) -> list[_TypeSlot]:
+    """Scan each header clause and body member of every top-level type once."""
+    types: list[_TypeSlot] = []
+    for type_node in root.children:
+        if type_node.type not in _TYPE_NODES:
+            continue
+        name_node = type_node.child_by_field_name("name")
+        slot = _TypeSlot(
+            node=type_node,
+            name=_node_text(name_node, source) if name_node else "Unknown",
+            body=type_node.child_by_field_name("body"),
+        )
+        for child in type_node.children:
+            if child.type == "superclass" and child.named_child_count:
+                slot.superclass = _type_name(child.named_children[0], source)
+            members = slot.body.children if child == slot.body else (child,)
+            for member in members:
+                member_scan = scan(member)
+                slot.scans.append(member_scan)
+                if member.type in _METHOD_NODES:
+                    name_node = member.child_by_field_name("name")
+                    name = _node_text(name_node, source) if name_node else "unknown"
+                    slot.methods.append(_MethodSlot(member, name, member_scan))
+                elif member.type == "field_declaration":
+                    slot.fields.append((member, member_scan))
+        types.append(slot)
+    return types
+
+
+def _scan_with_walk(member, source: bytes) -> _MemberScan:
+    scan = _MemberScan(is_public=_has_modifier(member, "public"))
+    bindings: list[tuple[int, str, str]] = []
+    if member.type not in _METHOD_NODES:
+        _collect_type_refs(member, source, scan.refs)
+        if member.type == "field_declaration":
+            _bind_declarators(member, source, bindings)
+            scan.variables = _first_bindings(bindings)
+        return scan
+    scan.arity, scan.varargs = _arity(member)
+    _bind_parameters(member, source, bindings)
+    for child in iter_nodes(member, types=_METHOD_BODY_NODES):
+        kind = child.type
+        if kind in _TYPE_REF_NODES:
+            _add_type_ref(child, source, scan.refs)
+        elif kind == "method_invocation":
+            callee = _invocation_target(child, source)
+            if callee:
+                scan.calls.add((callee, _argument_count(child)))
+        elif kind == "local_variable_declaration":
+            scan.local_count += sum(
+                1 for c in child.children if c.type == "variable_declarator"
+            )
+            _bind_declarators(child, source, bindings)
+        elif kind == "enhanced_for_statement":
+            _bind_loop_variable(child, source, bindings)
+    scan.variables = _first_bindings(bindings)
+    return scan
+
+
+def _scan_with_query(member, query, source: bytes) -> _MemberScan:
+    # Captures under lambdas and anonymous classes are told apart from the
+    # member's own parameters and modifiers by their parent node.
+    captures = query_captures(query, member)
+    scan = _MemberScan()
+    for node in captures.get("type_ref", ()):
+        _add_type_ref(node, source, scan.refs)
+    for node in captures.get("public", ()):
+        declaration = node.parent.parent
+        if declaration.start_byte == member.start_byte and declaration.type == member.type:
+            scan.is_public = True
+            break
+    bindings: list[tuple[int, str, str]] = []
+    if member.type not in _METHOD_NODES:
+        if member.type == "field_declaration":
+            _bind_declarators(member, source, bindings)
+            scan.variables = _first_bindings(bindings)
+        return scan
+
+    _bind_parameters(member, source, bindings)
+    for node in captures.get("local", ()):
+        _bind(node, node.parent.child_by_field_name("type"), source, bindings)
+    for node in captures.get("foreach", ()):
+        _bind_loop_variable(node, source, bindings)
+    scan.variables = _first_bindings(bindings)
+    for node in captures.get("call", ()):
+        callee = _invocation_target(node, source)
+        if callee:
+            scan.calls.add((callee, _argument_count(node)))
+    scan.local_count = len(captures.get("local", ()))
+    params = member.child_by_field_name("parameters")
+    if params is not None:
+        for name in ("param", "varargs"):
+            for node in captures.get(name, ()):
+                if node.parent.start_byte == params.start_byte:
+                    scan.arity += 1
+                    scan.varargs = scan.varargs or name == "varargs"
+    return scan
+
+
+def _build_facts(
+    types: list[_TypeSlot], source: bytes, file_path: str
+) -> tuple[CodeFact, StructuralAnalysis]:
+    classes: list[ClassFact] = []
+    method_calls: dict[str, set[tuple[str, int | None]]] = {}
+    index = MethodIndex()
+    call_edges: list[CallRelationship] = []
+    call_sites: list[CallSite] = []
+    variable_usage: list[ClassVariableUsage] = []
+    class_coupling: list[ClassCoupling] = []
+
+    for slot in types:
+        fields: dict[str, str] = {}
+        for _, scan in slot.fields:
+            for name, type_name in scan.variables.items():
+                fields.setdefault(name, type_name)
+        methods: list[MethodFact] = []
+        method_locals: list[MethodVariableUsage] = []
+        public_count = sum(
+            _count_declarators(node) for node, scan in slot.fields if scan.is_public
+        )
+        for method in slot.methods:
+            fact = _method_fact(method, source, slot.name)
+            methods.append(fact)
+            if fact.is_public:
+                public_count += 1
+            key = f"{slot.name}.{method.name}"
+            index.add(key, method.scan.arity, varargs=method.scan.varargs)
+            method_calls.setdefault(key, set()).update(method.scan.calls)
+            for callee in sorted({callee for callee, _ in method.scan.calls}):
+                call_edges.append(
+                    CallRelationship(
+                        caller=key,
+                        callee=callee,
+                        file_path=file_path,
+                    )
+                )
+            for callee, arg_count in sorted(method.scan.calls, key=_call_order):
+                receiver, _, name = callee.rpartition(".")
+                call_sites.append(
+                    CallSite(
+                        caller=key,
+                        method_name=name,
+                        arg_count=arg_count,
+                        receiver=receiver or None,
+                        receiver_type=_receiver_type(
+                            receiver or None, method.scan.variables, fields, slot
+                        ),
+                    )
+                )
+            method_locals.append(
+                MethodVariableUsage(
+                    method_name=method.name,
+                    local_variable_count=method.scan.local_count,
+                )
+            )
+
+        refs: set[str] = set().union(*(scan.refs for scan in slot.scans))
+        refs.discard(slot.name)
+        referenced_types = sorted(refs)
+        classes.append(
+            ClassFact(
+                name=slot.name,
+                start_line=slot.node.start_point[0] + 1,
+                end_line=slot.node.end_point[0] + 1,
+                superclass=slot.superclass,
+                method_count=len(methods),
+                field_count=len(slot.fields),
+                public_member_count=public_count,
+                referenced_types=referenced_types,
+                methods=methods,
+            )
+        )
+        if slot.body is None:
+            continue
+        variable_usage.append(
+            ClassVariableUsage(
+                class_name=slot.name,
+                field_count=len(slot.fields),
+                methods=method_locals,
+            )
+        )
+        class_coupling.append(
+            ClassCoupling(
+                class_name=slot.name,
+                referenced_types=referenced_types,
+                coupling_degree=len(referenced_types),
+                file_path=file_path,
+            )
+        )
+
+    fan_by_key = compute_fan_metrics(method_calls, index)
+    fan_metrics: list[FanMetrics] = []
+    for key, metrics in sorted(fan_by_key.items()):
+        class_name, method_name = key.split(".", 1)
+        fan_metrics.append(
+            FanMetrics(
+                method_key=key,
+                class_name=class_name,
+                method_name=method_name,
+                fan_in=metrics["fan_in"],
+                fan_out=metrics["fan_out"],
+                file_path=file_path,
+            )
+        )
+
+    for cls in classes:
+        for method in cls.methods:
+            fan = fan_by_key.get(f"{cls.name}.{method.name}")
+            if fan:
+                method.fan_in = fan["fan_in"]
+                method.fan_out = fan["fan_out"]
+
+    code_facts = CodeFact(
+        language="java",
+        file_path=file_path,
+        classes=classes,
+        total_methods=sum(c.method_count for c in classes),
+    )
+    structural = StructuralAnalysis(
+        file_path=file_path,
+        fan_metrics=fan_metrics,
+        call_relationships=call_edges,
+        call_sites=call_sites,
+        variable_usage=variable_usage,
+        class_coupling=class_coupling,
+    )
+    return code_facts, structural
+
+
+def _call_order(call: tuple[str, int | None]) -> tuple[str, int]:
+    return call[0], -1 if call[1] is None else call[1]
+
+
+def _method_fact(method: _MethodSlot, source: bytes, class_name: str) -> MethodFact:
+    node = method.node
+    params = node.child_by_field_name("parameters")
+    signature = f"{method.name}{_node_text(params, source)}" if params else method.name
+    return MethodFact(
+        class_name=class_name,
+        name=method.name,
+        signature=signature,
+        start_line=node.start_point[0] + 1,
+        end_line=node.end_point[0] + 1,
+        parameter_count=method.scan.arity,
+        is_public=method.scan.is_public,
+    )
+
+
+def _bind_parameters(method_node, source: bytes, bindings: list) -> None:
+    params = method_node.child_by_field_name("parameters")
+    if params is None:
+        return
+    for param in params.named_children:
+        if param.type == "formal_parameter":
+            _bind(param, param.child_by_field_name("type"), source, bindings)
+
+
+def _bind_declarators(declaration, source: bytes, bindings: list) -> None:
+    type_node = declaration.child_by_field_name("type")
+    for child in declaration.children:
+        if child.type == "variable_declarator":
+            _bind(child, type_node, source, bindings)
+
+
+def _bind_loop_variable(loop, source: bytes, bindings: list) -> None:
+    _bind(loop, loop.child_by_field_name("type"), source, bindings)
+
+
+def _bind(named, type_node, source: bytes, bindings: list) -> None:
+    name_node = named.child_by_field_name("name")
+    type_name = _type_name(type_node, source)
+    if name_node is not None and type_name is not None:
+        bindings.append((named.start_byte, _node_text(name_node, source), type_name))
+
+
+def _first_bindings(bindings: list[tuple[int, str, str]]) -> dict[str, str]:
+    # Sorted by position so both engines agree when a name is declared twice.
+    variables: dict[str, str] = {}
+    for _, name, type_name in sorted(bindings):
+        variables.setdefault(name, type_name)
+    return variables
+
+
+def _type_name(type_node, source: bytes) -> str | None:
+    """Simple name of a declared class type; ``None`` for primitives, arrays and ``var``."""
+    if type_node is None:
+        return None
+    if type_node.type == "generic_type" and type_node.named_child_count:
+        type_node = type_node.named_children[0]
+    if type_node.type not in _TYPE_REF_NODES:
+        return None
+    name = _node_text(type_node, source).split(".")[-1]
+    return None if name == "var" else name
+
+
+def _receiver_type(
+    receiver: str | None,
+    variables: dict[str, str],
+    fields: dict[str, str],
+    slot: _TypeSlot,
+) -> str | None:
+    if receiver is None or receiver == "this":
+        return slot.name
+    if receiver == "super":
+        return slot.superclass
+    if receiver.startswith("this."):
+        return fields.get(receiver[5:])
+    if receiver in variables:
+        return variables[receiver]
+    if receiver in fields:
+        return fields[receiver]
+    if receiver.isidentifier() and receiver[0].isupper():
+        return receiver
+    return None
+
+
+def _invocation_target(node, source: bytes) -> str | None:
+    name_node = node.child_by_field_name("name")
+    if not name_node:
+        return None
+    method_name = _node_text(name_node, source)
+    obj_node = node.child_by_field_name("object")
+    if obj_node:
+        return f"{_node_text(obj_node, source)}.{method_name}"
+    return method_name
+
+
+def _argument_count(invocation) -> int | None:
+    arguments = invocation.child_by_field_name("arguments")
+    if arguments is None:
+        return None
+    return arguments.named_child_count - sum(
+        1 for c in arguments.named_children if c.type in ("line_comment", "block_comment")
+    )
+
+
+def _arity(method_node) -> tuple[int, bool]:
+    params = method_node.child_by_field_name("parameters")
+    if params is None:
+        return 0, False
+    count = 0
+    varargs = False
+    for child in params.named_children:
+        if child.type == "formal_parameter":
+            count += 1
+        elif child.type == "spread_parameter":
+            count += 1
+            varargs = True
+    return count, varargs
+
+
+def _collect_type_refs(node, source: bytes, refs: set[str]) -> None:
+    for child in iter_nodes(node, types=_TYPE_REF_NODES):
+        _add_type_ref(child, source, refs)
+
+
+def _add_type_ref(node, source: bytes, refs: set[str]) -> None:
+    text = _node_text(node, source)
+    if text:
+        refs.add(text.split(".")[-1])
+
+
+def _node_text(node, source: bytes) -> str:
+    return source[node.start_byte : node.end_byte].decode("utf-8", errors="replace")
+
+
+def _has_modifier(node, modifier: str) -> bool:
+    for child in node.children:
+        if child.type == "modifiers":
+            return any(c.type == modifier for c in child.children)
+    return False
+
+
+def _count_declarators(field_node) -> int:
+    count = 0
+    for child in field_node.children:
+        if child.type == "variable_declarator":
+            count += 1
+    return max(count, 1)
@@ -0,0 +1,506 @@
+"""Process-wide counters and histograms with Prometheus and JSON exposition.
+
+Nodes, tools and analyzers record through the helpers at the bottom of this
+module (:func:`record_llm_usage`, :func:`observe_pmd_run`,
+:func:`record_pmd_cache_fallback`, :func:`observe_parse`,
+:func:`record_cache_lookup`). They update whichever
+:class:`MetricsRegistry` :func:`configure_metrics` installed last. A default
+registry is always installed, so recording needs no setup and costs a dict
+update under a lock.
+
+The registry is written once at exit (``--metrics-out``), or served over
+HTTP from a long-running process with :func:`serve_metrics`. Worker
+processes record into their own registry; :func:`metrics_delta` captures
+what one task recorded as a picklable snapshot, and :func:`merge_metrics`
+adds it to the parent's registry.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator
+
+METRICS_FORMATS = ("prometheus", "json")
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# USD per million input and output tokens, for the cost estimate. Unknown
+# models are counted in tokens but not in cost.
+MODEL_PRICES: dict[str, tuple[float, float]] = {
+    "fake": (0.0, 0.0),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+}
+
+PMD_SECONDS_BUCKETS = (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+PARSE_SECONDS_PER_KLOC_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+
+_Labels = tuple[str, ...]
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> _Labels:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> list[tuple[str, dict[str, str], float]]:
+        """``(sample name, labels, value)`` rows in exposition order."""
+        raise NotImplementedError
+
+    def state(self) -> dict[_Labels, Any]:
+        """Raw values per label key, for :meth:`MetricsRegistry.snapshot`."""
+        raise NotImplementedError
+
+    def merge(self, state: dict[_Labels, Any]) -> None:
+        raise NotImplementedError
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "type": self.kind,
+            "help": self.help,
+            "samples": [
+                {"name": name, "labels": labels, "value": value}
+                for name, labels, value in self.samples()
+            ],
+        }
+
+
+class Counter(_Metric):
+    """Monotonic total per label combination."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: dict[_Labels, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        if amount < 0:
+            raise ValueError("Counters only go up")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def totals(self) -> dict[_Labels, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def state(self) -> dict[_Labels, float]:
+        return self.totals()
+
+    def merge(self, state: dict[_Labels, float]) -> None:
+        with self._lock:
+            for key, value in state.items():
+                self._values[key] = self._values.get(key, 0.0) + value
+
+    def samples(self) -> list[tuple[str, dict[str, str], float]]:
+        return [
+            (self.name, dict(zip(self.labelnames, key)), value)
+            for key, value in sorted(self.totals().items())
+        ]
+
+
+class Histogram(_Metric):
+    """Cumulative bucket counts, sum and count per label combination."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Iterable[str] = (),
+        *,
+        buckets: Iterable[float],
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label key: [count per bucket..., +Inf count, sum].
+        self._series: dict[_Labels, list[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+        return int(series[-2]) if series else 0
+
+    def sum(self, **labels: str) -> float:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+        return series[-1] if series else 0.0
+
+    def state(self) -> dict[_Labels, list[float]]:
+        with self._lock:
+            return {key: list(values) for key, values in self._series.items()}
+
+    def merge(self, state: dict[_Labels, list[float]]) -> None:
+        with self._lock:
+            for key, values in state.items():
+                series = self._series.get(key)
+                if series is None:
+                    series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+                for i, value in enumerate(values):
+                    series[i] += value
+
+    def samples(self) -> list[tuple[str, dict[str, str], float]]:
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        rows: list[tuple[str, dict[str, str], float]] = []
+        for key, values in sorted(series.items()):
+            labels = dict(zip(self.labelnames, key))
+            for bound, count in zip(self.buckets, values):
+                rows.append((f"{self.name}_bucket", {**labels, "le": _number(bound)}, count))
+            rows.append((f"{self.name}_bucket", {**labels, "le": "+Inf"}, values[-2]))
+            rows.append((f"{self.name}_sum", labels, values[-1]))
+            rows.append((f"{self.name}_count", labels, values[-2]))
+        return rows
+
+
+class Gauge(_Metric):
+    """Value computed at exposition time by ``collect`` (label tuple -> value)."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Iterable[str],
+        collect: Callable[[], dict[_Labels, float]],
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.collect = collect
+
+    def samples(self) -> list[tuple[str, dict[str, str], float]]:
+        return [
+            (self.name, dict(zip(self.labelnames, key)), value)
+            for key, value in sorted(self.collect().items())
+        ]
+
+
+class MetricsRegistry:
+    """Named metrics; ``counter``/``histogram`` return the existing one by name."""
+
+    def __init__(self, namespace: str = "localize_design") -> None:
+        self.namespace = namespace
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Iterable[str] = (),
+        *,
+        buckets: Iterable[float],
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, help, labelnames, buckets=buckets)
+
+    def gauge(
+        self,
+        name: str,
+        help: str,
+        labelnames: Iterable[str],
+        collect: Callable[[], dict[_Labels, float]],
+    ) -> Gauge:
+        return self._get_or_create(Gauge, name, help, labelnames, collect)
+
+    def get(self, name: str) -> _Metric | None:
+        return self._metrics.get(self._full_name(name))
+
+    def snapshot(self) -> dict[str, tuple]:
+        """Picklable counter and histogram state; gauges are derived, so left out."""
+        return {
+            metric.name: (
+                metric.kind,
+                metric.help,
+                metric.labelnames,
+                getattr(metric, "buckets", None),
+                metric.state(),
+            )
+            for metric in self._sorted()
+            if not isinstance(metric, Gauge)
+        }
+
+    def merge(self, snapshot: dict[str, tuple]) -> None:
+        """Add a :meth:`snapshot` from another registry to this one."""
+        kinds = {"counter": Counter, "histogram": Histogram}
+        for name, (kind, help, labelnames, buckets, state) in snapshot.items():
+            cls = kinds[kind]
+            with self._lock:
+                metric = self._metrics.get(name)
+                if metric is None:
+                    options = {"buckets": buckets} if cls is Histogram else {}
+                    metric = self._metrics[name] = cls(name, help, labelnames, **options)
+            if (
+                not isinstance(metric, cls)
+                or metric.labelnames != tuple(labelnames)
+                or getattr(metric, "buckets", None) != buckets
+            ):
+                raise ValueError(f"Metric {name} is already registered differently")
+            metric.merge(state)
+
+    def to_prometheus(self) -> str:
+        """The text exposition format (version 0.0.4)."""
+        lines: list[str] = []
+        for metric in self._sorted():
+            lines.append(f"# HELP {metric.name} {_escape_help(metric.help)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_number(value)}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def to_json(self) -> dict[str, Any]:
+        return {metric.name: metric.to_json() for metric in self._sorted()}
+
+    def write(self, path: Path, fmt: str = "prometheus") -> None:
+        if fmt not in METRICS_FORMATS:
+            raise ValueError(
+                f"Unknown metrics format {fmt!r}; expected one of {METRICS_FORMATS}"
+            )
+        text = (
+            self.to_prometheus()
+            if fmt == "prometheus"
+            else json.dumps(self.to_json(), indent=2) + "\n"
+        )
+        path.write_text(text, encoding="utf-8")
+
+    def _full_name(self, name: str) -> str:
+        return f"{self.namespace}_{name}" if self.namespace else name
+
+    def _sorted(self) -> list[_Metric]:
+        with self._lock:
+            return [self._metrics[name] for name in sorted(self._metrics)]
+
+    def _get_or_create(self, cls, name, help, labelnames, *args, **kwargs):
+        full_name = self._full_name(name)
+        metric = self._metrics.get(full_name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(full_name)
+                if metric is None:
+                    metric = self._metrics[full_name] = cls(
+                        full_name, help, labelnames, *args, **kwargs
+                    )
+        if not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+            raise ValueError(f"Metric {full_name} is already registered differently")
+        return metric
+
+
+_registry = MetricsRegistry()
+
+
+def configure_metrics(registry: MetricsRegistry | None) -> None:
+    """Install the process-wide registry (``None`` installs a fresh empty one)."""
+    global _registry
+    _registry = registry or MetricsRegistry()
+
+
+def metrics_registry() -> MetricsRegistry:
+    return _registry
+
+
+@contextmanager
+def metrics_delta() -> Iterator[MetricsRegistry]:
+    """Record into a fresh registry for the block, then reinstall the previous one.
+
+    Used around one task in a worker process, whose registry is otherwise
+    never read; ship ``snapshot()`` of the yielded registry to the parent.
+    """
+    global _registry
+    previous = _registry
+    _registry = MetricsRegistry(previous.namespace)
+    try:
+        yield _registry
+    finally:
+        _registry = previous
+
+
+def merge_metrics(snapshot: dict[str, tuple] | None) -> None:
+    """Add a worker's :meth:`MetricsRegistry.snapshot` to the installed registry."""
+    if not snapshot:
+        return
+    registry = _registry
+    registry.merge(snapshot)
+    if registry.get("cache_requests_total") is not None:
+        _cache_requests(registry)
+
+
+def serve_metrics(
+    port: int, host: str = "127.0.0.1", registry: MetricsRegistry | None = None
+) -> ThreadingHTTPServer:
+    """Serve ``/metrics`` (Prometheus text) and ``/metrics.json`` on a daemon thread.
+
+    Without an explicit ``registry`` each scrape reads the one installed at
+    that moment. Call ``shutdown()`` on the returned server to stop it.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            source = registry or metrics_registry()
+            path = self.path.split("?", 1)[0]
+            if path == "/metrics":
+                body = source.to_prometheus().encode("utf-8")
+                content_type = PROMETHEUS_CONTENT_TYPE
+            elif path == "/metrics.json":
+                body = json.dumps(source.to_json()).encode("utf-8")
+                content_type = "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(
+        target=server.serve_forever, name="metrics-server", daemon=True
+    ).start()
+    return server
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int) -> float | None:
+    """Estimated USD for one call, or ``None`` for models without a known price."""
+    prices = MODEL_PRICES.get(model)
+    if prices is None:
+        return None
+    return (input_tokens * prices[0] + output_tokens * prices[1]) / 1_000_000
+
+
+def record_llm_usage(
+    node: str, model: str, input_tokens: int, output_tokens: int
+) -> None:
+    registry = _registry
+    registry.counter(
+        "llm_calls_total", "Chat model calls.", ("node", "model")
+    ).inc(node=node, model=model)
+    tokens = registry.counter(
+        "llm_tokens_total", "Tokens reported by the chat model.", ("node", "model", "kind")
+    )
+    tokens.inc(input_tokens, node=node, model=model, kind="prompt")
+    tokens.inc(output_tokens, node=node, model=model, kind="completion")
+    cost = estimate_cost(model, input_tokens, output_tokens)
+    if cost is not None:
+        registry.counter(
+            "llm_cost_usd_total",
+            "Estimated chat model cost from list prices.",
+            ("node", "model"),
+        ).inc(cost, node=node, model=model)
+
+
+def observe_pmd_run(mode: str, seconds: float) -> None:
+    _registry.histogram(
+        "pmd_run_seconds",
+        "Wall time of one PMD subprocess.",
+        ("mode",),
+        buckets=PMD_SECONDS_BUCKETS,
+    ).observe(seconds, mode=mode)
+
+
+def record_pmd_cache_fallback() -> None:
+    _registry.counter(
+        "pmd_cache_fallbacks_total",
+        "PMD runs made without --cache because every cache file of the project was in use.",
+    ).inc()
+
+
+def observe_parse(seconds: float, lines: int) -> None:
+    """Record one Tree-sitter parse, normalised to seconds per thousand lines."""
+    _registry.histogram(
+        "parse_seconds_per_kloc",
+        "Tree-sitter parse time per thousand source lines.",
+        buckets=PARSE_SECONDS_PER_KLOC_BUCKETS,
+    ).observe(seconds * 1000 / max(lines, 1))
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    _cache_requests(_registry).inc(cache=cache, result="hit" if hit else "miss")
+
+
+def _cache_requests(registry: MetricsRegistry) -> Counter:
+    requests = registry.counter(
+        "cache_requests_total", "Cache lookups by outcome.", ("cache", "result")
+    )
+    if registry.get("cache_hit_ratio") is None:
+        registry.gauge(
+            "cache_hit_ratio",
+            "Hits over lookups since start.",
+            ("cache",),
+            lambda: _hit_ratios(requests),
+        )
+    return requests
+
+
+def _hit_ratios(requests: Counter) -> dict[_Labels, float]:
+    hits: dict[str, float] = {}
+    lookups: dict[str, float] = {}
+    for (cache, result), value in requests.totals().items():
+        lookups[cache] = lookups.get(cache, 0.0) + value
+        if result == "hit":
+            hits[cache] = hits.get(cache, 0.0) + value
+    return {(cache,): hits.get(cache, 0.0) / total for cache, total in lookups.items() if total}
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels.items())
+    return "{" + pairs + "}"
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
@@ -0,0 +1,867 @@
+"""Pure-Python checks for the PMD design rules, computed on the Tree-sitter tree.
+
+:class:`NativeRuleAnalyzer` reports the eight rules of ``PMD_DESIGN_RULES``
+as :class:`PmdFinding` objects with PMD's rule names, default thresholds and
+message formats, without starting a JVM. PMD resolves types, and this module
+does not. The metrics that depend on types (ATFD, coupling and Law of
+Demeter degrees) therefore work from declared types, names and receiver
+shapes, so they can differ from PMD on code that leans on inference.
+``benchmarks/bench_rules.py`` measures how far the two engines agree on a
+given code base.
+"""
+
+from __future__ import annotations
+
+import re
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Iterable, Mapping
+
+from models import PMD_DESIGN_RULES, PmdFinding
+from utils.cache import AnalysisCache, content_hash, grammar_version
+from utils.extraction import ParsedSource, _node_text, java_language
+from utils.pmd import default_ruleset_path
+from utils.tracing import span
+from utils.traversal import iter_nodes
+
+# Bump when a rule's semantics or message changes, so cached findings are dropped.
+NATIVE_RULES_VERSION = "1"
+
+# Defaults of category/java/design.xml in PMD 7.
+GOD_CLASS_WMC = 47
+GOD_CLASS_FEW_ATFD = 5
+GOD_CLASS_TCC = 1 / 3
+COUPLING_THRESHOLD = 20
+DATA_CLASS_WOC = 1 / 3
+DATA_CLASS_FEW = 3
+DATA_CLASS_MANY = 5
+DATA_CLASS_HIGH_WMC = 31
+DATA_CLASS_VERY_HIGH_WMC = 47
+LAW_OF_DEMETER_TRUST_RADIUS = 1
+PARAMETER_LIST_MINIMUM = 10
+TOO_MANY_METHODS_MAX = 10
+PUBLIC_COUNT_MINIMUM = 45
+CYCLO_METHOD_REPORT_LEVEL = 10
+CYCLO_CLASS_REPORT_LEVEL = 80
+
+_DESIGN_CATEGORY = "category/java/design.xml"
+# PMD rule properties the native engine honours, mapped to RuleSettings fields.
+_RULE_PROPERTIES = {
+    "CouplingBetweenObjects": {"threshold": "coupling_threshold"},
+    "LawOfDemeter": {"trustRadius": "law_of_demeter_trust_radius"},
+    "ExcessiveParameterList": {"minimum": "parameter_list_minimum"},
+    "TooManyMethods": {"maxmethods": "too_many_methods_max"},
+    "ExcessivePublicCount": {"minimum": "public_count_minimum"},
+    "CyclomaticComplexity": {
+        "methodReportLevel": "cyclo_method_report_level",
+        "classReportLevel": "cyclo_class_report_level",
+    },
+}
+
+_PRIORITY = 3
+_TYPE_DECLARATIONS = (
+    "class_declaration",
+    "interface_declaration",
+    "enum_declaration",
+    "record_declaration",
+)
+_OPERATIONS = ("method_declaration", "constructor_declaration", "compact_constructor_declaration")
+# Members of these belong to another type; method bodies are not walked into them.
+_NESTED = frozenset(
+    (*_TYPE_DECLARATIONS, "class_body", "interface_body", "enum_body", "annotation_type_declaration")
+)
+_DECISIONS = frozenset(
+    (
+        "if_statement",
+        "for_statement",
+        "enhanced_for_statement",
+        "while_statement",
+        "do_statement",
+        "catch_clause",
+        "ternary_expression",
+        "assert_statement",
+    )
+)
+_PRIMITIVE_TYPES = frozenset(
+    ("integral_type", "floating_point_type", "boolean_type", "void_type")
+)
+# java.lang types PMD does not count as coupling.
+_JAVA_LANG = frozenset(
+    (
+        "Object",
+        "String",
+        "Boolean",
+        "Byte",
+        "Character",
+        "Short",
+        "Integer",
+        "Long",
+        "Float",
+        "Double",
+        "Number",
+        "Void",
+        "CharSequence",
+        "StringBuilder",
+        "StringBuffer",
+        "Math",
+        "System",
+        "Class",
+        "Enum",
+        "Iterable",
+        "Comparable",
+        "Runnable",
+        "Thread",
+        "Throwable",
+        "Exception",
+        "RuntimeException",
+        "Error",
+    )
+)
+_OBJECT_METHODS = frozenset(("toString", "equals", "hashCode", "getClass"))
+_ACCESSOR_PREFIX = re.compile(r"^(get|is|has|set)(?=[A-Z_\d]|$)")
+_WHITESPACE = re.compile(r"\s+")
+_COMMENTS = ("line_comment", "block_comment")
+
+
+@dataclass(frozen=True)
+class RuleSettings:
+    """Which design rules run and their thresholds, as set by a PMD ruleset.
+
+    GodClass and DataClass have no properties in PMD, so their thresholds
+    stay at PMD's built-in values.
+    """
+
+    rules: frozenset[str] = frozenset(PMD_DESIGN_RULES)
+    coupling_threshold: int = COUPLING_THRESHOLD
+    law_of_demeter_trust_radius: int = LAW_OF_DEMETER_TRUST_RADIUS
+    parameter_list_minimum: int = PARAMETER_LIST_MINIMUM
+    too_many_methods_max: int = TOO_MANY_METHODS_MAX
+    public_count_minimum: int = PUBLIC_COUNT_MINIMUM
+    cyclo_method_report_level: int = CYCLO_METHOD_REPORT_LEVEL
+    cyclo_class_report_level: int = CYCLO_CLASS_REPORT_LEVEL
+
+    @classmethod
+    def from_ruleset(cls, path: Path) -> RuleSettings:
+        """Read the design rules a PMD ruleset references and the properties it overrides.
+
+        Both whole-category references (with ``<exclude>``) and single-rule
+        references are understood; other categories are ignored.
+        """
+        rules: set[str] = set()
+        overrides: dict[str, int] = {}
+        for rule in ET.parse(path).getroot():
+            if _local_name(rule.tag) != "rule":
+                continue
+            ref = rule.get("ref", "")
+            if ref == _DESIGN_CATEGORY:
+                excluded = {
+                    child.get("name") for child in rule if _local_name(child.tag) == "exclude"
+                }
+                rules.update(set(PMD_DESIGN_RULES) - excluded)
+                continue
+            category, _, name = ref.rpartition("/")
+            if category != _DESIGN_CATEGORY or name not in PMD_DESIGN_RULES:
+                continue
+            rules.add(name)
+            known = _RULE_PROPERTIES.get(name, {})
+            for prop in rule.iter():
+                if _local_name(prop.tag) != "property" or prop.get("name") not in known:
+                    continue
+                value = prop.get("value")
+                if value is None:
+                    value = next(
+                        (v.text for v in prop if _local_name(v.tag) == "value"), None
+                    )
+                overrides[known[prop.get("name")]] = int(value)
+        return replace(cls(rules=frozenset(rules)), **overrides)
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+@dataclass
+class _Operation:
+    node: object
+    name: str
+    is_constructor: bool
+    modifiers: frozenset[str]
+    params: list[tuple[str, str]]  # (name, type text)
+    returns_void: bool
+    body: object | None
+    cyclo: int = 1
+    fields_used: set[str] = field(default_factory=set)
+
+
+@dataclass
+class _Field:
+    name: str
+    modifiers: frozenset[str]
+
+
+@dataclass
+class _TypeScope:
+    node: object
+    kind: str
+    name: str
+    body: object | None
+    members: list = field(default_factory=list)
+    fields: list[_Field] = field(default_factory=list)
+    operations: list[_Operation] = field(default_factory=list)
+
+
+class NativeRuleAnalyzer:
+    """Check the design rules in-process, with the interface of ``PmdAnalyzer``.
+
+    The rules and thresholds come from ``ruleset`` (PMD's format, by default
+    the one ``PmdAnalyzer`` uses), and its hash is part of the cache key.
+    """
+
+    def __init__(self, cache: AnalysisCache | None = None, *, ruleset: Path | None = None):
+        self.cache = cache
+        self.ruleset = ruleset or default_ruleset_path()
+        self.settings = RuleSettings.from_ruleset(self.ruleset)
+        self._ruleset_digest = content_hash(self.ruleset.read_bytes())
+
+    def ensure_available(self) -> None:
+        # Raises ImportError when tree-sitter is missing, like the extractors.
+        java_language()
+
+    def analyze_path(self, target: Path) -> list[PmdFinding]:
+        target = target.resolve()
+        if target.is_file():
+            return self.analyze_paths([target])[str(target)]
+        results = self.analyze_paths(sorted(target.rglob("*.java")))
+        return [finding for findings in results.values() for finding in findings]
+
+    def analyze_source(
+        self, source_code: str, *, file_name: str = "Source.java"
+    ) -> list[PmdFinding]:
+        """Analyze in-memory source; findings carry ``file_name`` as their path."""
+        return self.analyze_sources({file_name: source_code})[file_name]
+
+    def analyze_sources(
+        self, sources: Mapping[str, str], *, threads: int | None = None
+    ) -> dict[str, list[PmdFinding]]:
+        """Findings per key of ``sources``; ``threads`` is accepted for ``PmdAnalyzer`` parity."""
+        return {name: self._analyze(source, name, None) for name, source in sources.items()}
+
+    def analyze_paths(
+        self,
+        paths: Iterable[Path],
+        *,
+        threads: int | None = None,
+        shards: int = 1,
+        roots: Iterable[Path] | None = None,
+    ) -> dict[str, list[PmdFinding]]:
+        """Findings keyed by resolved path, like ``PmdAnalyzer.analyze_paths``.
+
+        Files are checked one after another in this process; ``threads``,
+        ``shards`` and ``roots`` are accepted so either analyzer can be
+        passed around. A
+        file that cannot be read or decoded is left out of the result, so the
+        per-file stages report it instead of the whole batch failing.
+        """
+        files = sorted({str(Path(p).resolve()) for p in paths})
+        results: dict[str, list[PmdFinding]] = {}
+        with span("rules.native", "analysis", files=len(files)) as trace_span:
+            for path in files:
+                try:
+                    source = Path(path).read_text(encoding="utf-8")
+                except (OSError, UnicodeDecodeError):
+                    continue
+                results[path] = self._analyze(source, path, path)
+            trace_span.set(
+                findings=sum(len(f) for f in results.values()),
+                skipped=len(files) - len(results),
+            )
+        return results
+
+    def analyze_file(
+        self, file_path: str, source_code: str, *, parsed: ParsedSource | None = None
+    ) -> list[PmdFinding]:
+        """Findings for the file at ``file_path`` holding ``source_code``.
+
+        ``parsed`` shares the tree another stage already built for the file.
+        """
+        return self._analyze(source_code, file_path, file_path, parsed)
+
+    def _analyze(
+        self,
+        source_code: str,
+        name: str,
+        file_path: str | None,
+        parsed: ParsedSource | None = None,
+    ) -> list[PmdFinding]:
+        if self.cache is None:
+            return check_design_rules(
+                source_code, file_path=name, settings=self.settings, parsed=parsed
+            )
+        extra = () if file_path is not None else (name,)
+        key = AnalysisCache.make_key(
+            "rules",
+            content_hash(source_code),
+            NATIVE_RULES_VERSION,
+            grammar_version(),
+            self._ruleset_digest,
+            *extra,
+        )
+        cached = self.cache.get(key, file_path=file_path)
+        if cached is not None:
+            return [PmdFinding.model_validate(item) for item in cached]
+        findings = check_design_rules(
+            source_code, file_path=name, settings=self.settings, parsed=parsed
+        )
+        self.cache.put(
+            key, "rules", [f.model_dump(mode="json") for f in findings], file_path=file_path
+        )
+        return findings
+
+
+def check_design_rules(
+    source_code: str,
+    *,
+    file_path: str = "<inline>",
+    settings: RuleSettings | None = None,
+    parsed: ParsedSource | None = None,
+) -> list[PmdFinding]:
+    """Run the native design rules over one compilation unit, ordered by line.
+
+    ``settings`` defaults to every rule at PMD's default thresholds;
+    ``parsed`` reuses a tree already built for ``source_code``.
+    """
+    parsed = parsed or ParsedSource(source_code)
+    context = _RuleContext(parsed.source, file_path, settings or RuleSettings())
+    return context.run(parsed.tree.root_node)
+
+
+class _RuleContext:
+    def __init__(self, source: bytes, file_path: str, settings: RuleSettings) -> None:
+        self.source = source
+        self.file_path = file_path
+        self.settings = settings
+        self.findings: list[PmdFinding] = []
+
+    def run(self, root) -> list[PmdFinding]:
+        scopes = [
+            self._scope(node) for node in iter_nodes(root, types=_TYPE_DECLARATIONS)
+        ]
+        enabled = self.settings.rules
+        for scope in scopes:
+            if "CyclomaticComplexity" in enabled:
+                self._cyclomatic_complexity(scope)
+            if "ExcessiveParameterList" in enabled:
+                self._excessive_parameter_list(scope)
+            if "TooManyMethods" in enabled:
+                self._too_many_methods(scope)
+            if "ExcessivePublicCount" in enabled:
+                self._excessive_public_count(scope)
+            if scope.kind == "class_declaration":
+                if "GodClass" in enabled:
+                    self._god_class(scope)
+                if "DataClass" in enabled:
+                    self._data_class(scope)
+            if "LawOfDemeter" in enabled:
+                for operation in scope.operations:
+                    self._law_of_demeter(scope, operation)
+        if "CouplingBetweenObjects" in enabled:
+            self._coupling_between_objects(root, scopes)
+        self.findings.sort(key=lambda f: (f.line, f.rule))
+        return self.findings
+
+    # --- Rules ---------------------------------------------------------------
+
+    def _cyclomatic_complexity(self, scope: _TypeScope) -> None:
+        if not scope.operations:
+            return
+        total = sum(op.cyclo for op in scope.operations)
+        highest = max(op.cyclo for op in scope.operations)
+        class_level = self.settings.cyclo_class_report_level
+        if scope.kind != "interface_declaration" and total >= class_level:
+            self._report(
+                "CyclomaticComplexity",
+                f"The class '{scope.name}' has a total cyclomatic complexity of "
+                f"{total} (highest {highest}).",
+                scope.node,
+                scope,
+            )
+        for op in scope.operations:
+            if op.cyclo >= self.settings.cyclo_method_report_level:
+                kind = "constructor" if op.is_constructor else "method"
+                types = ", ".join(param_type for _, param_type in op.params)
+                self._report(
+                    "CyclomaticComplexity",
+                    f"The {kind} '{op.name}({types})' has a cyclomatic complexity of {op.cyclo}.",
+                    op.node,
+                    scope,
+                    op,
+                )
+
+    def _excessive_parameter_list(self, scope: _TypeScope) -> None:
+        for op in scope.operations:
+            if len(op.params) < self.settings.parameter_list_minimum:
+                continue
+            if op.is_constructor and "private" in op.modifiers:
+                continue
+            params = op.node.child_by_field_name("parameters")
+            self._report(
+                "ExcessiveParameterList", "Avoid long parameter lists.", params, scope, op
+            )
+
+    def _too_many_methods(self, scope: _TypeScope) -> None:
+        if scope.kind not in ("class_declaration", "interface_declaration"):
+            return
+        counted = sum(
+            1
+            for op in scope.operations
+            if not op.is_constructor
+            and not (
+                op.name.startswith(("get", "set", "is")) and _statement_count(op.body) <= 1
+            )
+        )
+        if counted > self.settings.too_many_methods_max:
+            self._report(
+                "TooManyMethods",
+                "This class has too many methods, consider refactoring it.",
+                scope.body,
+                scope,
+            )
+
+    def _excessive_public_count(self, scope: _TypeScope) -> None:
+        interface = scope.kind == "interface_declaration"
+        count = 0
+        for member in scope.members:
+            modifiers = _modifiers(member)
+            public = "public" in modifiers or (interface and "private" not in modifiers)
+            if not public:
+                continue
+            if member.type == "field_declaration" and (
+                interface or {"static", "final"} <= modifiers
+            ):
+                continue
+            if member.type in _OPERATIONS or member.type in (
+                "field_declaration",
+                *_TYPE_DECLARATIONS,
+            ):
+                count += 1
+        if count >= self.settings.public_count_minimum:
+            self._report(
+                "ExcessivePublicCount",
+                "This class has a bunch of public methods and attributes",
+                scope.node,
+                scope,
+            )
+
+    def _god_class(self, scope: _TypeScope) -> None:
+        wmc = sum(op.cyclo for op in scope.operations)
+        if wmc < GOD_CLASS_WMC:
+            return
+        atfd = self._foreign_data_accesses(scope)
+        if atfd <= GOD_CLASS_FEW_ATFD:
+            return
+        tcc = _tight_class_cohesion(scope)
+        if tcc >= GOD_CLASS_TCC:
+            return
+        self._report(
+            "GodClass",
+            f"Possible God Class (WMC={wmc}, ATFD={atfd}, TCC={tcc * 100:.3f}%)",
+            scope.node,
+            scope,
+        )
+
+    def _data_class(self, scope: _TypeScope) -> None:
+        field_names = {f.name.lower() for f in scope.fields}
+        public_methods = [
+            op
+            for op in scope.operations
+            if not op.is_constructor and "public" in op.modifiers
+        ]
+        accessors = [op for op in public_methods if _is_accessor(op, field_names)]
+        woc = (
+            (len(public_methods) - len(accessors)) / len(public_methods)
+            if public_methods
+            else 0.0
+        )
+        if woc >= DATA_CLASS_WOC:
+            return
+        nopa = sum(
+            1 for f in scope.fields if "public" in f.modifiers and "static" not in f.modifiers
+        )
+        noam = sum(1 for op in accessors if "static" not in op.modifiers)
+        wmc = sum(op.cyclo for op in scope.operations)
+        revealed = nopa + noam
+        if not (
+            revealed > DATA_CLASS_FEW
+            and wmc < DATA_CLASS_HIGH_WMC
+            or revealed > DATA_CLASS_MANY
+            and wmc < DATA_CLASS_VERY_HIGH_WMC
+        ):
+            return
+        self._report(
+            "DataClass",
+            f"The class '{scope.name}' is suspected to be a Data Class "
+            f"(WOC={woc * 100:.3f}%, NOPA={nopa}, NOAM={noam}, WMC={wmc})",
+            scope.node,
+            scope,
+        )
+
+    def _law_of_demeter(self, scope: _TypeScope, op: _Operation) -> None:
+        if op.body is None:
+            return
+        degrees = _Degrees(self.source, {f.name for f in scope.fields}, op)
+        for node in iter_nodes(op.body, prune=_NESTED):
+            degrees.visit(node)
+            if node.type == "method_invocation":
+                receiver = node.child_by_field_name("object")
+                member = self._text(node.child_by_field_name("name"))
+                if receiver is None or member in _OBJECT_METHODS:
+                    continue
+                kind = "Call to"
+            elif node.type == "field_access":
+                receiver = node.child_by_field_name("object")
+                member = self._text(node.child_by_field_name("field"))
+                kind = "Access to field"
+            else:
+                continue
+            degree = degrees.of(receiver)
+            if degree > self.settings.law_of_demeter_trust_radius:
+                expression = _WHITESPACE.sub(" ", self._text(receiver))
+                self._report(
+                    "LawOfDemeter",
+                    f"{kind} `{member}` on foreign value `{expression}` (degree {degree})",
+                    node,
+                    scope,
+                    op,
+                )
+
+    def _coupling_between_objects(self, root, scopes: list[_TypeScope]) -> None:
+        if not scopes:
+            return
+        local = {scope.name for scope in scopes}
+        local.update(
+            self._text(node.named_children[0])
+            for node in iter_nodes(root, types=("type_parameter",))
+            if node.named_child_count
+        )
+        coupled: set[str] = set()
+        for node in iter_nodes(
+            root,
+            types=(
+                "field_declaration",
+                "local_variable_declaration",
+                "formal_parameter",
+                "spread_parameter",
+                "method_declaration",
+            ),
+        ):
+            if node.type == "method_declaration" and node.parent.type == "interface_body":
+                continue
+            type_node = node.child_by_field_name("type")
+            if type_node is None and node.type == "spread_parameter":
+                type_node = node.named_children[0] if node.named_child_count else None
+            name = self._coupled_type(type_node)
+            if name is not None and name not in local:
+                coupled.add(name)
+        threshold = self.settings.coupling_threshold
+        if len(coupled) > threshold:
+            self.findings.append(
+                PmdFinding(
+                    rule="CouplingBetweenObjects",
+                    message=f"A value of {len(coupled)} may denote a high amount of "
+                    f"coupling within the class (threshold: {threshold})",
+                    file_path=self.file_path,
+                    line=1,
+                    end_line=root.end_point[0] + 1,
+                    priority=_PRIORITY,
+                    class_name=scopes[0].name,
+                )
+            )
+
+    # --- Facts ---------------------------------------------------------------
+
+    def _scope(self, node) -> _TypeScope:
+        name_node = node.child_by_field_name("name")
+        body = node.child_by_field_name("body")
+        scope = _TypeScope(
+            node=node,
+            kind=node.type,
+            name=self._text(name_node) if name_node else "Unknown",
+            body=body,
+        )
+        if body is not None:
+            for child in body.named_children:
+                if child.type == "enum_body_declarations":
+                    scope.members.extend(child.named_children)
+                else:
+                    scope.members.append(child)
+        interface = node.type == "interface_declaration"
+        for member in scope.members:
+            if member.type == "field_declaration":
+                modifiers = _modifiers(member)
+                if interface:
+                    modifiers |= {"public", "static", "final"}
+                for declarator in member.children_by_field_name("declarator"):
+                    field_name = declarator.child_by_field_name("name")
+                    if field_name is not None:
+                        scope.fields.append(_Field(self._text(field_name), modifiers))
+            elif member.type in _OPERATIONS:
+                scope.operations.append(self._operation(member, interface))
+        field_names = {f.name for f in scope.fields}
+        for op in scope.operations:
+            self._measure(op, field_names)
+        return scope
+
+    def _operation(self, node, interface: bool) -> _Operation:
+        modifiers = _modifiers(node)
+        if interface and "private" not in modifiers:
+            modifiers |= {"public"}
+        params = []
+        parameters = node.child_by_field_name("parameters")
+        for param in parameters.named_children if parameters else ():
+            if param.type == "formal_parameter":
+                type_node = param.child_by_field_name("type")
+                name_node = param.child_by_field_name("name")
+                params.append((self._text(name_node), self._type_text(type_node)))
+            elif param.type == "spread_parameter":
+                type_node = param.named_children[0]
+                declarator = param.named_children[-1]
+                name_node = declarator.child_by_field_name("name") or declarator
+                params.append((self._text(name_node), self._type_text(type_node) + "..."))
+        return_type = node.child_by_field_name("type")
+        return _Operation(
+            node=node,
+            name=self._text(node.child_by_field_name("name")),
+            is_constructor=node.type != "method_declaration",
+            modifiers=modifiers,
+            params=params,
+            returns_void=return_type is None or return_type.type == "void_type",
+            body=node.child_by_field_name("body"),
+        )
+
+    def _measure(self, op: _Operation, field_names: set[str]) -> None:
+        """Cyclomatic complexity and the fields of this class the operation uses."""
+        if op.body is None:
+            return
+        shadowed = {name for name, _ in op.params}
+        for node in iter_nodes(op.body, prune=_NESTED):
+            kind = node.type
+            if kind in _DECISIONS:
+                op.cyclo += 1 + self._boolean_paths(node)
+            elif kind == "switch_label":
+                if node.children and node.children[0].type != "default":
+                    op.cyclo += 1
+            elif kind == "variable_declarator" and node.parent.type in (
+                "local_variable_declaration",
+                "resource",
+            ):
+                shadowed.add(self._text(node.child_by_field_name("name")))
+            elif kind == "field_access":
+                receiver = node.child_by_field_name("object")
+                if receiver is not None and receiver.type == "this":
+                    field_name = self._text(node.child_by_field_name("field"))
+                    if field_name in field_names:
+                        op.fields_used.add(field_name)
+            elif kind == "identifier":
+                # ``count.inc()`` and ``count + 1`` use field ``count``;
+                # ``x.count``, ``count()`` and ``int count`` do not.
+                parent = node.parent
+                if node in (
+                    parent.child_by_field_name("name"),
+                    parent.child_by_field_name("field"),
+                ):
+                    continue
+                name = self._text(node)
+                if name in field_names and name not in shadowed:
+                    op.fields_used.add(name)
+
+    def _boolean_paths(self, node) -> int:
+        condition = node.child_by_field_name("condition")
+        if condition is None and node.type == "assert_statement" and node.named_child_count:
+            condition = node.named_children[0]
+        if condition is None:
+            return 0
+        return sum(
+            1
+            for child in iter_nodes(condition, types=("binary_expression",), prune=_NESTED)
+            if self._text(child.child_by_field_name("operator")) in ("&&", "||")
+        )
+
+    def _foreign_data_accesses(self, scope: _TypeScope) -> int:
+        """ATFD: reads of other objects' fields, directly or through accessors."""
+        count = 0
+        for op in scope.operations:
+            if op.body is None:
+                continue
+            for node in iter_nodes(
+                op.body, types=("method_invocation", "field_access"), prune=_NESTED
+            ):
+                receiver = node.child_by_field_name("object")
+                if receiver is None or receiver.type in ("this", "super"):
+                    continue
+                if receiver.type == "identifier" and _is_type_name(self._text(receiver)):
+                    continue
+                if node.type == "field_access":
+                    count += 1
+                elif _ACCESSOR_PREFIX.match(self._text(node.child_by_field_name("name"))):
+                    count += 1
+        return count
+
+    def _coupled_type(self, type_node) -> str | None:
+        while type_node is not None and type_node.type in ("array_type", "generic_type"):
+            type_node = type_node.named_children[0] if type_node.named_child_count else None
+        if type_node is None or type_node.type in _PRIMITIVE_TYPES:
+            return None
+        if type_node.type not in ("type_identifier", "scoped_type_identifier"):
+            return None
+        name = self._text(type_node)
+        simple = name.rsplit(".", 1)[-1]
+        if name == "var" or simple in _JAVA_LANG or name.startswith("java.lang."):
+            return None
+        return name
+
+    def _type_text(self, type_node) -> str:
+        return _WHITESPACE.sub("", self._text(type_node)) if type_node is not None else ""
+
+    def _text(self, node) -> str:
+        return _node_text(node, self.source) if node is not None else ""
+
+    def _report(
+        self,
+        rule: str,
+        message: str,
+        node,
+        scope: _TypeScope,
+        op: _Operation | None = None,
+    ) -> None:
+        node = node if node is not None else scope.node
+        self.findings.append(
+            PmdFinding(
+                rule=rule,
+                message=message,
+                file_path=self.file_path,
+                line=node.start_point[0] + 1,
+                end_line=node.end_point[0] + 1,
+                priority=_PRIORITY,
+                class_name=scope.name,
+                method_name=op.name if op is not None and not op.is_constructor else None,
+            )
+        )
+
+
+class _Degrees:
+    """Law of Demeter degree of each expression in one operation.
+
+    ``this`` and literals have degree 0. Parameters, fields, locally created
+    objects and results of the class's own methods have degree 1. A method
+    result or field read from a value of degree ``n`` has degree ``n + 1``.
+    Locals take the degree of the value last assigned to them in source
+    order.
+    """
+
+    def __init__(self, source: bytes, field_names: set[str], op: _Operation) -> None:
+        self.source = source
+        self.field_names = field_names
+        self.params = {name for name, _ in op.params}
+        self.locals: dict[str, int] = {}
+
+    def visit(self, node) -> None:
+        kind = node.type
+        if kind == "variable_declarator" and node.parent.type in (
+            "local_variable_declaration",
+            "resource",
+        ):
+            value = node.child_by_field_name("value")
+            self.locals[self._text(node.child_by_field_name("name"))] = (
+                self.of(value) if value is not None else 1
+            )
+        elif kind == "enhanced_for_statement":
+            name = node.child_by_field_name("name")
+            value = node.child_by_field_name("value")
+            if name is not None:
+                self.locals[self._text(name)] = self.of(value) if value is not None else 1
+        elif kind == "assignment_expression":
+            left = node.child_by_field_name("left")
+            if left is not None and left.type == "identifier":
+                name = self._text(left)
+                if name in self.locals:
+                    self.locals[name] = self.of(node.child_by_field_name("right"))
+
+    def of(self, node) -> int:
+        if node is None:
+            return 1
+        kind = node.type
+        if kind in ("this", "super", "true", "false", "null_literal") or kind.endswith("literal"):
+            return 0
+        if kind == "identifier":
+            name = self._text(node)
+            if name in self.locals:
+                return self.locals[name]
+            if name in self.params or name in self.field_names:
+                return 1
+            return 0 if _is_type_name(name) else 1
+        if kind == "method_invocation":
+            receiver = node.child_by_field_name("object")
+            return 1 if receiver is None else self.of(receiver) + 1
+        if kind == "field_access":
+            receiver = node.child_by_field_name("object")
+            if receiver is not None and receiver.type == "this":
+                return 1
+            return self.of(receiver) + 1
+        if kind in ("parenthesized_expression", "cast_expression"):
+            inner = node.child_by_field_name("value") or (
+                node.named_children[-1] if node.named_child_count else None
+            )
+            return self.of(inner)
+        if kind == "array_access":
+            return self.of(node.child_by_field_name("array"))
+        if kind == "ternary_expression":
+            return max(
+                self.of(node.child_by_field_name("consequence")),
+                self.of(node.child_by_field_name("alternative")),
+            )
+        return 1
+
+    def _text(self, node) -> str:
+        return _node_text(node, self.source) if node is not None else ""
+
+
+def _tight_class_cohesion(scope: _TypeScope) -> float:
+    """TCC: share of method pairs that use at least one common field."""
+    methods = [op for op in scope.operations if not op.is_constructor and op.body is not None]
+    pairs = len(methods) * (len(methods) - 1) // 2
+    if pairs == 0:
+        return 0.0
+    connected = sum(
+        1
+        for i, first in enumerate(methods)
+        for second in methods[i + 1 :]
+        if first.fields_used & second.fields_used
+    )
+    return connected / pairs
+
+
+def _is_accessor(op: _Operation, field_names: set[str]) -> bool:
+    name = op.name.lower()
+    if not op.params and not op.returns_void:
+        return bool(re.match(r"^(get|is|has)[A-Z_\d]", op.name)) or name in field_names
+    if len(op.params) == 1 and op.returns_void:
+        return (op.name.startswith("set") and name[3:] in field_names) or name in field_names
+    return False
+
+
+def _modifiers(node) -> frozenset[str]:
+    for child in node.children:
+        if child.type == "modifiers":
+            return frozenset(c.type for c in child.children if not c.is_named)
+    return frozenset()
+
+
+def _statement_count(body) -> int:
+    if body is None:
+        return 0
+    return sum(1 for child in body.named_children if child.type not in _COMMENTS)
+
+
+def _is_type_name(name: str) -> bool:
+    return name[:1].isupper()
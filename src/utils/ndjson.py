@@ -0,0 +1,90 @@
+"""Newline-delimited JSON records for streaming analysis output."""
+
+from __future__ import annotations
+
+import json
+import sys
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, TextIO
+
+from models import AnalysisEvidence
+
+
+class NdjsonWriter:
+    """Write one compact JSON document per line and flush it immediately."""
+
+    def __init__(self, stream: TextIO) -> None:
+        self.stream = stream
+        self.records = 0
+
+    @classmethod
+    @contextmanager
+    def open(cls, path: Path | None = None) -> Iterator[NdjsonWriter]:
+        """Write to ``path`` (truncated first) or to stdout when ``None``."""
+        if path is None:
+            yield cls(sys.stdout)
+            return
+        with path.open("w", encoding="utf-8") as stream:
+            yield cls(stream)
+
+    def write(self, record: dict[str, Any]) -> None:
+        self.stream.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self.stream.flush()
+        self.records += 1
+
+
+def file_record(evidence: AnalysisEvidence) -> dict[str, Any]:
+    return {
+        "type": "file",
+        "file_path": evidence.file_path,
+        "evidence": evidence.model_dump(mode="json", exclude={"source_code"}),
+    }
+
+
+def finding_records(evidence: AnalysisEvidence) -> Iterator[dict[str, Any]]:
+    for finding in evidence.correlated_findings:
+        yield {
+            "type": "finding",
+            "file_path": evidence.file_path,
+            **finding.model_dump(mode="json"),
+        }
+
+
+def error_record(path: str, message: str) -> dict[str, Any]:
+    return {"type": "error", "file_path": path, "message": message}
+
+
+class RunSummary:
+    """Running totals for a streamed run, kept without holding any evidence."""
+
+    def __init__(self) -> None:
+        self.files = 0
+        self.total_classes = 0
+        self.total_methods = 0
+        self.errors = 0
+        self.findings_by_rule: Counter[str] = Counter()
+
+    def add(self, evidence: AnalysisEvidence, *, replaces: list[str] | None = None) -> None:
+        """Count ``evidence``; with ``replaces``, it supersedes a file already
+        counted whose findings had those rules."""
+        if replaces is not None:
+            self.findings_by_rule.subtract(replaces)
+        else:
+            self.files += 1
+            if evidence.code_facts:
+                self.total_classes += len(evidence.code_facts.classes)
+                self.total_methods += evidence.code_facts.total_methods
+        self.findings_by_rule.update(f.rule for f in evidence.pmd_findings)
+
+    def record(self) -> dict[str, Any]:
+        by_rule = +self.findings_by_rule  # drops rules whose count fell to zero
+        return {
+            "type": "summary",
+            "files": self.files,
+            "errors": self.errors,
+            "total_classes": self.total_classes,
+            "total_methods": self.total_methods,
+            "findings_by_rule": dict(sorted(by_rule.items())),
+        }
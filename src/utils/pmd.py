@@ -2,24 +2,71 @@
 
 from __future__ import annotations
 
-import json
+import os
 import re
 import shutil
 import subprocess
 import tempfile
-import xml.etree.ElementTree as ET
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
+from typing import Iterable, Iterator, Mapping
 
 from models import PMD_DESIGN_RULES, PmdFinding
+from utils.cache import AnalysisCache, content_hash, default_cache_dir
+from utils.metrics import observe_pmd_run, record_pmd_cache_fallback
+from utils.pmd_cache import PmdIncrementalCache
+from utils.pmd_report import (
+    PmdReportError,
+    iter_json_report,
+    iter_xml_report,
+    report_path_normalizer,
+)
+from utils.tracing import span
 
 _RULESET_NAME = "pmd_design_ruleset.xml"
+DEFAULT_REPORT_FORMATS = ("json", "xml")
+_TMPFS = "/dev/shm"
+_PACKAGE_DECLARATION = re.compile(r"^\s*package\s+([\w.]+)\s*;", re.MULTILINE)
 
 
 class PmdNotAvailableError(RuntimeError):
     """Raised when the PMD CLI is not installed or not on PATH."""
 
 
-def _ruleset_path() -> Path:
+@dataclass(frozen=True)
+class PmdCapabilities:
+    """Version, report formats and ``pmd check`` options of one PMD executable."""
+
+    version: str
+    formats: tuple[str, ...] = DEFAULT_REPORT_FORMATS
+    options: frozenset[str] = frozenset()
+
+    @property
+    def report_format(self) -> str:
+        """JSON when available (it streams per violation), else XML."""
+        return "json" if "json" in self.formats or "xml" not in self.formats else "xml"
+
+    @property
+    def no_fail_on_violation(self) -> bool:
+        return "no-fail-on-violation" in self.options
+
+    @property
+    def no_fail_on_error(self) -> bool:
+        # PMD 7.3+ exits with 5 on recoverable errors, such as a file that
+        # does not parse, unless told not to; the report is complete anyway.
+        return "no-fail-on-error" in self.options
+
+    @property
+    def success_codes(self) -> tuple[int, ...]:
+        # PMD exits with 4 when it finds violations unless told not to.
+        return (0,) if self.no_fail_on_violation else (0, 4)
+
+
+def default_ruleset_path() -> Path:
     return Path(__file__).resolve().parent.parent / "config" / _RULESET_NAME
 
 
@@ -30,9 +77,24 @@ def _pmd_on_path() -> str | None:
 class PmdAnalyzer:
     """Execute PMD against a file or directory."""
 
-    def __init__(self, pmd_executable: str | None = None, ruleset: Path | None = None):
+    def __init__(
+        self,
+        pmd_executable: str | None = None,
+        ruleset: Path | None = None,
+        cache: AnalysisCache | None = None,
+        pmd_cache_dir: Path | None = None,
+    ):
         self.pmd_executable = pmd_executable or _pmd_on_path()
-        self.ruleset = ruleset or _ruleset_path()
+        self.ruleset = ruleset or default_ruleset_path()
+        self.cache = cache
+        # PMD's own incremental cache lives next to the result cache, or in
+        # the default cache directory when results are not cached, which is
+        # when PMD's cache saves the most.
+        self.pmd_cache_dir = pmd_cache_dir or (
+            cache.cache_dir if cache is not None else default_cache_dir()
+        ) / "pmd"
+        self._ruleset_digest: str | None = None
+        self._incremental: PmdIncrementalCache | None = None
 
     def ensure_available(self) -> None:
         if not self.pmd_executable:
@@ -45,19 +107,229 @@ class PmdAnalyzer:
     def analyze_path(self, target: Path) -> list[PmdFinding]:
         self.ensure_available()
         target = target.resolve()
-        if target.is_file():
+        if not target.is_file():
+            return self._run_pmd_on_directory(target)
+        if self.cache is None:
             return self._run_pmd_on_file(target)
-        return self._run_pmd_on_directory(target)
+
+        key = self._cache_key(target.read_bytes())
+        cached = self._cache_get(key, str(target))
+        if cached is not None:
+            return cached
+        findings = self._run_pmd_on_file(target)
+        self._cache_put(key, findings, str(target))
+        return findings
 
     def analyze_source(
         self, source_code: str, *, file_name: str = "Source.java"
     ) -> list[PmdFinding]:
-        """Analyze in-memory source by writing to a temp file."""
+        """Analyze in-memory source; findings carry ``file_name`` as their path."""
+        return self.analyze_sources({file_name: source_code})[file_name]
+
+    def analyze_sources(
+        self, sources: Mapping[str, str], *, threads: int | None = None
+    ) -> dict[str, list[PmdFinding]]:
+        """Analyze many in-memory sources with a single PMD run.
+
+        Every source is written into one temporary tree (on tmpfs when
+        ``/dev/shm`` is writable) under the directories of its ``package``
+        declaration, named after the last component of its key. Returns
+        findings per key, with ``file_path`` set to the key; every key has
+        an entry, possibly empty.
+        """
         self.ensure_available()
-        with tempfile.TemporaryDirectory(prefix="localize_design_pmd_") as tmp:
-            java_file = Path(tmp) / file_name
-            java_file.write_text(source_code, encoding="utf-8")
-            return self._run_pmd_on_file(java_file)
+        results: dict[str, list[PmdFinding]] = {name: [] for name in sources}
+        keys: dict[str, str] = {}
+        pending = dict(sources)
+        if self.cache is not None:
+            for name, source in sources.items():
+                keys[name] = self._cache_key(source.encode("utf-8"), name)
+                cached = self._cache_get(keys[name], None)
+                if cached is not None:
+                    results[name] = cached
+                    del pending[name]
+        if not pending:
+            return results
+
+        with tempfile.TemporaryDirectory(
+            prefix="localize_design_pmd_", dir=_scratch_dir()
+        ) as tmp:
+            root = Path(tmp).resolve()
+            written: dict[str, str] = {}
+            for name, source in pending.items():
+                path = _source_tree_path(root, name, source, written)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_text(source, encoding="utf-8")
+                written[str(path)] = name
+            findings = self._invoke_pmd_batch(
+                list(written),
+                threads=min(threads or os.cpu_count() or 1, len(written)),
+            )
+
+        normalize = report_path_normalizer()
+        for finding in findings:
+            name = written.get(normalize(finding.file_path))
+            if name is not None:
+                results[name].append(finding.model_copy(update={"file_path": name}))
+        for name in keys.keys() & pending.keys():
+            self._cache_put(keys[name], results[name], None)
+        return results
+
+    def analyze_paths(
+        self,
+        paths: Iterable[Path],
+        *,
+        threads: int | None = None,
+        shards: int = 1,
+        roots: Iterable[Path] | None = None,
+    ) -> dict[str, list[PmdFinding]]:
+        """Analyze many files with one PMD run per shard.
+
+        The files are passed to PMD through ``--file-list`` so a single JVM
+        checks all of them using ``threads`` worker threads (default: CPU
+        count). With ``shards > 1`` the list is split and the shards run as
+        concurrent PMD processes. Returns findings keyed by resolved path;
+        every input path has an entry, possibly empty.
+
+        PMD is skipped when the result cache has every file. Otherwise, with
+        PMD's incremental cache, PMD checks the whole requested list: files
+        it has seen unchanged come from its cache, and the cache file of the
+        project (and shard) keeps them for the next run. The project is named
+        by ``roots``, the files and directories the list was discovered from
+        (default: the outermost directories holding the files). Without the
+        incremental cache, or when all its files are in use, only the files
+        missing from the result cache are passed.
+        """
+        self.ensure_available()
+        requested = sorted({str(Path(p).resolve()) for p in paths})
+        results: dict[str, list[PmdFinding]] = {f: [] for f in requested}
+        keys: dict[str, str] = {}
+        pending = requested
+        if self.cache is not None:
+            pending = []
+            for path in requested:
+                keys[path] = self._cache_key(Path(path).read_bytes())
+                cached = self._cache_get(keys[path], path)
+                if cached is None:
+                    pending.append(path)
+                else:
+                    results[path] = cached
+        if not pending:
+            return results
+
+        incremental = self.incremental_cache() is not None
+        files = requested if incremental else pending
+        scope = _cache_scope(requested, roots) if incremental else None
+        wanted = set(pending)
+        shards = max(1, min(shards, len(files)))
+        threads = threads or os.cpu_count() or 1
+        per_shard_threads = max(1, threads // shards)
+        chunks = [files[i::shards] for i in range(shards)]
+
+        def run(shard: int) -> list[PmdFinding]:
+            if wanted.isdisjoint(chunks[shard]):
+                # Unchanged shard: its cache file is still current.
+                return []
+            return self._invoke_pmd_batch(
+                chunks[shard],
+                threads=per_shard_threads,
+                shard=shard,
+                shards=shards,
+                cache_scope=scope,
+                report_files=wanted & set(chunks[shard]),
+            )
+
+        if shards == 1:
+            batches = [run(0)]
+        else:
+            with ThreadPoolExecutor(max_workers=shards) as pool:
+                batches = list(pool.map(run, range(shards)))
+
+        normalize = report_path_normalizer()
+        for findings in batches:
+            for finding in findings:
+                key = normalize(finding.file_path)
+                if key in wanted:
+                    results[key].append(finding)
+        for path in keys.keys() & wanted:
+            self._cache_put(keys[path], results[path], path)
+        return results
+
+    def pmd_version(self) -> str:
+        return self.capabilities().version
+
+    def capabilities(self) -> PmdCapabilities:
+        """What this PMD executable supports, probed once per executable path."""
+        self.ensure_available()
+        return probe_pmd(self.pmd_executable)
+
+    def incremental_cache(self) -> PmdIncrementalCache | None:
+        """PMD ``--cache`` files for this ruleset and PMD version, if enabled and supported."""
+        if self.pmd_cache_dir is None or "cache" not in self.capabilities().options:
+            return None
+        if self._incremental is None:
+            self._incremental = PmdIncrementalCache(
+                self.pmd_cache_dir,
+                ruleset_digest=self._ruleset_hash(),
+                pmd_version=self.pmd_version(),
+            )
+        return self._incremental
+
+    def _ruleset_hash(self) -> str:
+        if self._ruleset_digest is None:
+            self._ruleset_digest = content_hash(self.ruleset.read_bytes())
+        return self._ruleset_digest
+
+    def _cache_key(self, content: bytes, *extra: str) -> str:
+        return AnalysisCache.make_key(
+            "pmd", content_hash(content), self._ruleset_hash(), self.pmd_version(), *extra
+        )
+
+    def _cache_get(self, key: str, file_path: str | None) -> list[PmdFinding] | None:
+        cached = self.cache.get(key, file_path=file_path)
+        if cached is None:
+            return None
+        return [PmdFinding.model_validate(item) for item in cached]
+
+    def _cache_put(
+        self, key: str, findings: list[PmdFinding], file_path: str | None
+    ) -> None:
+        self.cache.put(
+            key,
+            "pmd",
+            [f.model_dump(mode="json") for f in findings],
+            file_path=file_path,
+        )
+
+    def _invoke_pmd_batch(
+        self,
+        files: list[str],
+        *,
+        threads: int,
+        shard: int = 0,
+        shards: int = 1,
+        cache_scope: str | None = None,
+        report_files: set[str] | None = None,
+    ) -> list[PmdFinding]:
+        with (
+            self._lease_cache(cache_scope, shard, shards) as cache_file,
+            tempfile.TemporaryDirectory(prefix="localize_design_pmd_batch_") as tmp,
+        ):
+            if cache_file is None and report_files is not None:
+                # Without a cache file, checking the unchanged files is wasted.
+                files = sorted(report_files)
+            file_list = Path(tmp) / "files.txt"
+            file_list.write_text("\n".join(files) + "\n", encoding="utf-8")
+            return self._check(
+                ["--file-list", str(file_list), "--threads", str(threads)],
+                Path(tmp),
+                timeout=_batch_timeout(len(files)),
+                mode="batch",
+                report_files=set(files) if report_files is None else report_files,
+                cache_file=cache_file,
+                files=len(files),
+                threads=threads,
+            )
 
     def _run_pmd_on_file(self, java_file: Path) -> list[PmdFinding]:
         return self._invoke_pmd(java_file.parent, single_file=java_file.name)
@@ -68,172 +340,215 @@ class PmdAnalyzer:
     def _invoke_pmd(
         self, directory: Path, *, single_file: str | None
     ) -> list[PmdFinding]:
-        with tempfile.NamedTemporaryFile(
-            suffix=".json", delete=False, prefix="pmd_out_"
-        ) as out_file:
-            out_path = Path(out_file.name)
-
         input_path = str(directory / single_file) if single_file else str(directory)
+        # PMD keeps only the files of the latest run in its cache, so
+        # single-file runs would just evict a project's entries.
+        scope = None if single_file else input_path
+        with (
+            self._lease_cache(scope) as cache_file,
+            tempfile.TemporaryDirectory(prefix="localize_design_pmd_out_") as tmp,
+        ):
+            return self._check(
+                ["-d", input_path],
+                Path(tmp),
+                timeout=120,
+                mode="file",
+                cache_file=cache_file,
+                file=input_path,
+            )
+
+    @contextmanager
+    def _lease_cache(
+        self, scope: str | None, slot: int = 0, slots: int = 1
+    ) -> Iterator[Path | None]:
+        """A PMD ``--cache`` file for ``scope`` for the block, or ``None``.
+
+        ``None`` when ``scope`` is ``None``, the cache is off or unsupported,
+        or every cache file of the project is in use; the last case is
+        counted in the ``pmd_cache_fallbacks_total`` metric.
+        """
+        incremental = self.incremental_cache() if scope is not None else None
+        if incremental is None:
+            yield None
+            return
+        with incremental.lease(scope, slot, slots) as cache_file:
+            if cache_file is None:
+                record_pmd_cache_fallback()
+            yield cache_file
+
+    def _check(
+        self,
+        inputs: list[str],
+        out_dir: Path,
+        *,
+        timeout: float,
+        mode: str,
+        report_files: set[str] | None = None,
+        cache_file: Path | None = None,
+        **attributes: object,
+    ) -> list[PmdFinding]:
+        """Run ``pmd check`` once on ``inputs`` and read its report.
+
+        The report format and exit-code flags come from the probed
+        capabilities; an exit code outside them raises, even when a report
+        was written, and the run is not retried. ``cache_file`` is a leased
+        PMD ``--cache`` file.
+        """
+        capabilities = self.capabilities()
+        fmt = capabilities.report_format
+        out_path = out_dir / f"report.{fmt}"
         cmd = [
             self.pmd_executable,
             "check",
-            "-d",
-            input_path,
+            *inputs,
             "-R",
             str(self.ruleset),
             "-f",
-            "json",
+            fmt,
             "-r",
             str(out_path),
             "--no-progress",
         ]
+        if capabilities.no_fail_on_violation:
+            cmd.append("--no-fail-on-violation")
+        if capabilities.no_fail_on_error:
+            cmd.append("--no-fail-on-error")
+        if cache_file is not None:
+            cmd.extend(["--cache", str(cache_file)])
+        result = _run_pmd(
+            cmd,
+            timeout=timeout,
+            mode=mode,
+            format=fmt,
+            incremental=cache_file is not None,
+            **attributes,
+        )
 
+        # A failed run may still leave a partial report behind; never trust it.
+        if result.returncode not in capabilities.success_codes:
+            detail = (result.stderr or result.stdout or "").strip()
+            raise RuntimeError(
+                f"PMD exited with code {result.returncode}: {detail[:500]}"
+            )
+        if out_path.exists() and out_path.stat().st_size > 0:
+            # Stream the report so a project-wide run never holds it whole.
+            read = iter_json_report if fmt == "json" else iter_xml_report
+            return _read_report(
+                read(out_path, rules=PMD_DESIGN_RULES, files=report_files)
+            )
+        return []
+
+
+def _cache_scope(files: list[str], roots: Iterable[Path] | None) -> str:
+    """Name the project for PMD's cache files by its roots.
+
+    Not their common prefix, which widens to ``/`` or the home directory for
+    unrelated trees and then mixes their cache files. Without ``roots``, the
+    outermost directories holding ``files`` stand in for them.
+    """
+    if roots is not None:
+        candidates = {Path(root).resolve() for root in roots}
+    else:
+        candidates = {Path(file).parent for file in files}
+    outermost: list[Path] = []
+    # Sorted by parts, every path follows its ancestors directly.
+    for path in sorted(candidates, key=lambda p: p.parts):
+        if outermost and path.is_relative_to(outermost[-1]):
+            continue
+        outermost.append(path)
+    return os.pathsep.join(str(path) for path in outermost)
+
+
+def _run_pmd(
+    cmd: list[str], *, timeout: float, mode: str, **attributes: object
+) -> subprocess.CompletedProcess[str]:
+    """Run one PMD subprocess under a ``pmd.subprocess`` span, timing it by ``mode``."""
+    start = time.perf_counter()
+    with span("pmd.subprocess", "pmd", **attributes) as trace_span:
         try:
             result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=120,
-                check=False,
+                cmd, capture_output=True, text=True, timeout=timeout, check=False
             )
         except subprocess.TimeoutExpired as exc:
             raise RuntimeError("PMD execution timed out") from exc
         finally:
-            if out_path.exists() and out_path.stat().st_size == 0:
-                out_path.unlink(missing_ok=True)
-
-        findings: list[PmdFinding] = []
-        if out_path.exists() and out_path.stat().st_size > 0:
-            findings = self._parse_json_report(out_path.read_text(encoding="utf-8"))
-            out_path.unlink(missing_ok=True)
-
-        if not findings and result.stdout.strip():
-            findings = self._parse_json_report(result.stdout)
-
-        if not findings and result.returncode != 0:
-            alt = self._invoke_pmd_xml(directory, single_file=single_file)
-            if alt:
-                return alt
-            detail = (result.stderr or result.stdout or "").strip()
-            if detail:
-                raise RuntimeError(
-                    f"PMD exited with code {result.returncode}: {detail[:500]}"
-                )
-
-        return [f for f in findings if f.rule in PMD_DESIGN_RULES or self._rule_allowed(f.rule)]
-
-    def _rule_allowed(self, rule: str) -> bool:
-        base = rule.split(".")[-1]
-        return base in PMD_DESIGN_RULES
-
-    def _invoke_pmd_xml(
-        self, directory: Path, *, single_file: str | None
-    ) -> list[PmdFinding]:
-        with tempfile.NamedTemporaryFile(
-            suffix=".xml", delete=False, prefix="pmd_out_"
-        ) as out_file:
-            out_path = Path(out_file.name)
-
-        input_path = str(directory / single_file) if single_file else str(directory)
-        cmd = [
-            self.pmd_executable,
-            "check",
-            "-d",
-            input_path,
-            "-R",
-            str(self.ruleset),
-            "-f",
-            "xml",
-            "-r",
-            str(out_path),
-            "--no-progress",
-        ]
-
-        subprocess.run(cmd, capture_output=True, text=True, timeout=120, check=False)
-        if not out_path.exists():
-            return []
-        text = out_path.read_text(encoding="utf-8")
-        out_path.unlink(missing_ok=True)
-        return self._parse_xml_report(text)
-
-    def _parse_json_report(self, raw: str) -> list[PmdFinding]:
-        try:
-            data = json.loads(raw)
-        except json.JSONDecodeError:
-            return []
-
-        findings: list[PmdFinding] = []
-        files = data.get("files", data)
-        if isinstance(files, dict):
-            for file_path, file_data in files.items():
-                violations = file_data.get("violations", [])
-                for v in violations:
-                    findings.append(self._violation_to_finding(file_path, v))
-        elif isinstance(files, list):
-            for entry in files:
-                path = entry.get("filename", entry.get("file", ""))
-                for v in entry.get("violations", []):
-                    findings.append(self._violation_to_finding(path, v))
-        return findings
-
-    def _violation_to_finding(self, file_path: str, violation: dict) -> PmdFinding:
-        rule = violation.get("rule", violation.get("ruleName", "Unknown"))
-        if "." in rule:
-            rule = rule.split(".")[-1]
-        begin = violation.get("beginline", violation.get("beginLine", 1))
-        end = violation.get("endline", violation.get("endLine"))
-        class_name, method_name = _extract_symbols_from_message(
-            violation.get("description", violation.get("message", ""))
+            observe_pmd_run(mode, time.perf_counter() - start)
+        trace_span.set(returncode=result.returncode)
+    return result
+
+
+@lru_cache(maxsize=None)
+def probe_pmd(executable: str) -> PmdCapabilities:
+    """Read the version and ``pmd check`` options of ``executable``.
+
+    Runs ``--version`` and ``check --help`` once per executable path. A probe
+    that fails leaves the defaults of a plain PMD 7 install: JSON reports,
+    and exit code 4 when violations are found.
+    """
+    with span("pmd.probe", "pmd", executable=executable) as trace_span:
+        version_text = _probe_output([executable, "--version"])
+        help_text = _probe_output([executable, "check", "--help"])
+        match = re.search(r"(\d+\.\d+(?:\.\d+)?\S*)", version_text)
+        options = frozenset(
+            name
+            for negatable, name in re.findall(r"--(\[no-\])?([a-z][\w-]*)", help_text)
+            for name in ((name, f"no-{name}") if negatable else (name,))
         )
-        return PmdFinding(
-            rule=rule,
-            message=violation.get("description", violation.get("message", "")),
-            file_path=file_path,
-            line=int(begin) if begin else 1,
-            end_line=int(end) if end else None,
-            priority=violation.get("priority"),
-            class_name=class_name,
-            method_name=method_name,
+        formats_match = re.search(r"Valid values:\s*([^\n]+)", help_text)
+        formats = (
+            tuple(f.strip() for f in formats_match.group(1).split(",") if f.strip())
+            if formats_match
+            else DEFAULT_REPORT_FORMATS
         )
-
-    def _parse_xml_report(self, raw: str) -> list[PmdFinding]:
-        findings: list[PmdFinding] = []
-        try:
-            root = ET.fromstring(raw)
-        except ET.ParseError:
-            return findings
-
-        for file_elem in root.findall(".//file"):
-            file_path = file_elem.get("name", "")
-            for violation in file_elem.findall("violation"):
-                rule = violation.get("rule", "Unknown")
-                if "." in rule:
-                    rule = rule.split(".")[-1]
-                begin = int(violation.get("beginline", 1))
-                end_line = violation.get("endline")
-                msg = (violation.text or "").strip()
-                class_name, method_name = _extract_symbols_from_message(msg)
-                findings.append(
-                    PmdFinding(
-                        rule=rule,
-                        message=msg,
-                        file_path=file_path,
-                        line=begin,
-                        end_line=int(end_line) if end_line else None,
-                        priority=int(violation.get("priority"))
-                        if violation.get("priority")
-                        else None,
-                        class_name=class_name,
-                        method_name=method_name,
-                    )
-                )
-        return findings
+        capabilities = PmdCapabilities(
+            version=match.group(1) if match else "unknown",
+            formats=formats,
+            options=options,
+        )
+        trace_span.set(
+            version=capabilities.version, report_format=capabilities.report_format
+        )
+    return capabilities
 
 
-def _extract_symbols_from_message(message: str) -> tuple[str | None, str | None]:
-    class_match = re.search(r"class\s+['\"]?(\w+)['\"]?", message, re.I)
-    method_match = re.search(r"method\s+['\"]?(\w+)['\"]?", message, re.I)
-    return (
-        class_match.group(1) if class_match else None,
-        method_match.group(1) if method_match else None,
-    )
+def _probe_output(cmd: list[str]) -> str:
+    try:
+        result = subprocess.run(
+            cmd, capture_output=True, text=True, timeout=60, check=False
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return ""
+    return f"{result.stdout}\n{result.stderr}"
+
+
+def _scratch_dir() -> str | None:
+    """``/dev/shm`` when writable, so temporary sources never touch disk."""
+    if os.path.isdir(_TMPFS) and os.access(_TMPFS, os.W_OK | os.X_OK):
+        return _TMPFS
+    return None
+
+
+def _source_tree_path(root: Path, name: str, source: str, taken: Mapping[str, str]) -> Path:
+    file_name = Path(name).name or "Source.java"
+    if not file_name.endswith(".java"):
+        file_name += ".java"
+    match = _PACKAGE_DECLARATION.search(source)
+    relative = Path(*match.group(1).split("."), file_name) if match else Path(file_name)
+    path = root / relative
+    # Keys with the same package and file name go into separate roots.
+    copy = 0
+    while str(path) in taken:
+        copy += 1
+        path = root / f"copy{copy}" / relative
+    return path
+
+
+def _batch_timeout(file_count: int) -> float:
+    return 120 + 0.5 * file_count
+
+
+def _read_report(findings: Iterable[PmdFinding]) -> list[PmdFinding]:
+    try:
+        return list(findings)
+    except PmdReportError as exc:
+        raise RuntimeError(f"Could not read PMD report: {exc}") from exc
@@ -0,0 +1,357 @@
+"""Incremental readers for PMD JSON and XML reports.
+
+Project-wide PMD reports can run to hundreds of megabytes. The readers here
+pull one violation at a time from the report file and yield
+:class:`PmdFinding` objects lazily, so memory stays bounded by a single
+violation (JSON) or a single ``<file>`` element (XML) rather than the whole
+report. ``rules`` and ``files`` filters are applied while parsing: JSON
+violations of unwanted files are skipped without being decoded, and no
+finding objects are built for filtered-out violations.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import re
+import xml.etree.ElementTree as ET
+from contextlib import nullcontext
+from pathlib import Path
+from typing import IO, Any, Callable, Collection, Iterator
+
+from models import PmdFinding
+
+_CHUNK_SIZE = 1 << 16
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+ReportSource = str | Path | IO[str] | IO[bytes]
+
+
+class PmdReportError(ValueError):
+    """Raised when a PMD report is malformed or truncated."""
+
+
+def iter_json_report(
+    source: ReportSource,
+    *,
+    rules: Collection[str] | None = None,
+    files: Collection[str] | None = None,
+) -> Iterator[PmdFinding]:
+    """Yield findings from a PMD JSON report one violation at a time.
+
+    ``source`` is a report path or an open file. Both the PMD 7 layout
+    (``{"files": [{"filename": ..., "violations": [...]}]}``) and a
+    ``files`` object keyed by path are read. ``rules`` keeps only those rule
+    names (without category prefix); ``files`` keeps only those paths,
+    compared as written and after resolving.
+    """
+    with _open(source, "r") as fp:
+        reader = _JsonReader(fp)
+        first = reader.peek()
+        if first == "":
+            return
+        if first == "[":
+            yield from _json_file_list(reader, rules, files)
+            return
+        for key in reader.keys():
+            if key != "files":
+                reader.skip()
+            elif reader.peek() == "[":
+                yield from _json_file_list(reader, rules, files)
+            else:
+                yield from _json_file_map(reader, rules, files)
+
+
+def iter_xml_report(
+    source: ReportSource,
+    *,
+    rules: Collection[str] | None = None,
+    files: Collection[str] | None = None,
+) -> Iterator[PmdFinding]:
+    """Yield findings from a PMD XML report, clearing each element once read.
+
+    The report namespace is ignored, so both namespaced PMD output and plain
+    ``<pmd><file><violation>`` documents are read. Filters work as in
+    :func:`iter_json_report`.
+    """
+    with _open(source, "rb") as fp:
+        root = None
+        file_path = ""
+        keep_file = True
+        try:
+            for event, elem in ET.iterparse(fp, events=("start", "end")):
+                tag = elem.tag.rsplit("}", 1)[-1]
+                if event == "start":
+                    if root is None:
+                        root = elem
+                    elif tag == "file":
+                        file_path = elem.get("name", "")
+                        keep_file = _wanted_file(file_path, files)
+                    continue
+                if tag == "violation":
+                    rule = _rule_name(elem.get("rule", "Unknown"))
+                    if keep_file and (rules is None or rule in rules):
+                        yield _xml_violation_to_finding(file_path, rule, elem)
+                    elem.clear()
+                elif tag == "file" and root is not None:
+                    # Drop finished <file> elements so the tree never grows.
+                    root.clear()
+        except ET.ParseError as exc:
+            raise PmdReportError(f"Malformed PMD XML report: {exc}") from exc
+
+
+def violation_to_finding(file_path: str, violation: dict[str, Any]) -> PmdFinding:
+    """Normalise one JSON report violation."""
+    rule = _rule_name(violation.get("rule", violation.get("ruleName", "Unknown")))
+    begin = violation.get("beginline", violation.get("beginLine", 1))
+    end = violation.get("endline", violation.get("endLine"))
+    message = violation.get("description", violation.get("message", ""))
+    class_name, method_name = extract_symbols_from_message(message)
+    return PmdFinding(
+        rule=rule,
+        message=message,
+        file_path=file_path,
+        line=int(begin) if begin else 1,
+        end_line=int(end) if end else None,
+        priority=violation.get("priority"),
+        class_name=class_name,
+        method_name=method_name,
+    )
+
+
+def normalize_report_path(path: str) -> str:
+    try:
+        return str(Path(path).resolve())
+    except OSError:
+        return path
+
+
+def report_path_normalizer() -> Callable[[str], str]:
+    """:func:`normalize_report_path`, resolving each distinct name only once.
+
+    A report names the same file for every one of its violations; the memo
+    lives as long as the returned function, so use one per report read.
+    """
+    resolved: dict[str, str] = {}
+
+    def normalize(path: str) -> str:
+        key = resolved.get(path)
+        if key is None:
+            key = resolved[path] = normalize_report_path(path)
+        return key
+
+    return normalize
+
+
+def extract_symbols_from_message(message: str) -> tuple[str | None, str | None]:
+    class_match = re.search(r"class\s+['\"]?(\w+)['\"]?", message, re.I)
+    method_match = re.search(r"method\s+['\"]?(\w+)['\"]?", message, re.I)
+    return (
+        class_match.group(1) if class_match else None,
+        method_match.group(1) if method_match else None,
+    )
+
+
+def _json_file_list(
+    reader: _JsonReader,
+    rules: Collection[str] | None,
+    files: Collection[str] | None,
+) -> Iterator[PmdFinding]:
+    for _ in reader.elements():
+        file_path: str | None = None
+        alias: str | None = None
+        # Violations read before the file name is known; PMD writes the name
+        # first, so this stays empty in practice.
+        pending: list[dict[str, Any]] = []
+        for key in reader.keys():
+            if key == "filename":
+                file_path = str(reader.value())
+            elif key == "file":
+                alias = str(reader.value())
+            elif key != "violations":
+                reader.skip()
+            elif file_path is not None:
+                if not _wanted_file(file_path, files):
+                    reader.skip()
+                    continue
+                yield from _json_violations(reader, file_path, rules)
+            else:
+                pending.extend(_json_violations_raw(reader, rules))
+        if pending:
+            name = file_path if file_path is not None else alias or ""
+            if _wanted_file(name, files):
+                for violation in pending:
+                    yield violation_to_finding(name, violation)
+
+
+def _json_file_map(
+    reader: _JsonReader,
+    rules: Collection[str] | None,
+    files: Collection[str] | None,
+) -> Iterator[PmdFinding]:
+    for file_path in reader.keys():
+        if not _wanted_file(file_path, files):
+            reader.skip()
+            continue
+        for key in reader.keys():
+            if key == "violations":
+                yield from _json_violations(reader, file_path, rules)
+            else:
+                reader.skip()
+
+
+def _json_violations(
+    reader: _JsonReader, file_path: str, rules: Collection[str] | None
+) -> Iterator[PmdFinding]:
+    for violation in _json_violations_raw(reader, rules):
+        yield violation_to_finding(file_path, violation)
+
+
+def _json_violations_raw(
+    reader: _JsonReader, rules: Collection[str] | None
+) -> Iterator[dict[str, Any]]:
+    for _ in reader.elements():
+        violation = reader.value()
+        if not isinstance(violation, dict):
+            continue
+        rule = _rule_name(violation.get("rule", violation.get("ruleName", "Unknown")))
+        if rules is None or rule in rules:
+            yield violation
+
+
+class _JsonReader:
+    """Pull reader that walks JSON containers and decodes one leaf value at a time.
+
+    Only the current chunk and the value being decoded are held in memory.
+    ``keys`` and ``elements`` leave the cursor on each member's value, which
+    the caller must consume with ``value`` or ``skip``.
+    """
+
+    def __init__(self, fp: IO[str]) -> None:
+        self._fp = fp
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self._decoder = json.JSONDecoder()
+
+    def peek(self) -> str:
+        """The next non-whitespace character, or ``""`` at the end of input."""
+        while True:
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError as exc:
+                if self._fill():
+                    continue
+                raise PmdReportError(f"Malformed PMD JSON report: {exc}") from exc
+            # A number at the end of the buffer may continue in the next chunk.
+            if end >= len(self._buf) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def skip(self) -> None:
+        char = self.peek()
+        if char == "{":
+            for _ in self.keys():
+                self.skip()
+        elif char == "[":
+            for _ in self.elements():
+                self.skip()
+        else:
+            self.value()
+
+    def keys(self) -> Iterator[str]:
+        self._expect("{")
+        if self.peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self.value()
+            if not isinstance(key, str):
+                raise PmdReportError("Malformed PMD JSON report: object key is not a string")
+            self._expect(":")
+            yield key
+            if self._separator("}"):
+                return
+
+    def elements(self) -> Iterator[None]:
+        self._expect("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield None
+            if self._separator("]"):
+                return
+
+    def _separator(self, close: str) -> bool:
+        char = self.peek()
+        if char not in (",", close):
+            raise PmdReportError(
+                f"Malformed PMD JSON report: expected ',' or {close!r}, got {char!r}"
+            )
+        self._pos += 1
+        return char == close
+
+    def _expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise PmdReportError(
+                f"Malformed PMD JSON report: expected {char!r}, got {found!r}"
+            )
+        self._pos += 1
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        chunk = self._fp.read(_CHUNK_SIZE)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos :] + chunk
+        self._pos = 0
+        return True
+
+
+def _open(source: ReportSource, mode: str):
+    if isinstance(source, (str, Path)):
+        if mode == "r":
+            return open(source, encoding="utf-8")
+        return open(source, mode)
+    if mode == "r" and isinstance(source, (io.RawIOBase, io.BufferedIOBase)):
+        return io.TextIOWrapper(source, encoding="utf-8")
+    return nullcontext(source)
+
+
+def _rule_name(rule: str) -> str:
+    return rule.split(".")[-1]
+
+
+def _wanted_file(file_path: str, files: Collection[str] | None) -> bool:
+    return files is None or file_path in files or normalize_report_path(file_path) in files
+
+
+def _xml_violation_to_finding(file_path: str, rule: str, elem: ET.Element) -> PmdFinding:
+    message = (elem.text or "").strip()
+    class_name, method_name = extract_symbols_from_message(message)
+    end_line = elem.get("endline")
+    priority = elem.get("priority")
+    return PmdFinding(
+        rule=rule,
+        message=message,
+        file_path=file_path,
+        line=int(elem.get("beginline", 1)),
+        end_line=int(end_line) if end_line else None,
+        priority=int(priority) if priority else None,
+        class_name=class_name,
+        method_name=method_name,
+    )
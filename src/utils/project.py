@@ -0,0 +1,428 @@
+"""Run the static analysis stages over many Java files in parallel."""
+
+from __future__ import annotations
+
+import os
+from collections import Counter
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from contextlib import ExitStack
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from models import AnalysisEvidence, PmdFinding, ProjectAnalysis
+from utils.cache import AnalysisCache
+from utils.callgraph import ProjectCallGraph
+from utils.correlator import build_analysis_evidence
+from utils.extraction import ParsedSource, extract_java_facts
+from utils.metrics import merge_metrics, metrics_delta
+from utils.native_rules import NativeRuleAnalyzer
+from utils.pmd import PmdAnalyzer, PmdNotAvailableError
+from utils.rules_engine import merge_findings, rules_engine
+
+
+def discover_java_files(paths: Iterable[Path]) -> list[Path]:
+    """Expand files and directories into a sorted, de-duplicated list of .java files."""
+    found: set[Path] = set()
+    for path in paths:
+        path = path.resolve()
+        if path.is_file():
+            found.add(path)
+            continue
+        for candidate in path.rglob("*.java"):
+            relative = candidate.relative_to(path)
+            if any(part.startswith(".") for part in relative.parts[:-1]):
+                continue
+            if candidate.is_file():
+                found.add(candidate)
+    return sorted(found)
+
+
+def analyze_file_static(
+    path: Path,
+    *,
+    pmd_findings: list[PmdFinding] | None = None,
+    cache: AnalysisCache | None = None,
+    native_rules: NativeRuleAnalyzer | None = None,
+) -> AnalysisEvidence:
+    """Run Tree-sitter, structural metrics and correlation on one file.
+
+    PMD findings are produced for the whole batch and passed in, or attached
+    once that pass finishes. ``native_rules`` checks the design rules on the
+    tree the extraction parsed, and its findings are merged with PMD's.
+    """
+    file_path = str(path)
+    source = path.read_text(encoding="utf-8")
+    parsed = ParsedSource(source)
+    code_facts, structural = extract_java_facts(
+        source, file_path=file_path, cache=cache, parsed=parsed
+    )
+    findings = pmd_findings or []
+    if native_rules is not None:
+        findings = merge_findings(
+            findings, native_rules.analyze_file(file_path, source, parsed=parsed)
+        )
+
+    return build_analysis_evidence(
+        language="java",
+        file_path=file_path,
+        project_path=None,
+        source_code=None,
+        pmd_findings=findings,
+        code_facts=code_facts,
+        structural_analysis=structural,
+    )
+
+
+@dataclass
+class FileOutcome:
+    """Static analysis of one file, or the error that stopped it.
+
+    ``metrics`` is the snapshot of what a worker process recorded for the
+    file; it has already been merged into this process's registry.
+    ``replaces`` is set when the outcome supersedes one already yielded for
+    the same path: it lists the rules of the findings that outcome had.
+    """
+
+    path: str
+    evidence: AnalysisEvidence | None = None
+    error: str | None = None
+    metrics: dict[str, tuple] | None = None
+    replaces: list[str] | None = None
+
+
+def iter_project_evidence(
+    paths: Iterable[Path],
+    *,
+    workers: int | None = None,
+    use_pmd: bool = True,
+    pmd_shards: int = 1,
+    cache: AnalysisCache | None = None,
+) -> Iterator[FileOutcome]:
+    """Yield each Java file's evidence under ``paths`` as soon as it is ready.
+
+    The design rules chosen by ``configure_rules_engine`` are checked
+    alongside the per-file stages. The native engine runs in each worker on
+    the tree extraction parsed. PMD runs once over the whole file list (see
+    ``PmdAnalyzer.analyze_paths``) on a background thread. Files finished
+    before it are yielded without its findings; once it is done, those it
+    flagged are analyzed again and yielded a second time with ``replaces``
+    set. Files finishing later get the findings straight away. A PMD failure
+    is yielded as an outcome for ``"<pmd>"``. ``workers`` defaults to the
+    number of CPU cores; a single worker (or a single file) runs in-process
+    without starting a pool. Results arrive in completion order, and only the
+    paths yielded before PMD finishes are remembered.
+    """
+    paths = list(paths)
+    files = discover_java_files(paths)
+    cpu_count = os.cpu_count() or 1
+    max_workers = min(workers or cpu_count, max(len(files), 1))
+    engine = rules_engine()
+    native = NativeRuleAnalyzer(cache=cache) if use_pmd and engine != "pmd" else None
+
+    with ExitStack() as stack:
+        pool: ProcessPoolExecutor | None = None
+        # Each pending task maps to its path and, for a re-analysis, ``replaces``.
+        futures: dict[Future, tuple[Path, list[str] | None]] = {}
+        if max_workers > 1:
+            pool = stack.enter_context(ProcessPoolExecutor(max_workers=max_workers))
+            for path in files:
+                future = pool.submit(
+                    _analyze_in_worker, path, cache=cache, native_rules=native
+                )
+                futures[future] = (path, None)
+        rules: Future | None = None
+        if use_pmd and files and engine != "native" and _pmd_available():
+            # Started after the pool so its workers are not forked mid-run.
+            rules_thread = stack.enter_context(ThreadPoolExecutor(max_workers=1))
+            rules = rules_thread.submit(
+                PmdAnalyzer(cache=cache).analyze_paths,
+                files,
+                threads=workers or cpu_count,
+                shards=pmd_shards,
+                roots=paths,
+            )
+        join = _FindingsJoin(rules)
+
+        def settle() -> Iterator[FileOutcome]:
+            failures, revisions = join.ready()
+            yield from failures
+            for path, findings, replaces in revisions:
+                if pool is not None:
+                    future = pool.submit(
+                        _analyze_in_worker,
+                        path,
+                        pmd_findings=findings,
+                        cache=cache,
+                        native_rules=native,
+                    )
+                    futures[future] = (path, replaces)
+                    continue
+                outcome = _analyze_in_worker(
+                    path, pmd_findings=findings, cache=cache, native_rules=native
+                )
+                merge_metrics(outcome.metrics)
+                outcome.replaces = replaces
+                yield outcome
+
+        if pool is None:
+            for path in files:
+                outcome = _analyze_in_worker(path, cache=cache, native_rules=native)
+                merge_metrics(outcome.metrics)
+                yield join.add(outcome)
+                yield from settle()
+            if rules is not None:
+                wait([rules])
+            yield from settle()
+            return
+
+        pending = {*futures, *filter(None, [rules])}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            # Settle PMD first so files finishing alongside it get its findings.
+            for future in sorted(done, key=lambda f: f is not rules):
+                if future is rules:
+                    yield from settle()
+                    continue
+                path, replaces = futures.pop(future)
+                try:
+                    outcome = future.result()
+                except (OSError, UnicodeDecodeError, RuntimeError) as exc:
+                    outcome = FileOutcome(path=str(path), error=str(exc))
+                else:
+                    merge_metrics(outcome.metrics)
+                if replaces is not None:
+                    outcome.replaces = replaces
+                    yield outcome
+                else:
+                    yield join.add(outcome)
+            pending = {*futures}
+            if rules is not None and not join.settled:
+                pending.add(rules)
+
+
+class _FindingsJoin:
+    """Attach PMD's whole-project findings to per-file outcomes.
+
+    Until PMD is done, outcomes pass through unchanged and only their paths
+    and finding rules are kept, so the files PMD flags can be analyzed again.
+    """
+
+    def __init__(self, rules: Future | None) -> None:
+        self.rules = rules
+        self.by_file: dict[str, list[PmdFinding]] | None = None if rules else {}
+        self.early: dict[str, list[str]] = {}
+
+    @property
+    def settled(self) -> bool:
+        return self.by_file is not None
+
+    def add(self, outcome: FileOutcome) -> FileOutcome:
+        if self.by_file is None:
+            if outcome.evidence is not None:
+                self.early[outcome.path] = [f.rule for f in outcome.evidence.pmd_findings]
+            return outcome
+        findings = self.by_file.pop(outcome.path, None)
+        if findings and outcome.evidence is not None:
+            # The evidence holds the native findings, if that engine ran too.
+            outcome.evidence = _attach_findings(
+                outcome.evidence, merge_findings(findings, outcome.evidence.pmd_findings)
+            )
+        return outcome
+
+    def ready(
+        self,
+    ) -> tuple[list[FileOutcome], list[tuple[Path, list[PmdFinding], list[str]]]]:
+        """Once PMD is done: its failure outcome, and the yielded files to analyze again.
+
+        Each re-analysis is ``(path, PMD findings, rules of the first outcome)``.
+        Both lists are empty while PMD runs and after the first call that saw it done.
+        """
+        if self.by_file is not None or not self.rules.done():
+            return [], []
+        failures: list[FileOutcome] = []
+        try:
+            self.by_file = self.rules.result()
+        except Exception as exc:  # any failure of the pass leaves files without findings
+            self.by_file = {}
+            failures.append(FileOutcome(path="<pmd>", error=str(exc)))
+        revisions = [
+            (Path(path), self.by_file.pop(path), rules)
+            for path, rules in self.early.items()
+            if self.by_file.get(path)
+        ]
+        self.early = {}
+        return failures, revisions
+
+
+def _attach_findings(
+    evidence: AnalysisEvidence, findings: list[PmdFinding]
+) -> AnalysisEvidence:
+    """Rebuild ``evidence`` with ``findings`` correlated against its code facts."""
+    return build_analysis_evidence(
+        language=evidence.language,
+        file_path=evidence.file_path,
+        project_path=evidence.project_path,
+        source_code=evidence.source_code,
+        pmd_findings=findings,
+        code_facts=evidence.code_facts,
+        structural_analysis=evidence.structural_analysis,
+    )
+
+
+def _analyze_in_worker(
+    path: Path,
+    *,
+    pmd_findings: list[PmdFinding] | None = None,
+    cache: AnalysisCache | None,
+    native_rules: NativeRuleAnalyzer | None = None,
+) -> FileOutcome:
+    """Pool task: one file's outcome plus the metrics recorded while analyzing it."""
+    with metrics_delta() as recorded:
+        try:
+            evidence = analyze_file_static(
+                path, pmd_findings=pmd_findings, cache=cache, native_rules=native_rules
+            )
+        except (OSError, UnicodeDecodeError, RuntimeError) as exc:
+            outcome = FileOutcome(path=str(path), error=str(exc))
+        else:
+            outcome = FileOutcome(path=str(path), evidence=evidence)
+    outcome.metrics = recorded.snapshot()
+    return outcome
+
+
+def analyze_project(
+    paths: Iterable[Path],
+    *,
+    workers: int | None = None,
+    use_pmd: bool = True,
+    pmd_shards: int = 1,
+    project_path: Path | None = None,
+    cache: AnalysisCache | None = None,
+    link_calls: bool = True,
+) -> ProjectAnalysis:
+    """Analyze every Java file under ``paths`` across a process pool.
+
+    See ``iter_project_evidence`` for how the files are processed. With
+    ``link_calls``, fan-in/out and call relationships are recomputed over the
+    project-wide call graph (see ``link_call_graph``).
+    """
+    results: dict[str, AnalysisEvidence] = {}
+    errors: dict[str, str] = {}
+    for outcome in iter_project_evidence(
+        paths, workers=workers, use_pmd=use_pmd, pmd_shards=pmd_shards, cache=cache
+    ):
+        if outcome.evidence is not None:
+            results[outcome.path] = outcome.evidence
+        else:
+            errors[outcome.path] = outcome.error or "unknown error"
+
+    ordered = [results[path] for path in sorted(results, key=Path)]
+    if link_calls:
+        ordered = link_call_graph(ordered)
+    return build_project_analysis(
+        ordered,
+        errors=errors,
+        project_path=str(project_path) if project_path else None,
+    )
+
+
+def link_call_graph(files: list[AnalysisEvidence]) -> list[AnalysisEvidence]:
+    """Replace per-file fan-in/out and call edges with project-wide ones.
+
+    Calls into other files count towards the callee's fan-in, and resolved
+    ``CallRelationship`` entries name the callee's ``Class.method`` and file.
+    Findings are correlated again so they see the updated method facts.
+    """
+    linkable = [e for e in files if e.code_facts and e.structural_analysis]
+    graph = ProjectCallGraph.build(
+        (e.code_facts, e.structural_analysis) for e in linkable
+    )
+    linked: list[AnalysisEvidence] = []
+    for evidence in files:
+        if not (evidence.code_facts and evidence.structural_analysis):
+            linked.append(evidence)
+            continue
+        code_facts, structural = graph.link(
+            evidence.code_facts, evidence.structural_analysis
+        )
+        linked.append(
+            build_analysis_evidence(
+                language=evidence.language,
+                file_path=evidence.file_path,
+                project_path=evidence.project_path,
+                source_code=evidence.source_code,
+                pmd_findings=evidence.pmd_findings,
+                code_facts=code_facts,
+                structural_analysis=structural,
+            )
+        )
+    return linked
+
+
+def build_project_analysis(
+    files: list[AnalysisEvidence],
+    *,
+    errors: dict[str, str] | None = None,
+    project_path: str | None = None,
+) -> ProjectAnalysis:
+    total_classes = 0
+    total_methods = 0
+    by_rule: Counter[str] = Counter()
+    for evidence in files:
+        if evidence.code_facts:
+            total_classes += len(evidence.code_facts.classes)
+            total_methods += evidence.code_facts.total_methods
+        by_rule.update(f.rule for f in evidence.pmd_findings)
+
+    project = ProjectAnalysis(
+        project_path=project_path,
+        files=files,
+        errors=errors or {},
+        total_classes=total_classes,
+        total_methods=total_methods,
+        findings_by_rule=dict(sorted(by_rule.items())),
+    )
+    project.evidence_text = format_project_text(project)
+    return project
+
+
+def format_project_text(project: ProjectAnalysis) -> str:
+    lines: list[str] = ["# Project Analysis", ""]
+    if project.project_path:
+        lines.append(f"Project: {project.project_path}")
+    lines.append(f"Files analyzed: {len(project.files)}")
+    lines.append(f"Total classes: {project.total_classes}")
+    lines.append(f"Total methods: {project.total_methods}")
+    lines.append("")
+
+    if project.findings_by_rule:
+        lines.extend(["## Findings by rule", ""])
+        for rule, count in project.findings_by_rule.items():
+            lines.append(f"- {rule}: {count}")
+        lines.append("")
+
+    if project.errors:
+        lines.extend(["## Errors", ""])
+        for path, message in sorted(project.errors.items()):
+            lines.append(f"- {path}: {message}")
+        lines.append("")
+
+    for evidence in project.files:
+        if evidence.evidence_text:
+            lines.append(evidence.evidence_text)
+    return "\n".join(lines)
+
+
+def _pmd_available() -> bool:
+    try:
+        PmdAnalyzer().ensure_available()
+    except (PmdNotAvailableError, FileNotFoundError):
+        return False
+    return True
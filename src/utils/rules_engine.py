@@ -0,0 +1,105 @@
+"""Choose between PMD and the native rule engine for design-rule findings."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterable, Mapping
+
+from models import PmdFinding
+from utils.cache import AnalysisCache
+from utils.native_rules import NativeRuleAnalyzer
+from utils.pmd import PmdAnalyzer, PmdNotAvailableError
+
+RULES_ENGINES = ("pmd", "native", "both")
+DEFAULT_RULES_ENGINE = "pmd"
+
+_rules_engine = DEFAULT_RULES_ENGINE
+
+
+def configure_rules_engine(engine: str | None) -> None:
+    """Set the engine used by the workflow, tools and project runs (``None`` restores PMD)."""
+    global _rules_engine
+    engine = engine or DEFAULT_RULES_ENGINE
+    if engine not in RULES_ENGINES:
+        raise ValueError(f"Unknown rules engine {engine!r}; expected one of {RULES_ENGINES}")
+    _rules_engine = engine
+
+
+def rules_engine() -> str:
+    return _rules_engine
+
+
+def design_rule_analyzer(
+    cache: AnalysisCache | None = None, *, engine: str | None = None
+) -> PmdAnalyzer | NativeRuleAnalyzer | CombinedRuleAnalyzer:
+    """Analyzer for ``engine`` (default: the configured one).
+
+    ``"both"`` falls back to the native engine alone when PMD is not
+    installed; ``"pmd"`` leaves that error to the caller.
+    """
+    engine = engine or _rules_engine
+    if engine not in RULES_ENGINES:
+        raise ValueError(f"Unknown rules engine {engine!r}; expected one of {RULES_ENGINES}")
+    if engine == "native":
+        return NativeRuleAnalyzer(cache=cache)
+    pmd = PmdAnalyzer(cache=cache)
+    if engine == "pmd":
+        return pmd
+    try:
+        pmd.ensure_available()
+    except (PmdNotAvailableError, FileNotFoundError):
+        return NativeRuleAnalyzer(cache=cache)
+    return CombinedRuleAnalyzer(pmd, NativeRuleAnalyzer(cache=cache))
+
+
+class CombinedRuleAnalyzer:
+    """Run PMD and the native engine and merge their findings.
+
+    A native finding is dropped when PMD reported the same rule on the same
+    line, so PMD's message wins and each issue appears once.
+    """
+
+    def __init__(self, pmd: PmdAnalyzer, native: NativeRuleAnalyzer):
+        self.pmd = pmd
+        self.native = native
+
+    def ensure_available(self) -> None:
+        self.pmd.ensure_available()
+        self.native.ensure_available()
+
+    def analyze_path(self, target: Path) -> list[PmdFinding]:
+        return merge_findings(self.pmd.analyze_path(target), self.native.analyze_path(target))
+
+    def analyze_source(
+        self, source_code: str, *, file_name: str = "Source.java"
+    ) -> list[PmdFinding]:
+        return self.analyze_sources({file_name: source_code})[file_name]
+
+    def analyze_sources(
+        self, sources: Mapping[str, str], *, threads: int | None = None
+    ) -> dict[str, list[PmdFinding]]:
+        pmd = self.pmd.analyze_sources(sources, threads=threads)
+        native = self.native.analyze_sources(sources)
+        return {name: merge_findings(pmd[name], native[name]) for name in sources}
+
+    def analyze_paths(
+        self,
+        paths: Iterable[Path],
+        *,
+        threads: int | None = None,
+        shards: int = 1,
+        roots: Iterable[Path] | None = None,
+    ) -> dict[str, list[PmdFinding]]:
+        paths = list(paths)
+        pmd = self.pmd.analyze_paths(paths, threads=threads, shards=shards, roots=roots)
+        native = self.native.analyze_paths(paths)
+        return {path: merge_findings(pmd[path], native.get(path, [])) for path in pmd}
+
+
+def merge_findings(
+    pmd: list[PmdFinding], native: list[PmdFinding]
+) -> list[PmdFinding]:
+    """PMD findings plus native ones PMD did not report, ordered by file and line."""
+    seen = {(f.file_path, f.rule, f.line) for f in pmd}
+    merged = pmd + [f for f in native if (f.file_path, f.rule, f.line) not in seen]
+    return sorted(merged, key=lambda f: (f.file_path, f.line, f.rule))
@@ -0,0 +1,236 @@
+"""Lightweight span tracing with Chrome trace-event and OTLP/JSON export.
+
+Instrumented code calls :func:`span`. Until :func:`configure_tracer` installs
+a :class:`Tracer`, it returns one shared no-op context manager, so disabled
+tracing costs a global lookup per call site and creates no spans.
+
+Spans nest through a context variable. The nesting follows threads, asyncio
+tasks and LangChain's executor hand-offs (which copy the context). Each
+thread or task gets its own lane in the Chrome trace, so concurrent
+spans do not overlap in one row.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+TRACE_FORMATS = ("chrome", "otlp")
+SERVICE_NAME = "localize-design"
+
+_tracer: Tracer | None = None
+_current: contextvars.ContextVar[Span | None] = contextvars.ContextVar(
+    "localize_design_span", default=None
+)
+
+
+class Span:
+    """One timed operation; ``set`` adds attributes until it ends."""
+
+    __slots__ = (
+        "name",
+        "category",
+        "attributes",
+        "span_id",
+        "parent_id",
+        "lane",
+        "start_ns",
+        "end_ns",
+        "_tracer",
+        "_token",
+    )
+
+    def __init__(
+        self,
+        tracer: Tracer,
+        name: str,
+        category: str,
+        attributes: dict[str, Any],
+        parent: Span | None,
+    ) -> None:
+        self.name = name
+        self.category = category
+        self.attributes = attributes
+        self.span_id = tracer._next_id()
+        self.parent_id = parent.span_id if parent is not None else None
+        self.lane = tracer._lane()
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns: int | None = None
+        self._tracer = tracer
+        self._token: contextvars.Token | None = None
+
+    def set(self, **attributes: Any) -> Span:
+        self.attributes.update(attributes)
+        return self
+
+    def end(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.perf_counter_ns()
+            self._tracer._finish(self)
+
+    def __enter__(self) -> Span:
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        if self._token is not None:
+            _current.reset(self._token)
+            self._token = None
+        self.end()
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, **attributes: Any) -> _NoopSpan:
+        return self
+
+    def end(self) -> None:
+        pass
+
+    def __enter__(self) -> _NoopSpan:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """Collects finished spans in memory until they are written out."""
+
+    def __init__(self) -> None:
+        self.spans: list[Span] = []
+        self.trace_id = os.urandom(16).hex()
+        self._origin_ns = time.perf_counter_ns()
+        self._origin_unix_ns = time.time_ns()
+        self._lock = threading.Lock()
+        self._ids = 0
+        self._lanes: dict[int, int] = {}
+
+    def start(self, name: str, category: str = "", **attributes: Any) -> Span:
+        """Start a span under the current one without making it current.
+
+        Use for spans that end in a different callback than they start in;
+        ``with tracer.start(...)`` makes it current for the block.
+        """
+        return Span(self, name, category, attributes, _current.get())
+
+    def write(self, path: Path, fmt: str = "chrome") -> None:
+        if fmt not in TRACE_FORMATS:
+            raise ValueError(f"Unknown trace format {fmt!r}; expected one of {TRACE_FORMATS}")
+        payload = self.chrome_trace() if fmt == "chrome" else self.otlp_json()
+        path.write_text(json.dumps(payload), encoding="utf-8")
+
+    def chrome_trace(self) -> dict[str, Any]:
+        pid = os.getpid()
+        events = [
+            {
+                "name": s.name,
+                "cat": s.category,
+                "ph": "X",
+                "ts": (s.start_ns - self._origin_ns) / 1000,
+                "dur": (s.end_ns - s.start_ns) / 1000,
+                "pid": pid,
+                "tid": s.lane,
+                "args": s.attributes,
+            }
+            for s in self._finished()
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def otlp_json(self) -> dict[str, Any]:
+        """Spans as an OTLP/JSON ``ExportTraceServiceRequest``, as the file exporter writes."""
+        spans = []
+        for s in self._finished():
+            item: dict[str, Any] = {
+                "traceId": self.trace_id,
+                "spanId": f"{s.span_id:016x}",
+                "name": s.name,
+                "kind": 1,
+                "startTimeUnixNano": str(self._unix_ns(s.start_ns)),
+                "endTimeUnixNano": str(self._unix_ns(s.end_ns)),
+                "attributes": [
+                    _otlp_attribute(key, value)
+                    for key, value in {"category": s.category, **s.attributes}.items()
+                ],
+            }
+            if s.parent_id is not None:
+                item["parentSpanId"] = f"{s.parent_id:016x}"
+            if "error" in s.attributes:
+                item["status"] = {"code": 2, "message": str(s.attributes["error"])}
+            spans.append(item)
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [_otlp_attribute("service.name", SERVICE_NAME)]
+                    },
+                    "scopeSpans": [{"scope": {"name": SERVICE_NAME}, "spans": spans}],
+                }
+            ]
+        }
+
+    def _finished(self) -> list[Span]:
+        with self._lock:
+            return sorted(self.spans, key=lambda s: (s.start_ns, s.span_id))
+
+    def _finish(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def _next_id(self) -> int:
+        with self._lock:
+            self._ids += 1
+            return self._ids
+
+    def _lane(self) -> int:
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        key = id(task) if task is not None else threading.get_ident()
+        with self._lock:
+            return self._lanes.setdefault(key, len(self._lanes) + 1)
+
+    def _unix_ns(self, perf_ns: int) -> int:
+        return self._origin_unix_ns + perf_ns - self._origin_ns
+
+
+def configure_tracer(tracer: Tracer | None) -> None:
+    """Install the process-wide tracer (``None`` disables tracing)."""
+    global _tracer
+    _tracer = tracer
+
+
+def active_tracer() -> Tracer | None:
+    return _tracer
+
+
+def span(name: str, category: str = "", **attributes: Any) -> Span | _NoopSpan:
+    """Context manager timing its block as ``name`` when tracing is enabled."""
+    if _tracer is None:
+        return NOOP_SPAN
+    return _tracer.start(name, category, **attributes)
+
+
+def _otlp_attribute(key: str, value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
@@ -0,0 +1,35 @@
+"""Iterative Tree-sitter traversal shared by the extractors."""
+
+from __future__ import annotations
+
+from typing import Collection, Iterator
+
+
+def iter_nodes(
+    node,
+    *,
+    types: Collection[str] | None = None,
+    prune: Collection[str] = (),
+) -> Iterator:
+    """Yield ``node`` and its descendants in pre-order using a ``TreeCursor``.
+
+    Only nodes whose type is in ``types`` are yielded (all nodes when
+    ``None``). Descendants of nodes whose type is in ``prune`` are skipped;
+    the pruned node itself is still yielded if it matches ``types``. The walk
+    keeps no Python stack, so arbitrarily deep trees are safe.
+    """
+    cursor = node.walk()
+    depth = 0
+    while True:
+        current = cursor.node
+        kind = current.type
+        if types is None or kind in types:
+            yield current
+        if (depth == 0 or kind not in prune) and cursor.goto_first_child():
+            depth += 1
+            continue
+        while depth > 0 and not cursor.goto_next_sibling():
+            cursor.goto_parent()
+            depth -= 1
+        if depth == 0:
+            return
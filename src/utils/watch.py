@@ -0,0 +1,263 @@
+"""Keep the static analysis of a source tree live while its Java files change."""
+
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable
+
+from models import (
+    AnalysisEvidence,
+    CodeFact,
+    CorrelatedFinding,
+    PmdFinding,
+    ProjectAnalysis,
+    StructuralAnalysis,
+)
+from utils.correlator import build_analysis_evidence, recorrelate_evidence
+from utils.extraction import IncrementalExtractor, SourceEdit
+from utils.pmd import PmdAnalyzer
+from utils.project import build_project_analysis, discover_java_files
+
+DEFAULT_POLL_INTERVAL = 0.2
+DEFAULT_PMD_DEBOUNCE = 1.5
+
+
+@dataclass
+class FileUpdate:
+    """One refresh of a watched file; ``evidence`` is ``None`` once it is deleted."""
+
+    path: Path
+    evidence: AnalysisEvidence | None
+    elapsed_ms: float
+    rescanned: int = 0
+    recorrelated: int = 0
+    from_pmd: bool = False
+
+
+class _WatchedFile:
+    def __init__(self, path: Path, engine: str) -> None:
+        self.path = path
+        self.extractor = IncrementalExtractor(str(path), engine=engine)
+        self.stamp: tuple[int, int] | None = None
+        self.findings: list[PmdFinding] = []
+        self.correlated: list[CorrelatedFinding] = []
+        self.evidence: AnalysisEvidence | None = None
+
+
+class WatchSession:
+    """Re-analyze Java files under ``paths`` incrementally as they change.
+
+    Each :meth:`poll` compares modification times and sizes. Changed files go
+    through an :class:`IncrementalExtractor`, and only findings whose class
+    changed are correlated again. PMD takes seconds per run, so it runs in a
+    background thread once a file has been quiet for ``pmd_debounce``
+    seconds, one run at a time; until it reports, earlier findings below an
+    edit are moved by the number of lines the edit added or removed.
+    """
+
+    def __init__(
+        self,
+        paths: Iterable[Path],
+        *,
+        pmd: PmdAnalyzer | None = None,
+        pmd_debounce: float = DEFAULT_PMD_DEBOUNCE,
+        engine: str = "query",
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.paths = list(paths)
+        self.pmd = pmd
+        self.pmd_debounce = pmd_debounce
+        self.engine = engine
+        self.errors: dict[str, str] = {}
+        self.files: dict[Path, _WatchedFile] = {}
+        self._clock = clock
+        self._pmd_pending: dict[Path, float] = {}
+        self._pmd_running: list[Path] = []
+        self._pmd_future: Future | None = None
+        self._executor = ThreadPoolExecutor(max_workers=1) if pmd is not None else None
+
+    def poll(self) -> list[FileUpdate]:
+        """Apply finished PMD runs and file changes; return what was refreshed."""
+        updates = self._collect_pmd()
+        seen: set[Path] = set()
+        for path in discover_java_files(self.paths):
+            seen.add(path)
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            stamp = (stat.st_mtime_ns, stat.st_size)
+            watched = self.files.get(path)
+            if watched is None:
+                watched = self.files[path] = _WatchedFile(path, self.engine)
+            if watched.stamp == stamp:
+                continue
+            first = watched.stamp is None
+            watched.stamp = stamp
+            try:
+                source = path.read_text(encoding="utf-8")
+            except (OSError, UnicodeDecodeError) as exc:
+                self.errors[str(path)] = str(exc)
+                continue
+            self.errors.pop(str(path), None)
+            updates.append(self._refresh(watched, source))
+            if self.pmd is not None:
+                # Files seen for the first time are checked right away.
+                self._pmd_pending[path] = float("-inf") if first else self._clock()
+
+        for path in [p for p in self.files if p not in seen]:
+            del self.files[path]
+            self._pmd_pending.pop(path, None)
+            self.errors.pop(str(path), None)
+            updates.append(FileUpdate(path=path, evidence=None, elapsed_ms=0.0))
+
+        self._schedule_pmd()
+        return updates
+
+    def run(
+        self,
+        on_updates: Callable[[list[FileUpdate]], None],
+        *,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        stop: threading.Event | None = None,
+    ) -> None:
+        """Poll until ``stop`` is set, passing each non-empty batch to ``on_updates``."""
+        stop = stop or threading.Event()
+        try:
+            while not stop.is_set():
+                updates = self.poll()
+                if updates:
+                    on_updates(updates)
+                stop.wait(poll_interval)
+        finally:
+            self.close()
+
+    def project(self, project_path: str | None = None) -> ProjectAnalysis:
+        evidence = [
+            self.files[path].evidence
+            for path in sorted(self.files)
+            if self.files[path].evidence is not None
+        ]
+        return build_project_analysis(
+            evidence, errors=self.errors, project_path=project_path
+        )
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _refresh(self, watched: _WatchedFile, source: str) -> FileUpdate:
+        start = time.perf_counter()
+        code_facts, structural = watched.extractor.update(source)
+        edit = watched.extractor.last_edit
+        if edit is not None and watched.findings:
+            watched.findings = shift_findings(watched.findings, edit)
+        return self._correlate(
+            watched, code_facts, structural, start, rescanned=watched.extractor.rescanned
+        )
+
+    def _correlate(
+        self,
+        watched: _WatchedFile,
+        code_facts: CodeFact | None,
+        structural: StructuralAnalysis | None,
+        start: float,
+        *,
+        rescanned: int = 0,
+        from_pmd: bool = False,
+    ) -> FileUpdate:
+        watched.correlated, recorrelated = recorrelate_evidence(
+            watched.correlated, watched.findings, code_facts
+        )
+        watched.evidence = build_analysis_evidence(
+            language="java",
+            file_path=str(watched.path),
+            project_path=None,
+            source_code=None,
+            pmd_findings=watched.findings,
+            code_facts=code_facts,
+            structural_analysis=structural,
+            correlated=watched.correlated,
+        )
+        return FileUpdate(
+            path=watched.path,
+            evidence=watched.evidence,
+            elapsed_ms=(time.perf_counter() - start) * 1000,
+            rescanned=rescanned,
+            recorrelated=recorrelated,
+            from_pmd=from_pmd,
+        )
+
+    def _schedule_pmd(self) -> None:
+        if self._executor is None or self._pmd_future is not None:
+            return
+        now = self._clock()
+        ready = sorted(
+            path
+            for path, changed in self._pmd_pending.items()
+            if now - changed >= self.pmd_debounce
+        )
+        for path in ready:
+            del self._pmd_pending[path]
+        # A file removed since the last scan would fail the whole batch.
+        ready = [path for path in ready if path.exists()]
+        if not ready:
+            return
+        self._pmd_running = ready
+        self._pmd_future = self._executor.submit(
+            self.pmd.analyze_paths, ready, roots=self.paths
+        )
+
+    def _collect_pmd(self) -> list[FileUpdate]:
+        future = self._pmd_future
+        if future is None or not future.done():
+            return []
+        self._pmd_future = None
+        try:
+            results = future.result()
+        except (RuntimeError, OSError) as exc:
+            self.errors["<pmd>"] = str(exc)
+            return []
+        self.errors.pop("<pmd>", None)
+
+        updates: list[FileUpdate] = []
+        for path in self._pmd_running:
+            watched = self.files.get(path)
+            # A file edited during the run is already queued for a fresh one.
+            if watched is None or path in self._pmd_pending:
+                continue
+            if watched.evidence is None:
+                continue
+            start = time.perf_counter()
+            watched.findings = results.get(str(path), [])
+            updates.append(
+                self._correlate(
+                    watched,
+                    watched.evidence.code_facts,
+                    watched.evidence.structural_analysis,
+                    start,
+                    from_pmd=True,
+                )
+            )
+        return updates
+
+
+def shift_findings(findings: list[PmdFinding], edit: SourceEdit) -> list[PmdFinding]:
+    """Move finding lines below ``edit`` by the number of lines it added or removed."""
+    delta = edit.new_end_point[0] - edit.old_end_point[0]
+    if delta == 0:
+        return findings
+    last_row = edit.old_end_point[0] + 1
+    shifted: list[PmdFinding] = []
+    for finding in findings:
+        update: dict[str, int] = {}
+        if finding.line > last_row:
+            update["line"] = finding.line + delta
+        if finding.end_line is not None and finding.end_line > last_row:
+            update["end_line"] = finding.end_line + delta
+        shifted.append(finding.model_copy(update=update) if update else finding)
+    return shifted
@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path, monkeypatch):
+    # Keep default cache files (such as PMD's incremental cache) out of $HOME.
+    monkeypatch.setenv("LOCALIZE_DESIGN_CACHE_DIR", str(tmp_path / "default-cache"))
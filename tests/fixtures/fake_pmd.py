@@ -0,0 +1,109 @@
+"""Minimal stand-in for the PMD CLI used by the PMD tests.
+
+Reports one TooManyMethods violation per Java file containing a method and
+logs every invocation to $FAKE_PMD_LOG when set. ``check --help`` lists the
+report formats in $FAKE_PMD_FORMATS (default: json and xml) and, unless
+$FAKE_PMD_LEGACY is set, the ``--no-fail-on-violation`` option. With
+``--cache`` it writes the analyzed paths to the cache file.
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+from xml.sax.saxutils import escape, quoteattr
+
+
+def _collect(args: list[str]) -> list[Path]:
+    files: list[Path] = []
+    for flag, value in zip(args, args[1:]):
+        if flag == "--file-list":
+            for line in Path(value).read_text(encoding="utf-8").splitlines():
+                if line.strip():
+                    files.append(Path(line.strip()))
+        elif flag == "-d":
+            target = Path(value)
+            files.extend(sorted(target.rglob("*.java")) if target.is_dir() else [target])
+    return files
+
+
+def main(args: list[str]) -> int:
+    log = os.environ.get("FAKE_PMD_LOG")
+    if log:
+        with open(log, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(args) + "\n")
+
+    if args[:1] == ["--version"]:
+        print("PMD 7.0.0 (fake)")
+        return 0
+
+    if args[:2] == ["check", "--help"]:
+        formats = os.environ.get("FAKE_PMD_FORMATS", "json, text, xml")
+        print("Usage: pmd check [OPTIONS] [<file>...]")
+        print("  -f, --format=<format>   Report format.")
+        print(f"                          Valid values: {formats}")
+        print("      --file-list=<file>  Path to a file containing a list of files")
+        print("      --cache=<cacheLocation>")
+        if not os.environ.get("FAKE_PMD_LEGACY"):
+            print("      --[no-]fail-on-violation")
+            print("      --[no-]fail-on-error")
+        return 0
+
+    report = args[args.index("-r") + 1]
+    fmt = args[args.index("-f") + 1]
+    paths = _collect(args)
+    if "--cache" in args:
+        # Like PMD, rewrite the cache with the files of this run only.
+        cache = Path(args[args.index("--cache") + 1])
+        cache.write_text("".join(f"{path}\n" for path in paths), encoding="utf-8")
+    entries = []
+    for path in paths:
+        if "(" not in path.read_text(encoding="utf-8"):
+            continue
+        entries.append(
+            {
+                "filename": str(path),
+                "violations": [
+                    {
+                        "beginline": 1,
+                        "endline": 2,
+                        "description": f"This class has too many methods ({path.stem})",
+                        "rule": "TooManyMethods",
+                        "priority": 3,
+                    }
+                ],
+            }
+        )
+    if fmt == "xml":
+        Path(report).write_text(_xml(entries), encoding="utf-8")
+    else:
+        Path(report).write_text(json.dumps({"files": entries}), encoding="utf-8")
+    if os.environ.get("FAKE_PMD_RECOVERABLE") and "--no-fail-on-error" not in args:
+        # PMD 7.3+: a file failed to parse, the others are in the report.
+        return 5
+    if os.environ.get("FAKE_PMD_EXIT"):
+        # A processing error after the report was (partly) written.
+        print("Error while processing files", file=sys.stderr)
+        return int(os.environ["FAKE_PMD_EXIT"])
+    if "--no-fail-on-violation" in args:
+        return 0
+    return 4 if entries else 0
+
+
+def _xml(entries: list[dict]) -> str:
+    lines = ['<pmd xmlns="http://pmd.sourceforge.net/report/2.0.0">']
+    for entry in entries:
+        lines.append(f"<file name={quoteattr(entry['filename'])}>")
+        for v in entry["violations"]:
+            lines.append(
+                f'<violation beginline="{v["beginline"]}" endline="{v["endline"]}" '
+                f'rule="{v["rule"]}" priority="{v["priority"]}">'
+                f"{escape(v['description'])}</violation>"
+            )
+        lines.append("</file>")
+    lines.append("</pmd>")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
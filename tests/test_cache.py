@@ -0,0 +1,49 @@
+import os
+import pickle
+from pathlib import Path
+
+from utils.cache import AnalysisCache
+from utils.extraction import extract_java_facts
+from utils.pmd import PmdAnalyzer
+
+SAMPLE = Path(__file__).resolve().parent / "fixtures/test_input.java"
+
+
+def test_facts_cache_hit_rebases_file_path(tmp_path):
+    cache = AnalysisCache(tmp_path)
+    source = SAMPLE.read_text(encoding="utf-8")
+    first = extract_java_facts(source, file_path="a/Input.java", cache=cache)
+    assert cache.total_bytes() > 0
+    second = extract_java_facts(source, file_path="b/Input.java", cache=cache)
+    assert second[0].file_path == "b/Input.java"
+    assert second[1].fan_metrics[0].file_path == "b/Input.java"
+    assert second[0].classes == first[0].classes
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = AnalysisCache(tmp_path, max_bytes=600)
+    for i in range(5):
+        cache.put(f"k{i}", "test", {"blob": os.urandom(100).hex()})
+        cache.get("k0")
+    assert cache.get("k0") is not None
+    assert cache.get("k1") is None
+    assert cache.total_bytes() <= 600
+
+
+def test_pmd_findings_cached_per_content(tmp_path, monkeypatch):
+    calls = []
+    analyzer = PmdAnalyzer(pmd_executable="pmd", cache=AnalysisCache(tmp_path))
+    monkeypatch.setattr(analyzer, "pmd_version", lambda: "7.0.0")
+    monkeypatch.setattr(
+        analyzer, "_run_pmd_on_file", lambda path: calls.append(path) or []
+    )
+    assert analyzer.analyze_path(SAMPLE) == []
+    assert analyzer.analyze_path(SAMPLE) == []
+    assert len(calls) == 1
+
+
+def test_cache_pickles_to_shared_instance(tmp_path):
+    cache = AnalysisCache(tmp_path)
+    clone = pickle.loads(pickle.dumps(cache))
+    assert clone.cache_dir == cache.cache_dir
+    assert pickle.loads(pickle.dumps(cache)) is clone
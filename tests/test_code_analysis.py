@@ -1,6 +1,7 @@
 from pathlib import Path
 
 from utils.correlator import build_analysis_evidence
+from utils.extraction import extract_java_facts
 from utils.treesitter import JavaTreeSitterAnalyzer
 from utils.structural import merge_fan_metrics_into_code_facts, run_structural_analysis
 
@@ -60,3 +61,81 @@ def test_structural_analysis_merged_into_code_facts():
     processor = next(c for c in evidence.code_facts.classes if c.name == "InputProcessor")
     process_input = next(m for m in processor.methods if m.name == "processInput")
     assert process_input.fan_in is not None and process_input.fan_in >= 1
+
+
+def test_single_pass_extraction_matches_merged_facts():
+    source = SAMPLE.read_text(encoding="utf-8")
+    code_facts, structural = extract_java_facts(source, file_path=str(SAMPLE))
+    merged = merge_fan_metrics_into_code_facts(code_facts, structural)
+    assert code_facts == merged
+    assert structural == run_structural_analysis(source, file_path=str(SAMPLE))
+    processor = next(c for c in code_facts.classes if c.name == "InputProcessor")
+    process_input = next(m for m in processor.methods if m.name == "processInput")
+    assert process_input.fan_in is not None and process_input.fan_in >= 1
+
+
+def test_fan_in_resolves_same_name_methods_by_arity():
+    source = """
+    class A {
+        void foo(int x) {}
+        void bar() { foo(1); }
+    }
+    class B {
+        void foo() {}
+        void log(String... parts) {}
+        void baz() { foo(); log("a", "b", "c"); }
+    }
+    """
+    structural = run_structural_analysis(source)
+    fan = {m.method_key: m for m in structural.fan_metrics}
+    assert fan["A.foo"].fan_in == 1
+    assert fan["B.foo"].fan_in == 1
+    assert fan["B.log"].fan_in == 1
+    assert fan["B.baz"].fan_out == 2
+
+
+ENGINE_SAMPLE = """
+package demo;
+
+import java.util.Map;
+
+@Deprecated(since = "public")
+public class Registry<K> extends Base implements java.io.Serializable {
+    public static final int A = 1, B = 2;
+    @Note("public") int hidden;
+
+    public Registry(Map<String, Integer> seed, int size) { this.size = size; }
+
+    public void put(K key, String... tags) {
+        Runnable r = () -> helper(key);
+        Object o = new Object() { public int hashCode() { return put2(1); } };
+        int x = 0, y = 1;
+        helper(key);
+    }
+
+    private int put2(int a) { return a; }
+    void helper(Object o) { new java.util.ArrayList<String>().add("x"); }
+}
+
+interface Plugin { void load(); }
+"""
+
+
+def test_query_and_walk_engines_agree():
+    sources = [
+        SAMPLE.read_text(encoding="utf-8"),
+        (SAMPLE.parent / "test_input2.java").read_text(encoding="utf-8"),
+        ENGINE_SAMPLE,
+    ]
+    for source in sources:
+        assert extract_java_facts(source, engine="query") == extract_java_facts(
+            source, engine="walk"
+        )
+
+
+def test_parameter_count_ignores_commas_in_generics():
+    code_facts, _ = extract_java_facts(ENGINE_SAMPLE)
+    registry = next(c for c in code_facts.classes if c.name == "Registry")
+    counts = {m.name: m.parameter_count for m in registry.methods}
+    assert counts == {"Registry": 2, "put": 2, "put2": 1, "helper": 1}
+    assert registry.public_member_count == 4
@@ -0,0 +1,92 @@
+from agent.context import build_source_context, estimate_tokens
+from models import PmdFinding
+from utils.correlator import build_analysis_evidence
+from utils.extraction import extract_java_facts
+
+FILLER = "\n".join(f"        int v{i} = {i};" for i in range(40))
+
+SOURCE = f"""package shop;
+
+import java.util.List;
+import java.util.Map;
+
+public class Orders {{
+    private int total;
+
+    public void add(int amount) {{
+        total += amount;
+        log(amount);
+    }}
+
+    void log(int value) {{
+{FILLER}
+    }}
+
+    public int unrelated(int a) {{
+{FILLER}
+        return a;
+    }}
+
+    public void submit() {{
+        add(1);
+    }}
+}}
+"""
+
+
+def _evidence(source: str, method: str, line: int):
+    code_facts, structural = extract_java_facts(source, file_path="Orders.java")
+    return build_analysis_evidence(
+        language="java",
+        file_path="Orders.java",
+        project_path=None,
+        source_code=source,
+        pmd_findings=[
+            PmdFinding(
+                rule="CyclomaticComplexity",
+                message=f"The method '{method}(int)' has a cyclomatic complexity of 12.",
+                file_path="Orders.java",
+                line=line,
+            )
+        ],
+        code_facts=code_facts,
+        structural_analysis=structural,
+    )
+
+
+def test_source_within_budget_is_unchanged():
+    evidence = _evidence(SOURCE, "add", 9)
+    assert (
+        build_source_context(
+            SOURCE,
+            code_facts=evidence.code_facts,
+            correlated=evidence.correlated_findings,
+            token_budget=estimate_tokens(SOURCE),
+        )
+        == SOURCE
+    )
+
+
+def test_context_keeps_flagged_method_and_its_call_neighbours():
+    evidence = _evidence(SOURCE, "add", 9)
+    assert evidence.correlated_findings[0].method_fact.name == "add"
+
+    context = build_source_context(
+        SOURCE,
+        code_facts=evidence.code_facts,
+        structural=evidence.structural_analysis,
+        correlated=evidence.correlated_findings,
+        token_budget=450,
+    )
+    assert estimate_tokens(context) <= 450
+    assert "import java.util" not in context
+    # The flagged method, its caller and its callee are kept in full.
+    assert "        total += amount;\n        log(amount);" in context
+    assert "        add(1);" in context
+    assert "int v39 = 39;" in context
+    # The unrelated method is reduced to its signature.
+    assert "    public int unrelated(int a) {\n        // ... 41 line(s) omitted\n    }" in context
+
+
+def test_context_falls_back_to_prefix_without_facts():
+    assert build_source_context(SOURCE, code_facts=None, token_budget=10) == SOURCE[:40]
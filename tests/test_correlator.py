@@ -1,4 +1,9 @@
-from utils.correlator import correlate_evidence, format_evidence_text
+from utils.correlator import (
+    ScopeIndex,
+    correlate_evidence,
+    format_evidence_text,
+    recorrelate_evidence,
+)
 from models import ClassFact, CodeFact, MethodFact, PmdFinding
 
 
@@ -42,3 +47,65 @@ def test_correlate_finding_to_class_by_line():
     assert correlated[0].method_fact.name == "bar"
     text = format_evidence_text(correlated, code_facts)
     assert "ExcessiveParameterList" in text
+
+
+def test_scope_index_prefers_innermost_scope():
+    index = ScopeIndex([(1, 100, "outer"), (10, 20, "inner"), (12, 14, "deep"), (30, 40, "sibling")])
+    assert index.innermost(13) == "deep"
+    assert index.innermost(15) == "inner"
+    assert index.innermost(25) == "outer"
+    assert index.innermost(35) == "sibling"
+    assert index.innermost(13, end_line=18) == "inner"
+    assert index.innermost(101) is None
+
+
+def test_correlate_uses_enclosing_method_not_preceding_one():
+    methods = [
+        MethodFact(class_name="Foo", name="a", start_line=3, end_line=5),
+        MethodFact(class_name="Foo", name="b", start_line=8, end_line=12),
+    ]
+    code_facts = CodeFact(
+        language="java",
+        file_path="Foo.java",
+        classes=[ClassFact(name="Foo", start_line=1, end_line=20, methods=methods)],
+    )
+    findings = [
+        PmdFinding(rule="LawOfDemeter", message="call chain", file_path="Foo.java", line=9, end_line=9),
+        PmdFinding(rule="CouplingBetweenObjects", message="coupling", file_path="Foo.java", line=15),
+    ]
+    correlated = correlate_evidence(findings, code_facts)
+    assert correlated[0].method_fact.name == "b"
+    assert correlated[1].class_fact.name == "Foo"
+    assert correlated[1].method_fact is None
+
+
+def test_recorrelate_compares_each_class_once(monkeypatch):
+    def facts(foo_end):
+        return CodeFact(
+            language="java",
+            file_path="Foo.java",
+            classes=[
+                ClassFact(name="Foo", start_line=1, end_line=foo_end, method_count=0),
+                ClassFact(name="Bar", start_line=60, end_line=90, method_count=0),
+            ],
+        )
+
+    findings = [
+        PmdFinding(rule="GodClass", message="", file_path="Foo.java", line=line)
+        for line in (2, 3, 4, 61, 62, 63)
+    ]
+    previous = correlate_evidence(findings, facts(50))
+    comparisons = []
+    original_eq = ClassFact.__eq__
+
+    def counting_eq(self, other):
+        comparisons.append(self.name)
+        return original_eq(self, other)
+
+    monkeypatch.setattr(ClassFact, "__eq__", counting_eq)
+    correlated, recomputed = recorrelate_evidence(previous, findings, facts(55))
+
+    assert sorted(comparisons) == ["Bar", "Foo"]
+    assert recomputed == 3
+    assert [item.class_fact.end_line for item in correlated[:3]] == [55, 55, 55]
+    assert correlated[3:] == previous[3:]
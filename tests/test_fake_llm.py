@@ -0,0 +1,79 @@
+import asyncio
+import stat
+import sys
+import time
+from pathlib import Path
+
+from langchain_core.messages import HumanMessage
+
+from agent.fake_llm import FakeChatModel
+from agent.llm import get_llm
+from agent.result import state_to_result
+from agent.state import RankedResult, initial_state
+from agent.workflow import build_graph
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+SOURCE = """public class Orders {
+    private int total;
+
+    public void add(int amount) { total += amount; log(amount); }
+
+    void log(int value) { System.out.println(value); }
+}
+"""
+
+
+def _use_fake_pmd(tmp_path, monkeypatch):
+    script = tmp_path / "pmd"
+    script.write_text(
+        f"#!/bin/sh\nexec {sys.executable} {FIXTURES / 'fake_pmd.py'} \"$@\"\n",
+        encoding="utf-8",
+    )
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setattr("utils.pmd._pmd_on_path", lambda: str(script))
+
+
+def test_get_llm_selects_fake_model(monkeypatch):
+    monkeypatch.setenv("MODEL", "fake")
+    monkeypatch.setenv("FAKE_LLM_LATENCY", "0.01")
+    llm = get_llm()
+    assert isinstance(llm, FakeChatModel)
+    assert llm.latency == 0.01
+
+
+def test_fake_model_runs_whole_graph_offline(tmp_path, monkeypatch):
+    _use_fake_pmd(tmp_path, monkeypatch)
+    monkeypatch.setenv("MODEL", "fake")
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    sample = tmp_path / "Orders.java"
+    sample.write_text(SOURCE, encoding="utf-8")
+
+    for mode in ("deterministic", "agent"):
+        state = build_graph(mode).invoke(
+            initial_state(file_path=str(sample), source_code=SOURCE)
+        )
+        result = state_to_result(state)
+        assert result.evidence.correlated_findings, mode
+        assert result.design_issues == ["complexity"]
+        assert result.refactoring == "move method"
+        target = result.targets[0]
+        assert (target.class_name, target.function_name, target.rank) == ("Orders", "add", 1)
+        assert target.pmd_rules == ["TooManyMethods"]
+        assert "`Orders.add`" in state["final_report"]
+
+
+def test_fake_model_simulates_latency_and_tokens():
+    llm = FakeChatModel(latency=0.1, output_tokens=7)
+    structured = llm.with_structured_output(RankedResult)
+    prompt = [HumanMessage(content='Targets:\n[]\nEvidence:\n[]')]
+
+    async def run_many():
+        return await asyncio.gather(*(llm.ainvoke(prompt) for _ in range(5)))
+
+    start = time.perf_counter()
+    replies = asyncio.run(run_many())
+    assert time.perf_counter() - start < 0.4
+    assert all(r.usage_metadata["output_tokens"] == 7 for r in replies)
+    assert replies[0].usage_metadata["input_tokens"] > 0
+    assert structured.invoke(prompt).ranked_targets == []
@@ -0,0 +1,32 @@
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.load import dumps
+from langchain_core.outputs import ChatGeneration
+
+from agent.llm_cache import LLMResponseCache
+
+
+def _prompt(*messages) -> str:
+    return dumps(list(messages))
+
+
+def test_llm_cache_roundtrip_ignores_message_ids(tmp_path):
+    cache = LLMResponseCache(tmp_path)
+    llm_string = "gpt-4o-mini---[('temperature', 0)]"
+    generation = ChatGeneration(message=AIMessage(content="done", id="run-1"))
+
+    first = _prompt(HumanMessage(content="hi"), AIMessage(content="x", id="run-a"))
+    replay = _prompt(HumanMessage(content="hi"), AIMessage(content="x", id="run-b"))
+    assert cache.lookup(first, llm_string) is None
+    cache.update(first, llm_string, [generation])
+
+    hit = cache.lookup(replay, llm_string)
+    assert hit is not None and hit[0].message.content == "done"
+    assert cache.lookup(replay, llm_string + "tools") is None
+    assert cache.stats() == {"hits": 1, "misses": 2}
+
+
+def test_llm_cache_ttl_expires_entries(tmp_path):
+    cache = LLMResponseCache(tmp_path, ttl_seconds=-1)
+    prompt = _prompt(HumanMessage(content="hi"))
+    cache.update(prompt, "m", [ChatGeneration(message=AIMessage(content="a"))])
+    assert cache.lookup(prompt, "m") is None
@@ -0,0 +1,302 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import httpx
+
+import cli
+from agent.limits import (
+    AsyncLimitedTransport,
+    LimitedTransport,
+    RequestLimits,
+    RetryPolicy,
+    TokenBucket,
+    estimate_tokens,
+)
+from agent.llm import (
+    aclose_shared_client,
+    configure_llm_limits,
+    get_llm,
+    shared_async_client,
+    shared_http_client,
+)
+from agent.runner import LocalizationOutcome, localize_files
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+STRUCTURED_REPLIES = {
+    "LocalizationOutput": {
+        "design_issues": ["modularity"],
+        "refactoring_type": "move method",
+        "targets": [
+            {
+                "class_name": "Orders",
+                "function_name": "add",
+                "refactoring_type": "move method",
+                "rationale": "Uses Billing more than Orders.",
+            }
+        ],
+    },
+    "RankedResult": {
+        "ranked_targets": [
+            {
+                "class_name": "Orders",
+                "function_name": "add",
+                "refactoring_type": "move method",
+                "rationale": "Uses Billing more than Orders.",
+                "rank": 1,
+            }
+        ],
+        "final_report": "# Report",
+    },
+}
+
+
+class StubOpenAI(ThreadingHTTPServer):
+    """Answers /v1/chat/completions like the OpenAI API, after some 429s."""
+
+    daemon_threads = True
+
+    def __init__(self, *, throttle: int = 0, latency: float = 0.05):
+        super().__init__(("127.0.0.1", 0), _StubHandler)
+        self.throttle = throttle
+        self.latency = latency
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    server: StubOpenAI
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        stub = self.server
+        with stub.lock:
+            stub.requests += 1
+            if stub.throttle:
+                stub.throttle -= 1
+                self._send(429, {"error": {"message": "rate limited"}}, {"Retry-After": "0"})
+                return
+            stub.in_flight += 1
+            stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+        time.sleep(stub.latency)
+        with stub.lock:
+            stub.in_flight -= 1
+
+        schema = (body.get("response_format") or {}).get("json_schema", {}).get("name")
+        content = json.dumps(STRUCTURED_REPLIES[schema]) if schema else "Orders.add is misplaced."
+        self._send(
+            200,
+            {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": 0,
+                "model": body["model"],
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+            },
+        )
+
+    def _send(self, status, payload, headers=None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def _serve(stub: StubOpenAI, monkeypatch):
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("OPENAI_API_BASE", stub.base_url)
+    monkeypatch.setenv("MODEL", "gpt-4o-mini")
+    monkeypatch.setattr("utils.pmd._pmd_on_path", lambda: None)
+
+
+def test_token_bucket_paces_requests_after_burst():
+    now = [0.0]
+    bucket = TokenBucket(60, clock=lambda: now[0])
+    assert [bucket.reserve() for _ in range(60)] == [0.0] * 60
+    assert bucket.reserve() == 1.0
+    assert bucket.reserve() == 2.0
+    now[0] += 10
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve(1000) > 0  # capped at one full bucket
+
+
+def test_retry_delay_is_jittered_and_honours_retry_after():
+    policy = RetryPolicy(base_delay=1.0, max_delay=8.0)
+    delays = {policy.delay(3) for _ in range(50)}
+    assert len(delays) > 1 and all(0 <= d <= 8.0 for d in delays)
+    throttled = httpx.Response(429, headers={"Retry-After": "5"})
+    assert policy.delay(0, throttled) >= 5.0
+
+
+def test_estimate_tokens_counts_prompt_and_completion_budget():
+    request = httpx.Request("POST", "http://x", json={"messages": "a" * 400, "max_tokens": 50})
+    assert 140 <= estimate_tokens(request) <= 160
+
+
+def _paced_limits(monkeypatch) -> RequestLimits:
+    """One slot; requests to /slow must wait 0.3 s for rate-limit budget."""
+    limits = RequestLimits(max_concurrency=1)
+    monkeypatch.setattr(
+        limits, "pacing_delay", lambda request: 0.3 if request.url.path == "/slow" else 0.0
+    )
+    return limits
+
+
+def test_paced_request_does_not_hold_a_slot(monkeypatch):
+    limits = _paced_limits(monkeypatch)
+    done = []
+
+    def respond(request):
+        done.append(request.url.path)
+        return httpx.Response(200)
+
+    transport = LimitedTransport(limits, httpx.MockTransport(respond))
+    slow = threading.Thread(
+        target=transport.handle_request, args=(httpx.Request("GET", "http://x/slow"),)
+    )
+    slow.start()
+    time.sleep(0.05)
+    transport.handle_request(httpx.Request("GET", "http://x/fast"))
+    slow.join()
+    assert done == ["/fast", "/slow"]
+
+
+def test_paced_async_request_does_not_hold_a_slot(monkeypatch):
+    limits = _paced_limits(monkeypatch)
+    done = []
+
+    async def respond(request):
+        done.append(request.url.path)
+        return httpx.Response(200)
+
+    transport = AsyncLimitedTransport(limits, httpx.MockTransport(respond))
+
+    async def run():
+        slow = asyncio.create_task(
+            transport.handle_async_request(httpx.Request("GET", "http://x/slow"))
+        )
+        await asyncio.sleep(0.05)
+        await transport.handle_async_request(httpx.Request("GET", "http://x/fast"))
+        await slow
+
+    asyncio.run(run())
+    assert done == ["/fast", "/slow"]
+
+
+def test_agents_ndjson_writes_each_record_as_it_completes(monkeypatch, tmp_path):
+    out = tmp_path / "out.ndjson"
+    seen = []
+
+    async def fake_localize(paths, **kwargs):
+        for path in paths:
+            # Everything yielded so far must already be on disk.
+            seen.append(len(out.read_text().splitlines()))
+            yield LocalizationOutcome(str(path), error="boom")
+
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(cli, "alocalize_files", fake_localize)
+    try:
+        code = cli.main(
+            ["--dir", str(FIXTURES), "--agents", "--format", "ndjson", "-o", str(out)]
+        )
+    finally:
+        configure_llm_limits(None)
+    records = [json.loads(line) for line in out.read_text().splitlines()]
+    assert code == 2
+    assert seen == [0, 1]
+    assert [r["type"] for r in records] == ["error", "error"]
+
+
+def test_shared_clients_honour_proxy_environment(monkeypatch):
+    stub = StubOpenAI()
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    for name in ("http_proxy", "all_proxy", "no_proxy", "ALL_PROXY", "NO_PROXY"):
+        monkeypatch.delenv(name, raising=False)
+    # The stub answers as the proxy for a host that does not resolve.
+    monkeypatch.setenv("HTTP_PROXY", f"http://127.0.0.1:{stub.server_address[1]}")
+    url = "http://api.invalid/v1/chat/completions"
+    body = {"model": "gpt-4o-mini", "messages": []}
+    configure_llm_limits(None)
+    try:
+        assert shared_http_client().post(url, json=body).status_code == 200
+
+        async def post():
+            try:
+                return (await shared_async_client().post(url, json=body)).status_code
+            finally:
+                await aclose_shared_client()
+
+        assert asyncio.run(post()) == 200
+    finally:
+        configure_llm_limits(None)
+        stub.shutdown()
+        stub.server_close()
+    assert stub.requests == 2
+
+
+def test_models_share_one_http_client_per_loop(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    try:
+        assert get_llm().http_client is get_llm().http_client
+        assert get_llm().http_async_client is None
+
+        async def clients():
+            return get_llm().http_async_client, shared_async_client()
+
+        first, shared = asyncio.run(clients())
+        assert first is shared is not None
+    finally:
+        configure_llm_limits(None)
+
+
+def test_async_runner_against_stub_server(monkeypatch, tmp_path):
+    source = (FIXTURES / "test_input.java").read_text(encoding="utf-8")
+    files = []
+    for i in range(4):
+        files.append(tmp_path / f"Input{i}.java")
+        files[-1].write_text(source, encoding="utf-8")
+    stub = StubOpenAI(throttle=2)
+    _serve(stub, monkeypatch)
+    configure_llm_limits(
+        RequestLimits(max_concurrency=2, retry=RetryPolicy(base_delay=0.01))
+    )
+    try:
+        outcomes = localize_files(files)
+    finally:
+        configure_llm_limits(None)
+        stub.shutdown()
+        stub.server_close()
+
+    assert [o.path for o in outcomes] == [str(f) for f in files]
+    assert all(o.error is None for o in outcomes), [o.error for o in outcomes]
+    result = outcomes[0].result
+    assert result.design_issues == ["modularity"]
+    assert result.targets[0].rank == 1
+    # Three LLM calls per file, plus the two throttled attempts.
+    assert stub.requests == 3 * len(files) + 2
+    assert stub.max_in_flight == 2
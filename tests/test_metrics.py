@@ -0,0 +1,159 @@
+import json
+import stat
+import sys
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+from agent.state import initial_state
+from agent.workflow import build_graph
+from cli import main
+from utils.cache import AnalysisCache
+from utils.extraction import IncrementalExtractor, extract_java_facts
+from utils.metrics import (
+    MetricsRegistry,
+    configure_metrics,
+    estimate_cost,
+    metrics_registry,
+    serve_metrics,
+)
+from utils.pmd import PmdAnalyzer
+from utils.project import iter_project_evidence
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+SAMPLE = FIXTURES / "test_input.java"
+
+
+@pytest.fixture
+def registry():
+    registry = MetricsRegistry()
+    configure_metrics(registry)
+    yield registry
+    configure_metrics(None)
+
+
+def _fake_pmd(tmp_path):
+    script = tmp_path / "pmd"
+    script.write_text(
+        f"#!/bin/sh\nexec {sys.executable} {FIXTURES / 'fake_pmd.py'} \"$@\"\n",
+        encoding="utf-8",
+    )
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    return script
+
+
+def test_prometheus_exposition_of_counters_and_histograms():
+    registry = MetricsRegistry(namespace="t")
+    calls = registry.counter("calls_total", "Calls.", ("node",))
+    calls.inc(node="ranker")
+    calls.inc(2, node="ranker")
+    assert registry.counter("calls_total", "Calls.", ("node",)) is calls
+    with pytest.raises(ValueError):
+        registry.histogram("calls_total", "Calls.", ("node",), buckets=(1,))
+    latency = registry.histogram("latency_seconds", "Latency.", buckets=(0.5, 1))
+    for value in (0.2, 0.7, 3):
+        latency.observe(value)
+
+    text = registry.to_prometheus()
+    assert "# TYPE t_calls_total counter" in text
+    assert 't_calls_total{node="ranker"} 3' in text
+    assert 't_latency_seconds_bucket{le="0.5"} 1' in text
+    assert 't_latency_seconds_bucket{le="1"} 2' in text
+    assert 't_latency_seconds_bucket{le="+Inf"} 3' in text
+    assert "t_latency_seconds_sum 3.9" in text
+    assert registry.to_json()["t_latency_seconds"]["type"] == "histogram"
+
+
+def test_llm_tokens_and_cost_are_counted_per_node(registry, monkeypatch):
+    monkeypatch.setenv("MODEL", "fake")
+    monkeypatch.setattr("utils.pmd._pmd_on_path", lambda: None)
+    state = initial_state(file_path=str(SAMPLE), source_code=SAMPLE.read_text(encoding="utf-8"))
+    build_graph("agent").invoke(state)
+
+    tokens = registry.get("llm_tokens_total")
+    nodes = {labels[0] for labels in tokens.totals()}
+    assert nodes == {"evidence_collector", "issue_localizer", "ranker"}
+    assert tokens.value(node="ranker", model="fake", kind="prompt") > 0
+    assert tokens.value(node="ranker", model="fake", kind="completion") > 0
+    assert registry.get("llm_calls_total").value(node="ranker", model="fake") == 1
+    assert registry.get("llm_cost_usd_total").value(node="ranker", model="fake") == 0
+    assert estimate_cost("gpt-4o-mini", 1_000_000, 1_000_000) == pytest.approx(0.75)
+    assert estimate_cost("unknown-model", 10, 10) is None
+
+
+def test_pmd_parse_and_cache_metrics(registry, tmp_path):
+    cache = AnalysisCache(tmp_path / "cache")
+    source = SAMPLE.read_text(encoding="utf-8")
+    extract_java_facts(source, file_path=str(SAMPLE), cache=cache)
+    extract_java_facts(source, file_path=str(SAMPLE), cache=cache)
+    analyzer = PmdAnalyzer(pmd_executable=str(_fake_pmd(tmp_path)))
+    analyzer.analyze_paths([SAMPLE], threads=1)
+
+    assert registry.get("parse_seconds_per_kloc").count() == 1
+    assert registry.get("pmd_run_seconds").count(mode="batch") == 1
+    requests = registry.get("cache_requests_total")
+    assert requests.value(cache="analysis", result="hit") == 1
+    assert requests.value(cache="analysis", result="miss") == 1
+    assert 'localize_design_cache_hit_ratio{cache="analysis"} 0.5' in registry.to_prometheus()
+
+
+def test_worker_process_metrics_are_merged_into_parent(registry, tmp_path):
+    cache = AnalysisCache(tmp_path / "cache")
+    for _ in range(2):
+        outcomes = list(
+            iter_project_evidence([FIXTURES], workers=2, use_pmd=False, cache=cache)
+        )
+        assert len(outcomes) == 2 and all(o.metrics for o in outcomes)
+
+    assert registry.get("parse_seconds_per_kloc").count() == 2
+    requests = registry.get("cache_requests_total")
+    assert requests.value(cache="analysis", result="miss") == 2
+    assert requests.value(cache="analysis", result="hit") == 2
+    assert 'localize_design_cache_hit_ratio{cache="analysis"} 0.5' in registry.to_prometheus()
+
+
+def test_incremental_reparse_is_timed(registry):
+    extractor = IncrementalExtractor()
+    source = SAMPLE.read_text(encoding="utf-8")
+    extractor.update(source)
+    extractor.update(source.replace("{", "{ ", 1))
+    assert registry.get("parse_seconds_per_kloc").count() == 2
+
+
+def test_metrics_server_exposes_current_registry(registry):
+    registry.counter("scrapes_total", "Scrapes.").inc()
+    server = serve_metrics(0)
+    try:
+        port = server.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            body = response.read().decode("utf-8")
+            assert response.headers["Content-Type"].startswith("text/plain")
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert "localize_design_scrapes_total 1" in body
+
+
+def test_cli_writes_metrics_json(registry, tmp_path, monkeypatch):
+    monkeypatch.setenv("MODEL", "fake")
+    monkeypatch.setattr("utils.pmd._pmd_on_path", lambda: None)
+    out = tmp_path / "metrics.json"
+    code = main(
+        [
+            "--file",
+            str(SAMPLE),
+            "--no-cache",
+            "-o",
+            str(tmp_path / "evidence.txt"),
+            "--metrics-out",
+            str(out),
+            "--metrics-format",
+            "json",
+        ]
+    )
+    assert code == 0
+    data = json.loads(out.read_text(encoding="utf-8"))
+    assert data["localize_design_parse_seconds_per_kloc"]["samples"]
+    assert data["localize_design_llm_tokens_total"]["samples"]
+    assert metrics_registry() is registry
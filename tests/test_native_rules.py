@@ -0,0 +1,406 @@
+import json
+import shutil
+import stat
+import sys
+from pathlib import Path
+
+import pytest
+
+import cli
+import utils.project
+from utils.cache import AnalysisCache
+from utils.metrics import MetricsRegistry, configure_metrics
+from utils.native_rules import NativeRuleAnalyzer, RuleSettings, check_design_rules
+from utils.pmd import PmdAnalyzer, default_ruleset_path
+from utils.project import iter_project_evidence
+from utils.rules_engine import (
+    CombinedRuleAnalyzer,
+    configure_rules_engine,
+    design_rule_analyzer,
+    rules_engine,
+)
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+
+@pytest.fixture(autouse=True)
+def reset_engine():
+    yield
+    configure_rules_engine(None)
+
+
+def _rules(source: str) -> list[tuple[str, int]]:
+    return [(f.rule, f.line) for f in check_design_rules(source, file_path="T.java")]
+
+
+def _branchy(name: str, branches: int, receiver: str = "x") -> list[str]:
+    lines = [f"    public int {name}(int x, Peer other) {{", "        int v = 0;"]
+    lines += [f"        if ({receiver} > {i}) {{ v++; }}" for i in range(branches)]
+    lines += ["        return v;", "    }"]
+    return lines
+
+
+def test_cyclomatic_complexity_counts_decisions_and_boolean_operators():
+    source = "\n".join(
+        [
+            "class Router {",
+            "    Router(int a) { if (a > 0) { } }",
+            "    public String route(int code, java.util.List<String> names) {",
+            "        if (code > 0 && code < 10 || code == 42) { return \"a\"; }",
+            "        for (int i = 0; i < code; i++) { }",
+            "        for (String n : names) { }",
+            "        while (code > 100) { code--; }",
+            "        switch (code) { case 1: case 2: break; default: break; }",
+            "        try { code++; } catch (RuntimeException e) { }",
+            "        return code > 5 ? \"b\" : \"c\";",
+            "    }",
+            "    int flat() { return 1; }",
+            "}",
+        ]
+    )
+    findings = check_design_rules(source, file_path="Router.java")
+    assert [(f.rule, f.line, f.end_line) for f in findings] == [
+        ("CyclomaticComplexity", 3, 11)
+    ]
+    assert findings[0].message == (
+        "The method 'route(int, java.util.List<String>)' has a cyclomatic complexity of 11."
+    )
+    assert (findings[0].class_name, findings[0].method_name) == ("Router", "route")
+    assert findings[0].priority == 3
+
+
+def test_class_cyclomatic_complexity_and_god_class():
+    fields = [f"    private int f{i};" for i in range(5)]
+    methods = []
+    for i in range(5):
+        body = _branchy(f"m{i}", 9)
+        body.insert(2, f"        f{i} = other.getA() + other.getB() + other.c;")
+        methods += body
+    source = "\n".join(["class Hub {", *fields, *methods, "}"])
+
+    findings = check_design_rules(source, file_path="Hub.java")
+    by_rule = {f.rule: f for f in findings if f.line == 1}
+    assert by_rule["GodClass"].message == (
+        "Possible God Class (WMC=50, ATFD=15, TCC=0.000%)"
+    )
+    assert [f.message for f in findings if f.rule == "CyclomaticComplexity"][0] == (
+        "The method 'm0(int, Peer)' has a cyclomatic complexity of 10."
+    )
+
+    # Methods sharing one field are cohesive, so no god class.
+    cohesive = source.replace("f1 =", "f0 =").replace("f2 =", "f0 =")
+    cohesive = cohesive.replace("f3 =", "f0 =").replace("f4 =", "f0 =")
+    assert "GodClass" not in {rule for rule, _ in _rules(cohesive)}
+
+    methods = [line for i in range(8) for line in _branchy(f"m{i}", 9)]
+    heavy = "\n".join(["class Engine {", *methods, "}"])
+    total = [f for f in check_design_rules(heavy) if f.line == 1]
+    assert [f.message for f in total] == [
+        "The class 'Engine' has a total cyclomatic complexity of 80 (highest 10)."
+    ]
+
+
+def test_excessive_parameter_list_skips_private_constructors():
+    params = ", ".join(f"int p{i}" for i in range(10))
+    source = "\n".join(
+        [
+            "class Config {",
+            f"    private Config({params}) {{ }}",
+            f"    Config(String s, {params}) {{ }}",
+            "    static Config of(",
+            f"        {params}) {{ return null; }}",
+            "    void few(int a, int b) { }",
+            "}",
+        ]
+    )
+    findings = [f for f in check_design_rules(source) if f.rule == "ExcessiveParameterList"]
+    assert [(f.line, f.method_name) for f in findings] == [(3, None), (4, "of")]
+    assert findings[0].message == "Avoid long parameter lists."
+
+
+def test_too_many_methods_ignores_simple_accessors():
+    methods = [f"    void run{i}() {{ }}" for i in range(10)]
+    accessors = [
+        "    int getA() { return a; }",
+        "    void setA(int v) { a = v; }",
+        "    boolean isOn() { return a > 0; }",
+    ]
+    source = "\n".join(["class Tasks", "{", "    int a;", *methods, *accessors, "}"])
+    assert _rules(source) == []
+
+    busy = source.replace("    int getA() { return a; }", "    void work() { }")
+    assert _rules(busy) == [("TooManyMethods", 2)]
+    interface = "\n".join(
+        ["interface Api {", *(f"    void call{i}();" for i in range(11)), "}"]
+    )
+    assert _rules(interface) == [("TooManyMethods", 1)]
+
+
+def test_excessive_public_count_skips_constants():
+    members = [f"    public int field{i};" for i in range(25)]
+    members += [f"    public static final int CONST{i} = {i};" for i in range(30)]
+    members += [f"    public void op{i}() {{ field{i} = {i}; }}" for i in range(19)]
+    source = "\n".join(["public class Facade {", *members, "}"])
+    assert "ExcessivePublicCount" not in {rule for rule, _ in _rules(source)}
+
+    source = source.replace("{\n", "{\n    public void extra() { }\n", 1)
+    findings = [f for f in check_design_rules(source) if f.rule == "ExcessivePublicCount"]
+    assert [(f.line, f.message) for f in findings] == [
+        (1, "This class has a bunch of public methods and attributes")
+    ]
+
+
+def test_data_class_counts_public_fields_and_accessors():
+    source = "\n".join(
+        [
+            "public class Point {",
+            "    public int x;",
+            "    public int y;",
+            "    private String label;",
+            "    private boolean visible;",
+            "    public String getLabel() { return label; }",
+            "    public void setLabel(String label) { this.label = label; }",
+            "    public boolean isVisible() { return visible; }",
+            "}",
+        ]
+    )
+    findings = [f for f in check_design_rules(source) if f.rule == "DataClass"]
+    assert [f.message for f in findings] == [
+        "The class 'Point' is suspected to be a Data Class "
+        "(WOC=0.000%, NOPA=2, NOAM=3, WMC=3)"
+    ]
+
+    behaviour = source[: source.rindex("}")] + "\n".join(
+        [
+            "    public double distance(Point o) { return Math.hypot(x - o.x, y - o.y); }",
+            "    public void move(int dx, int dy) { x += dx; y += dy; }",
+            "}",
+        ]
+    )
+    assert "DataClass" not in {rule for rule, _ in _rules(behaviour)}
+
+
+def test_law_of_demeter_reports_calls_on_foreign_values():
+    source = "\n".join(
+        [
+            "class Checkout {",
+            "    private Cart cart;",
+            "    void pay(Order order) {",
+            "        order.getCustomer().getWallet().charge(1);",
+            "        Wallet wallet = order.getCustomer().getWallet();",
+            "        wallet.charge(2);",
+            "        this.cart.clear();",
+            "        System.out.println(order.toString());",
+            "        String name = order.getCustomer().name;",
+            "        total().toString();",
+            "    }",
+            "    Cart total() { return cart; }",
+            "}",
+        ]
+    )
+    findings = [f for f in check_design_rules(source) if f.rule == "LawOfDemeter"]
+    assert [(f.line, f.message) for f in findings] == [
+        (4, "Call to `charge` on foreign value `order.getCustomer().getWallet()` (degree 3)"),
+        (4, "Call to `getWallet` on foreign value `order.getCustomer()` (degree 2)"),
+        (5, "Call to `getWallet` on foreign value `order.getCustomer()` (degree 2)"),
+        (6, "Call to `charge` on foreign value `wallet` (degree 3)"),
+        (9, "Access to field `name` on foreign value `order.getCustomer()` (degree 2)"),
+    ]
+    assert {f.method_name for f in findings} == {"pay"}
+
+
+def test_coupling_between_objects_counts_distinct_declared_types():
+    types = [f"Dep{i}" for i in range(21)]
+    source = "\n".join(
+        [
+            "import java.util.List;",
+            "class Wiring<T> {",
+            *(f"    private {t} d{i};" for i, t in enumerate(types[:15])),
+            f"    {types[15]} make({types[16]} a, {types[17]}... rest) {{",
+            f"        {types[18]}[] xs = null;",
+            f"        List<{types[19]}> ys = null;",
+            "        String s = null; Integer n = 0; T t = null; Wiring<T> w = null;",
+            "        return null;",
+            "    }",
+            "}",
+        ]
+    )
+    assert "CouplingBetweenObjects" not in {rule for rule, _ in _rules(source)}
+
+    extra = f"        {types[20]} z = null;\n        return null;"
+    coupled = source.replace("        return null;", extra)
+    findings = [f for f in check_design_rules(coupled) if f.rule == "CouplingBetweenObjects"]
+    assert [(f.line, f.class_name, f.message) for f in findings] == [
+        (
+            1,
+            "Wiring",
+            "A value of 21 may denote a high amount of coupling within the class (threshold: 20)",
+        )
+    ]
+
+
+def test_analyzer_matches_pmd_interface_and_caches(tmp_path):
+    source = (FIXTURES / "test_input2.java").read_text(encoding="utf-8")
+    copy = tmp_path / "pkg" / "Processor.java"
+    copy.parent.mkdir()
+    copy.write_text(source, encoding="utf-8")
+    cache = AnalysisCache(tmp_path / "cache")
+    analyzer = NativeRuleAnalyzer(cache=cache)
+    analyzer.ensure_available()
+
+    by_path = analyzer.analyze_paths([copy])
+    assert list(by_path) == [str(copy.resolve())]
+    assert {f.file_path for f in by_path[str(copy.resolve())]} == {str(copy.resolve())}
+    assert analyzer.analyze_path(tmp_path) == by_path[str(copy.resolve())]
+    in_memory = analyzer.analyze_source(source, file_name="Processor.java")
+    assert [f.rule for f in in_memory] == [f.rule for f in by_path[str(copy.resolve())]]
+    assert {f.file_path for f in in_memory} == {"Processor.java"}
+    assert cache.hits == 1
+    assert NativeRuleAnalyzer(cache=cache).analyze_source(source, file_name="Processor.java") == in_memory
+    assert cache.hits == 2
+
+
+RULESET = """<?xml version="1.0"?>
+<ruleset name="custom" xmlns="http://pmd.sourceforge.net/ruleset/2.0.0">
+    <rule ref="category/java/design.xml">
+        <exclude name="TooManyMethods"/>
+        <exclude name="CyclomaticComplexity"/>
+    </rule>
+    <rule ref="category/java/design.xml/CyclomaticComplexity">
+        <properties>
+            <property name="methodReportLevel"><value>13</value></property>
+            <property name="classReportLevel" value="500"/>
+        </properties>
+    </rule>
+    <rule ref="category/java/bestpractices.xml/UnusedPrivateField"/>
+</ruleset>
+"""
+
+
+def test_ruleset_selects_rules_and_thresholds(tmp_path):
+    ruleset = tmp_path / "ruleset.xml"
+    ruleset.write_text(RULESET, encoding="utf-8")
+    settings = RuleSettings.from_ruleset(ruleset)
+    assert "TooManyMethods" not in settings.rules and "GodClass" in settings.rules
+    assert (settings.cyclo_method_report_level, settings.cyclo_class_report_level) == (13, 500)
+    assert RuleSettings.from_ruleset(default_ruleset_path()) == RuleSettings()
+
+    source = (FIXTURES / "test_input2.java").read_text(encoding="utf-8")
+    cache = AnalysisCache(tmp_path / "cache")
+    default = NativeRuleAnalyzer(cache=cache).analyze_source(source)
+    custom = NativeRuleAnalyzer(cache=cache, ruleset=ruleset).analyze_source(source)
+    assert [(f.rule, f.line) for f in default] == [
+        ("TooManyMethods", 3),
+        ("CyclomaticComplexity", 38),
+        ("CyclomaticComplexity", 90),
+    ]
+    # A different ruleset is a different cache entry, not a hit on the default one.
+    assert cache.hits == 0
+    assert [(f.rule, f.line) for f in custom] == [("CyclomaticComplexity", 38)]
+
+
+def test_project_workers_check_native_rules_on_the_extraction_parse(monkeypatch):
+    monkeypatch.setattr(utils.project, "_pmd_available", lambda: False)
+    registry = MetricsRegistry()
+    configure_metrics(registry)
+    configure_rules_engine("native")
+    try:
+        outcomes = list(iter_project_evidence([FIXTURES], workers=2, cache=None))
+    finally:
+        configure_rules_engine(None)
+        configure_metrics(None)
+    assert len(outcomes) == 2 and all(o.evidence is not None for o in outcomes)
+    assert any(o.evidence.pmd_findings for o in outcomes)
+    assert registry.get("parse_seconds_per_kloc").count() == len(outcomes)
+
+
+def _fake_pmd(tmp_path):
+    script = tmp_path / "pmd"
+    script.write_text(
+        f"#!/bin/sh\nexec {sys.executable} {FIXTURES / 'fake_pmd.py'} \"$@\"\n",
+        encoding="utf-8",
+    )
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    return script
+
+
+def test_engine_selection_and_merged_findings(tmp_path, monkeypatch):
+    monkeypatch.setattr("utils.pmd._pmd_on_path", lambda: None)
+    assert isinstance(design_rule_analyzer(), PmdAnalyzer)
+    assert isinstance(design_rule_analyzer(engine="both"), NativeRuleAnalyzer)
+    with pytest.raises(ValueError):
+        configure_rules_engine("javac")
+
+    monkeypatch.setattr("utils.pmd._pmd_on_path", lambda: str(_fake_pmd(tmp_path)))
+    configure_rules_engine("both")
+    assert rules_engine() == "both"
+    analyzer = design_rule_analyzer()
+    assert isinstance(analyzer, CombinedRuleAnalyzer)
+    target = (FIXTURES / "test_input2.java").resolve()
+    findings = analyzer.analyze_paths([target])[str(target)]
+    # The fake PMD reports TooManyMethods on line 1; the native engine on
+    # the class body line, so both stay, and the native-only rules are added.
+    assert [(f.rule, f.line) for f in findings] == [
+        ("TooManyMethods", 1),
+        ("TooManyMethods", 3),
+        ("CyclomaticComplexity", 38),
+        ("CyclomaticComplexity", 90),
+    ]
+
+
+def test_project_and_cli_run_native_engine_without_pmd(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils.project, "_pmd_available", lambda: False)
+    configure_rules_engine("native")
+    outcomes = {
+        Path(o.path).name: o
+        for o in iter_project_evidence([FIXTURES], workers=1, cache=None)
+    }
+    rules = {f.rule for f in outcomes["test_input2.java"].evidence.pmd_findings}
+    assert rules == {"TooManyMethods", "CyclomaticComplexity"}
+
+    out = tmp_path / "report.txt"
+    code = cli.main(
+        ["--dir", str(FIXTURES), "--rules-engine", "native", "--no-cache", "-o", str(out)]
+    )
+    assert code == 0
+    assert "CyclomaticComplexity" in out.read_text(encoding="utf-8")
+    assert rules_engine() == "pmd"
+
+
+def test_unreadable_file_is_one_error_not_a_failed_run(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils.project, "_pmd_available", lambda: False)
+    for fixture in FIXTURES.glob("*.java"):
+        (tmp_path / fixture.name).write_bytes(fixture.read_bytes())
+    (tmp_path / "Broken.java").write_bytes(b"\xff\xfe class Broken {}")
+    assert "Broken.java" not in {
+        Path(path).name for path in NativeRuleAnalyzer().analyze_paths(tmp_path.glob("*.java"))
+    }
+
+    out = tmp_path / "out.ndjson"
+    args = ["--dir", str(tmp_path), "--rules-engine", "native", "--workers", "2"]
+    code = cli.main([*args, "--format", "ndjson", "--no-cache", "-o", str(out)])
+    records = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    errors = [r["file_path"] for r in records if r["type"] == "error"]
+    assert code == 2
+    assert [Path(path).name for path in errors] == ["Broken.java"]
+    assert sum(r["type"] == "file" for r in records) == 2
+
+
+@pytest.mark.skipif(shutil.which("pmd") is None, reason="PMD is not installed")
+def test_native_rules_agree_with_pmd_on_fixtures():
+    files = sorted(FIXTURES.glob("*.java"))
+    pmd = PmdAnalyzer().analyze_paths(files)
+    native = NativeRuleAnalyzer().analyze_paths(files)
+    # LawOfDemeter and coupling depend on type resolution; compare the rest.
+    keep = {
+        "GodClass",
+        "DataClass",
+        "ExcessiveParameterList",
+        "TooManyMethods",
+        "ExcessivePublicCount",
+        "CyclomaticComplexity",
+    }
+    for path, expected in pmd.items():
+        assert sorted((f.rule, f.line) for f in native[path] if f.rule in keep) == sorted(
+            (f.rule, f.line) for f in expected if f.rule in keep
+        )
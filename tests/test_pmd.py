@@ -0,0 +1,332 @@
+import fcntl
+import json
+import os
+import stat
+import sys
+from pathlib import Path
+
+import pytest
+
+from utils.cache import AnalysisCache, default_cache_dir
+from utils.metrics import MetricsRegistry, configure_metrics
+from utils.pmd import PmdAnalyzer, probe_pmd
+from utils.pmd_cache import SPARE_SLOTS, PmdIncrementalCache
+from utils.tracing import Tracer, configure_tracer
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+
+@pytest.fixture
+def fake_pmd(tmp_path, monkeypatch):
+    script = tmp_path / "pmd"
+    script.write_text(
+        f"#!/bin/sh\nexec {sys.executable} {FIXTURES / 'fake_pmd.py'} \"$@\"\n",
+        encoding="utf-8",
+    )
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    log = tmp_path / "calls.log"
+    monkeypatch.setenv("FAKE_PMD_LOG", str(log))
+    return script, log
+
+
+def _calls(log: Path) -> list[list[str]]:
+    """Analysis runs only; capability probes are logged too."""
+    if not log.exists():
+        return []
+    calls = [json.loads(line) for line in log.read_text(encoding="utf-8").splitlines()]
+    return [call for call in calls if "-R" in call]
+
+
+def _probes(log: Path) -> list[list[str]]:
+    calls = [json.loads(line) for line in log.read_text(encoding="utf-8").splitlines()]
+    return [call for call in calls if "-R" not in call]
+
+
+def _java_files(tmp_path: Path, count: int) -> list[Path]:
+    src = tmp_path / "src"
+    src.mkdir()
+    files = []
+    for i in range(count):
+        path = src / f"C{i}.java"
+        path.write_text(f"class C{i} {{ void m() {{}} }}\n", encoding="utf-8")
+        files.append(path)
+    return files
+
+
+def test_analyze_paths_runs_pmd_once(fake_pmd, tmp_path):
+    script, log = fake_pmd
+    files = _java_files(tmp_path, 5)
+    results = PmdAnalyzer(pmd_executable=str(script)).analyze_paths(files, threads=2)
+
+    calls = _calls(log)
+    assert len(calls) == 1
+    assert "--file-list" in calls[0]
+    assert calls[0][calls[0].index("--threads") + 1] == "2"
+    assert set(results) == {str(f.resolve()) for f in files}
+    for path, findings in results.items():
+        assert [f.rule for f in findings] == ["TooManyMethods"]
+        assert findings[0].file_path == path
+
+
+def test_analyze_paths_shards_file_list(fake_pmd, tmp_path):
+    script, log = fake_pmd
+    files = _java_files(tmp_path, 7)
+    results = PmdAnalyzer(pmd_executable=str(script)).analyze_paths(
+        files, threads=4, shards=3
+    )
+    assert len(_calls(log)) == 3
+    assert all(len(findings) == 1 for findings in results.values())
+
+
+def test_capabilities_are_probed_once_per_executable(fake_pmd, tmp_path):
+    script, log = fake_pmd
+    files = _java_files(tmp_path, 2)
+    for _ in range(2):
+        analyzer = PmdAnalyzer(pmd_executable=str(script))
+        for path in files:
+            assert [f.rule for f in analyzer.analyze_path(path)] == ["TooManyMethods"]
+
+    capabilities = probe_pmd(str(script))
+    assert capabilities.version == "7.0.0"
+    assert capabilities.report_format == "json"
+    assert capabilities.success_codes == (0,)
+    assert len(_probes(log)) == 2
+    calls = _calls(log)
+    assert len(calls) == 4
+    assert all("--no-fail-on-violation" in call for call in calls)
+
+
+def test_single_run_uses_probed_format_and_exit_codes(fake_pmd, tmp_path, monkeypatch):
+    script, log = fake_pmd
+    monkeypatch.setenv("FAKE_PMD_LEGACY", "1")
+    monkeypatch.setenv("FAKE_PMD_FORMATS", "text, xml")
+    (path,) = _java_files(tmp_path, 1)
+    findings = PmdAnalyzer(pmd_executable=str(script)).analyze_path(path)
+
+    assert [(f.rule, f.file_path) for f in findings] == [("TooManyMethods", str(path))]
+    (call,) = _calls(log)
+    assert call[call.index("-f") + 1] == "xml"
+    assert "--no-fail-on-violation" not in call
+
+
+def test_recoverable_processing_error_keeps_the_report(fake_pmd, tmp_path, monkeypatch):
+    script, log = fake_pmd
+    monkeypatch.setenv("FAKE_PMD_RECOVERABLE", "1")
+    (path,) = _java_files(tmp_path, 1)
+    findings = PmdAnalyzer(pmd_executable=str(script)).analyze_path(path)
+
+    assert [f.rule for f in findings] == ["TooManyMethods"]
+    (call,) = _calls(log)
+    assert "--no-fail-on-error" in call
+
+
+@pytest.mark.parametrize("legacy, code", [(False, 4), (True, 5)])
+def test_report_of_failed_run_is_rejected(fake_pmd, tmp_path, monkeypatch, legacy, code):
+    script, _ = fake_pmd
+    if legacy:
+        monkeypatch.setenv("FAKE_PMD_LEGACY", "1")
+    monkeypatch.setenv("FAKE_PMD_EXIT", str(code))
+    (path,) = _java_files(tmp_path, 1)
+
+    with pytest.raises(RuntimeError, match=f"code {code}: Error while processing"):
+        PmdAnalyzer(pmd_executable=str(script)).analyze_path(path)
+
+
+def test_failed_run_is_reported_without_retry(tmp_path, monkeypatch):
+    script = tmp_path / "pmd"
+    log = tmp_path / "calls.log"
+    script.write_text(
+        f"#!/bin/sh\necho \"$@\" >> {log}\n"
+        'case "$1" in --version) echo "PMD 7.1.0";; check) [ "$2" = --help ] '
+        '|| { echo "bad ruleset" >&2; exit 1; };; esac\n',
+        encoding="utf-8",
+    )
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    (path,) = _java_files(tmp_path, 1)
+
+    with pytest.raises(RuntimeError, match="code 1: bad ruleset"):
+        PmdAnalyzer(pmd_executable=str(script)).analyze_path(path)
+    runs = [line for line in log.read_text(encoding="utf-8").splitlines() if "-R" in line]
+    assert len(runs) == 1
+
+
+def _cache_arg(call: list[str]) -> str | None:
+    return call[call.index("--cache") + 1] if "--cache" in call else None
+
+
+def test_batch_runs_reuse_managed_pmd_cache_file(fake_pmd, tmp_path):
+    script, log = fake_pmd
+    files = _java_files(tmp_path, 3)
+    ruleset = tmp_path / "ruleset.xml"
+    ruleset.write_text("<ruleset/>", encoding="utf-8")
+
+    def run(cache_dir: str) -> None:
+        # A fresh result cache each time, so PMD itself runs every time.
+        analyzer = PmdAnalyzer(
+            pmd_executable=str(script),
+            ruleset=ruleset,
+            cache=AnalysisCache(tmp_path / cache_dir),
+            pmd_cache_dir=tmp_path / "pmd-cache",
+        )
+        analyzer.analyze_paths(files, threads=1)
+
+    run("a")
+    run("b")
+    first, second = (_cache_arg(call) for call in _calls(log))
+    assert first is not None and first == second
+    assert Path(first).parent == tmp_path / "pmd-cache"
+    assert Path(first).read_text(encoding="utf-8").count(".java") == 3
+
+    ruleset.write_text("<ruleset><!-- edited --></ruleset>", encoding="utf-8")
+    run("c")
+    third = _cache_arg(_calls(log)[-1])
+    assert third != first
+    assert not Path(first).exists()
+    uncached = PmdAnalyzer(pmd_executable=str(script)).incremental_cache()
+    assert uncached is not None and uncached.directory == default_cache_dir() / "pmd"
+
+
+def test_warm_result_cache_still_reuses_pmd_cache_file(fake_pmd, tmp_path):
+    script, log = fake_pmd
+    files = _java_files(tmp_path, 3)
+    analyzer = PmdAnalyzer(
+        pmd_executable=str(script), cache=AnalysisCache(tmp_path / "results")
+    )
+    analyzer.analyze_paths(files, threads=1)
+    files[0].write_text("class C0 { void changed() {} }\n", encoding="utf-8")
+    results = analyzer.analyze_paths(files, threads=1)
+    analyzer.analyze_paths(files, threads=1)
+
+    first, second = _calls(log)
+    assert _cache_arg(first) is not None and _cache_arg(first) == _cache_arg(second)
+    assert Path(_cache_arg(first)).parent == tmp_path / "results" / "pmd"
+    # PMD checked the whole list, so its cache still holds the unchanged files.
+    assert Path(_cache_arg(second)).read_text(encoding="utf-8").count(".java") == 3
+    assert [len(findings) for findings in results.values()] == [1, 1, 1]
+
+
+def test_shards_lease_separate_pmd_cache_files(fake_pmd, tmp_path):
+    script, log = fake_pmd
+    files = _java_files(tmp_path, 6)
+    analyzer = PmdAnalyzer(pmd_executable=str(script), pmd_cache_dir=tmp_path / "pmd-cache")
+    analyzer.analyze_paths(files, threads=3, shards=3)
+
+    caches = [_cache_arg(call) for call in _calls(log)]
+    assert len(caches) == 3 and len(set(caches)) == 3
+    assert len(analyzer.incremental_cache().files()) == 3
+
+
+def test_cache_scope_is_keyed_on_roots_not_their_common_prefix(fake_pmd, tmp_path):
+    script, log = fake_pmd
+    trees = {}
+    for name in ("p1", "p2", "p3"):
+        (tmp_path / name).mkdir()
+        trees[name] = _java_files(tmp_path / name, 2)
+    analyzer = PmdAnalyzer(pmd_executable=str(script), pmd_cache_dir=tmp_path / "pmd-cache")
+
+    analyzer.analyze_paths(trees["p1"] + trees["p2"], threads=1)
+    analyzer.analyze_paths(trees["p1"] + trees["p3"], threads=1)
+    # Both pairs share the prefix tmp_path but are different projects.
+    first, second = (_cache_arg(call) for call in _calls(log))
+    assert first != second
+
+    root = tmp_path / "p1"
+    analyzer.analyze_paths(trees["p1"], threads=1, roots=[root])
+    analyzer.analyze_paths(trees["p1"][:1], threads=1, roots=[root])
+    third, fourth = (_cache_arg(call) for call in _calls(log)[2:])
+    assert third == fourth
+
+
+def test_busy_cache_files_fall_back_to_changed_files_only(fake_pmd, tmp_path):
+    script, log = fake_pmd
+    files = _java_files(tmp_path, 3)
+    analyzer = PmdAnalyzer(pmd_executable=str(script), cache=AnalysisCache(tmp_path / "results"))
+    analyzer.analyze_paths(files, threads=1)
+    files[0].write_text("class C0 { void changed() {} }\n", encoding="utf-8")
+
+    registry = MetricsRegistry()
+    configure_metrics(registry)
+    tracer = Tracer()
+    configure_tracer(tracer)
+    held = []
+    try:
+        # Another process holds every cache file of this project.
+        (first,) = (tmp_path / "results" / "pmd").glob("*.0.lock")
+        for index in range(1 + SPARE_SLOTS):
+            held.append(open(first.with_name(first.name.replace(".0.", f".{index}.")), "w"))
+            fcntl.flock(held[-1], fcntl.LOCK_EX)
+        results = analyzer.analyze_paths(files, threads=1)
+    finally:
+        for lock in held:
+            lock.close()
+        configure_tracer(None)
+        configure_metrics(None)
+
+    assert _cache_arg(_calls(log)[-1]) is None
+    (run,) = [s for s in tracer.spans if s.name == "pmd.subprocess"]
+    assert run.attributes["files"] == 1
+    assert registry.get("pmd_cache_fallbacks_total").value() == 1
+    assert [len(findings) for findings in results.values()] == [1, 1, 1]
+
+
+def test_lease_skips_locked_slots(tmp_path):
+    cache = PmdIncrementalCache(tmp_path, ruleset_digest="r", pmd_version="7.0.0")
+    with cache.lease("/project") as first:
+        with cache.lease("/project") as second:
+            assert first is not None and second is not None and first != second
+        held = []
+        for index in range(1, 1 + SPARE_SLOTS):
+            lock = open(first.with_name(first.name.replace(".0.bin", f".{index}.lock")), "w")
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            held.append(lock)
+        with cache.lease("/project") as busy:
+            assert busy is None
+        for lock in held:
+            lock.close()
+
+
+def test_analyze_sources_runs_pmd_once_in_package_tree(fake_pmd, tmp_path):
+    script, log = fake_pmd
+    sources = {
+        "a/Orders.java": "package com.acme.shop;\nclass Orders { void add() {} }\n",
+        "b/Orders.java": "package com.acme.shop;\nclass Orders { void remove() {} }\n",
+        "snippet": "class Snippet { void run() {} }\n",
+        "Empty.java": "class Empty {}\n",
+    }
+    analyzer = PmdAnalyzer(
+        pmd_executable=str(script), cache=AnalysisCache(tmp_path / "cache")
+    )
+    results = analyzer.analyze_sources(sources)
+
+    (call,) = _calls(log)
+    assert "--cache" not in call
+    listed = Path(call[call.index("--file-list") + 1])
+    assert not listed.exists()
+    assert set(results) == set(sources)
+    assert results["Empty.java"] == []
+    for name in ("a/Orders.java", "b/Orders.java", "snippet"):
+        assert [(f.rule, f.file_path) for f in results[name]] == [("TooManyMethods", name)]
+
+    assert analyzer.analyze_sources(sources) == results
+    assert analyzer.analyze_source(sources["snippet"], file_name="snippet") == results["snippet"]
+    assert len(_calls(log)) == 1
+
+
+def test_analyze_sources_preserves_package_directories(fake_pmd, tmp_path, monkeypatch):
+    script, _ = fake_pmd
+    seen = []
+    monkeypatch.setattr(
+        PmdAnalyzer,
+        "_invoke_pmd_batch",
+        lambda self, files, **kwargs: seen.extend(files) or [],
+    )
+    PmdAnalyzer(pmd_executable=str(script)).analyze_sources(
+        {
+            "x/Orders.java": "package com.acme;\nclass Orders {}\n",
+            "y/Orders.java": "package com.acme;\nclass Orders {}\n",
+            "Loose": "class Loose {}\n",
+        }
+    )
+    root = Path(os.path.commonpath(seen))
+    relative = sorted(Path(path).relative_to(root).as_posix() for path in seen)
+    assert relative == ["Loose.java", "com/acme/Orders.java", "copy1/com/acme/Orders.java"]
@@ -0,0 +1,157 @@
+import io
+import json
+
+import pytest
+
+import utils.pmd_report as pmd_report
+from utils.pmd_report import (
+    PmdReportError,
+    iter_json_report,
+    iter_xml_report,
+    report_path_normalizer,
+)
+
+REPORT = {
+    "formatVersion": 0,
+    "pmdVersion": "7.0.0",
+    "files": [
+        {
+            "filename": "/src/Orders.java",
+            "violations": [
+                {
+                    "beginline": 3,
+                    "endline": 40,
+                    "description": "The class 'Orders' has too many methods",
+                    "rule": "TooManyMethods",
+                    "ruleset": "Design",
+                    "priority": 3,
+                },
+                {
+                    "beginline": 12,
+                    "endline": 12,
+                    "description": "Avoid unused local variables such as 'x'.",
+                    "rule": "UnusedLocalVariable",
+                    "priority": 3,
+                },
+            ],
+        },
+        {
+            "filename": "/src/Billing.java",
+            "violations": [
+                {
+                    "beginline": 7,
+                    "endline": 9,
+                    "description": "The method 'charge' has a cyclomatic complexity of 12.",
+                    "rule": "design.CyclomaticComplexity",
+                    "priority": 3,
+                }
+            ],
+        },
+    ],
+    "suppressedViolations": [],
+    "processingErrors": [],
+}
+
+XML_REPORT = """<?xml version="1.0" encoding="UTF-8"?>
+<pmd xmlns="http://pmd.sourceforge.net/report/2.0.0" version="7.0.0">
+<file name="/src/Orders.java">
+<violation beginline="3" endline="40" rule="TooManyMethods" priority="3">
+The class 'Orders' has too many methods
+</violation>
+<violation beginline="12" endline="12" rule="UnusedLocalVariable" priority="3">
+Avoid unused local variables such as 'x'.
+</violation>
+</file>
+<file name="/src/Billing.java">
+<violation beginline="7" endline="9" rule="CyclomaticComplexity" priority="3">
+The method 'charge' has a cyclomatic complexity of 12.
+</violation>
+</file>
+</pmd>
+"""
+
+
+@pytest.fixture(autouse=True)
+def tiny_chunks(monkeypatch):
+    # Force values to straddle buffer refills.
+    monkeypatch.setattr("utils.pmd_report._CHUNK_SIZE", 7)
+
+
+def test_json_report_streams_all_violations(tmp_path):
+    path = tmp_path / "report.json"
+    path.write_text(json.dumps(REPORT, indent=2), encoding="utf-8")
+
+    findings = list(iter_json_report(path))
+    assert [(f.file_path, f.rule, f.line, f.end_line) for f in findings] == [
+        ("/src/Orders.java", "TooManyMethods", 3, 40),
+        ("/src/Orders.java", "UnusedLocalVariable", 12, 12),
+        ("/src/Billing.java", "CyclomaticComplexity", 7, 9),
+    ]
+    assert findings[0].class_name == "Orders"
+    assert findings[2].method_name == "charge"
+
+
+def test_json_report_filters_by_rule_and_file():
+    raw = json.dumps(REPORT)
+    by_rule = iter_json_report(io.StringIO(raw), rules={"TooManyMethods", "CyclomaticComplexity"})
+    assert [f.rule for f in by_rule] == ["TooManyMethods", "CyclomaticComplexity"]
+
+    by_file = iter_json_report(io.StringIO(raw), files={"/src/Billing.java"})
+    assert [f.file_path for f in by_file] == ["/src/Billing.java"]
+
+
+def test_json_report_reads_files_keyed_by_path_and_name_after_violations():
+    keyed = {"files": {"/src/A.java": {"violations": [{"rule": "DataClass", "beginline": 2}]}}}
+    assert [(f.file_path, f.line) for f in iter_json_report(io.StringIO(json.dumps(keyed)))] == [
+        ("/src/A.java", 2)
+    ]
+    reordered = '[{"violations": [{"rule": "GodClass", "beginline": 1}], "filename": "B.java"}]'
+    assert [f.file_path for f in iter_json_report(io.StringIO(reordered))] == ["B.java"]
+    assert list(iter_json_report(io.StringIO(""))) == []
+
+
+def test_json_report_is_lazy_and_rejects_truncation():
+    raw = json.dumps(REPORT)
+    findings = iter_json_report(io.StringIO(raw[: raw.index("Billing")]))
+    assert next(findings).rule == "TooManyMethods"
+    with pytest.raises(PmdReportError):
+        list(findings)
+
+
+def test_xml_report_iterparse_with_namespace_and_filters(tmp_path):
+    path = tmp_path / "report.xml"
+    path.write_text(XML_REPORT, encoding="utf-8")
+
+    findings = list(iter_xml_report(path))
+    assert [(f.file_path, f.rule, f.priority) for f in findings] == [
+        ("/src/Orders.java", "TooManyMethods", 3),
+        ("/src/Orders.java", "UnusedLocalVariable", 3),
+        ("/src/Billing.java", "CyclomaticComplexity", 3),
+    ]
+    assert findings[0].message == "The class 'Orders' has too many methods"
+
+    filtered = iter_xml_report(
+        path, rules={"CyclomaticComplexity", "TooManyMethods"}, files={"/src/Billing.java"}
+    )
+    assert [(f.rule, f.method_name) for f in filtered] == [("CyclomaticComplexity", "charge")]
+
+    with pytest.raises(PmdReportError):
+        list(iter_xml_report(io.BytesIO(XML_REPORT[:200].encode("utf-8"))))
+
+
+def test_report_path_normalizer_resolves_each_name_once(monkeypatch, tmp_path):
+    calls = []
+
+    def counting(path):
+        calls.append(path)
+        return str(tmp_path / path)
+
+    monkeypatch.setattr(pmd_report, "normalize_report_path", counting)
+    normalize = report_path_normalizer()
+    keys = [normalize(name) for name in ["A.java", "B.java", "A.java", "A.java"]]
+
+    assert keys == [str(tmp_path / n) for n in ["A.java", "B.java", "A.java", "A.java"]]
+    assert calls == ["A.java", "B.java"]
+    # A fresh normalizer does not share the memo with the previous report.
+    report_path_normalizer()("A.java")
+    assert calls == ["A.java", "B.java", "A.java"]
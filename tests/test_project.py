@@ -0,0 +1,178 @@
+import json
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+import cli
+import utils.project
+from models import PmdFinding
+from utils.project import analyze_project, discover_java_files, iter_project_evidence
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+
+def test_discover_java_files_in_directory():
+    files = discover_java_files([FIXTURES])
+    assert [f.name for f in files] == ["test_input.java", "test_input2.java"]
+
+
+def test_analyze_project_in_process_pool():
+    project = analyze_project([FIXTURES], workers=2, use_pmd=False)
+    assert [Path(e.file_path).name for e in project.files] == [
+        "test_input.java",
+        "test_input2.java",
+    ]
+    assert not project.errors
+    assert project.total_methods == sum(
+        e.code_facts.total_methods for e in project.files
+    )
+    assert "Files analyzed: 2" in (project.evidence_text or "")
+
+
+def test_project_call_graph_counts_cross_file_callers(tmp_path):
+    (tmp_path / "Orders.java").write_text(
+        """
+        public class Orders {
+            public void add(int amount) { log(amount); }
+            public void add(int amount, String note) { add(amount); }
+            void log(int value) {}
+        }
+        """,
+        encoding="utf-8",
+    )
+    (tmp_path / "Billing.java").write_text(
+        """
+        import java.util.List;
+
+        public class Billing extends Base {
+            private Orders orders;
+
+            public void charge(List<Orders> batch) {
+                orders.add(1);
+                for (Orders o : batch) { o.add(2, "x"); }
+                Audit audit = new Audit();
+                audit.log(3);
+                helper();
+            }
+        }
+        class Base { void helper() {} }
+        class Audit { void log(int value) {} }
+        """,
+        encoding="utf-8",
+    )
+    project = analyze_project([tmp_path], workers=1, use_pmd=False)
+    by_name = {Path(e.file_path).name: e for e in project.files}
+
+    orders = {m.method_key: m for m in by_name["Orders.java"].structural_analysis.fan_metrics}
+    assert orders["Orders.add"].fan_in == 2
+    # Audit.log and Orders.log share a name and arity; the receiver type decides.
+    assert orders["Orders.log"].fan_in == 1
+
+    billing = by_name["Billing.java"]
+    fan = {m.method_key: m for m in billing.structural_analysis.fan_metrics}
+    assert fan["Audit.log"].fan_in == 1
+    assert fan["Base.helper"].fan_in == 1
+    assert fan["Billing.charge"].fan_out == 3
+
+    edges = {
+        (e.callee, Path(e.callee_file).name if e.callee_file else None)
+        for e in billing.structural_analysis.call_relationships
+        if e.caller == "Billing.charge"
+    }
+    assert ("Orders.add", "Orders.java") in edges
+    assert ("Base.helper", "Billing.java") in edges
+    assert "Orders.java)" in (billing.evidence_text or "")
+    charge = billing.code_facts.classes[0].methods[0]
+    assert (charge.fan_out, charge.fan_in) == (3, 0)
+
+
+def test_iter_project_evidence_yields_each_file():
+    outcomes = list(iter_project_evidence([FIXTURES], workers=1, use_pmd=False))
+    assert sorted(Path(o.path).name for o in outcomes) == [
+        "test_input.java",
+        "test_input2.java",
+    ]
+    assert all(o.evidence is not None and o.error is None for o in outcomes)
+
+
+def test_rules_pass_overlaps_per_file_analysis(monkeypatch):
+    analyzed = threading.Event()
+    extract = utils.project.analyze_file_static
+
+    def analyze_file_static(path, **kwargs):
+        evidence = extract(path, **kwargs)
+        if path.name == "test_input2.java":
+            analyzed.set()
+        return evidence
+
+    class SlowRules:
+        def analyze_paths(self, files, **kwargs):
+            # Finishes only once the per-file stages have run in the meantime.
+            if not analyzed.wait(5):
+                raise RuntimeError("per-file analysis waited for the rules pass")
+            return {
+                str(files[0]): [
+                    PmdFinding(rule="GodClass", message="God", file_path=str(files[0]), line=1)
+                ]
+            }
+
+    monkeypatch.setattr(utils.project, "analyze_file_static", analyze_file_static)
+    monkeypatch.setattr(utils.project, "PmdAnalyzer", lambda cache: SlowRules())
+    monkeypatch.setattr(utils.project, "_pmd_available", lambda: True)
+    outcomes = {o.path: o for o in iter_project_evidence([FIXTURES], workers=1)}
+    assert "<pmd>" not in outcomes
+    first, second = (outcomes[str(p)] for p in discover_java_files([FIXTURES]))
+    assert [f.rule for f in first.evidence.pmd_findings] == ["GodClass"]
+    assert second.evidence.pmd_findings == []
+
+
+@pytest.mark.parametrize("workers", ["1", "2"])
+def test_ndjson_streams_files_while_pmd_runs(tmp_path, monkeypatch, workers):
+    out = tmp_path / "out.ndjson"
+
+    class SlowPmd:
+        def analyze_paths(self, files, **kwargs):
+            # Finishes only once a file record was written in the meantime.
+            deadline = time.monotonic() + 5
+            while not (out.exists() and out.read_text()):
+                if time.monotonic() > deadline:
+                    raise RuntimeError("file records waited for PMD")
+                time.sleep(0.01)
+            return {
+                str(path): [PmdFinding(rule="GodClass", message="God", file_path=str(path), line=1)]
+                for path in files
+            }
+
+    monkeypatch.setattr(utils.project, "PmdAnalyzer", lambda cache: SlowPmd())
+    monkeypatch.setattr(utils.project, "_pmd_available", lambda: True)
+    args = ["--dir", str(FIXTURES), "--workers", workers, "--format", "ndjson"]
+    code = cli.main([*args, "--no-cache", "-o", str(out)])
+    assert code == 0
+    records = [json.loads(line) for line in out.read_text().splitlines()]
+    files = [r for r in records if r["type"] == "file"]
+    # The first file went out without PMD's findings and was written again with them.
+    assert files[0]["evidence"]["pmd_findings"] == []
+    latest = {r["file_path"]: r["evidence"]["pmd_findings"] for r in files}
+    assert len(latest) == 2
+    assert all([f["rule"] for f in findings] == ["GodClass"] for findings in latest.values())
+    summary = records[-1]
+    assert summary["files"] == 2 and summary["findings_by_rule"] == {"GodClass": 2}
+
+
+def test_cli_streams_ndjson_records(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils.project, "_pmd_available", lambda: False)
+    out = tmp_path / "out.ndjson"
+    code = cli.main(
+        ["--dir", str(FIXTURES), "--format", "ndjson", "--no-cache", "-o", str(out)]
+    )
+    assert code == 0
+    records = [json.loads(line) for line in out.read_text().splitlines()]
+    assert [r["type"] for r in records] == ["file", "file", "summary"]
+    assert "source_code" not in records[0]["evidence"]
+    summary = records[-1]
+    assert summary["files"] == 2 and summary["errors"] == 0
+    assert summary["total_methods"] == sum(
+        r["evidence"]["code_facts"]["total_methods"] for r in records[:-1]
+    )
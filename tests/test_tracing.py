@@ -0,0 +1,93 @@
+import json
+import stat
+import sys
+from pathlib import Path
+
+from agent.state import initial_state
+from agent.workflow import build_graph
+from utils.pmd import PmdAnalyzer
+from utils.tracing import NOOP_SPAN, Tracer, configure_tracer, span
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+SAMPLE = FIXTURES / "test_input.java"
+
+
+def _traced(fn):
+    tracer = Tracer()
+    configure_tracer(tracer)
+    try:
+        fn()
+    finally:
+        configure_tracer(None)
+    return tracer
+
+
+def test_span_is_shared_noop_when_disabled():
+    with span("anything", "test", file="F.java") as trace_span:
+        assert trace_span is NOOP_SPAN
+        trace_span.set(findings=3)
+
+
+def test_nested_spans_export_to_chrome_and_otlp(tmp_path):
+    def work():
+        with span("outer", "test", file="F.java") as outer:
+            with span("inner", "test"):
+                pass
+            outer.set(findings=2)
+
+    tracer = _traced(work)
+    inner, outer = sorted(tracer.spans, key=lambda s: s.name)
+    assert inner.parent_id == outer.span_id
+    assert outer.attributes == {"file": "F.java", "findings": 2}
+
+    tracer.write(tmp_path / "trace.json")
+    events = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    assert [e["name"] for e in events] == ["outer", "inner"]
+    assert all(e["ph"] == "X" and e["dur"] >= 0 for e in events)
+    assert events[0]["ts"] <= events[1]["ts"]
+
+    tracer.write(tmp_path / "trace.otlp.json", "otlp")
+    otlp = json.loads((tmp_path / "trace.otlp.json").read_text())
+    spans = otlp["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert spans[1]["parentSpanId"] == spans[0]["spanId"]
+    assert {"key": "findings", "value": {"intValue": "2"}} in spans[0]["attributes"]
+
+
+def test_graph_run_records_node_tool_and_llm_spans(monkeypatch):
+    monkeypatch.setenv("MODEL", "fake")
+    monkeypatch.setattr("utils.pmd._pmd_on_path", lambda: None)
+    state = initial_state(file_path=str(SAMPLE), source_code=SAMPLE.read_text(encoding="utf-8"))
+
+    tracer = _traced(lambda: build_graph("agent").invoke(state))
+    names = [s.name for s in tracer.spans]
+    for name in (
+        "node.evidence_collector",
+        "node.issue_localizer",
+        "node.ranker",
+        "tool.run_treesitter",
+        "tool.correlate_evidence",
+        "llm.call",
+    ):
+        assert name in names
+    llm = next(s for s in tracer.spans if s.name == "llm.call")
+    assert llm.attributes["input_tokens"] > 0 and llm.attributes["model"] == "fake"
+    tool = next(s for s in tracer.spans if s.name == "tool.run_treesitter")
+    assert tool.attributes["methods"] == 12
+
+
+def test_pmd_subprocess_span(tmp_path):
+    script = tmp_path / "pmd"
+    script.write_text(
+        f"#!/bin/sh\nexec {sys.executable} {FIXTURES / 'fake_pmd.py'} \"$@\"\n",
+        encoding="utf-8",
+    )
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    analyzer = PmdAnalyzer(pmd_executable=str(script))
+
+    tracer = _traced(lambda: analyzer.analyze_paths([SAMPLE], threads=1))
+    (run,) = [s for s in tracer.spans if s.name == "pmd.subprocess"]
+    assert run.attributes["files"] == 1
+    # The probe found --no-fail-on-violation, so violations exit with 0.
+    assert run.attributes["returncode"] == 0
+    (probe,) = [s for s in tracer.spans if s.name == "pmd.probe"]
+    assert probe.attributes["version"] == "7.0.0"
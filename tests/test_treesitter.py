@@ -1,5 +1,7 @@
 from pathlib import Path
 
+from utils.extraction import extract_java_facts, java_parser
+from utils.traversal import iter_nodes
 from utils.treesitter import JavaTreeSitterAnalyzer
 from utils.structural import merge_fan_metrics_into_code_facts, run_structural_analysis
 
@@ -21,3 +23,30 @@ def test_method_fan_metrics_present():
     processor = next(c for c in code_facts.classes if c.name == "InputProcessor")
     assert len(processor.methods) >= 5
     assert any(m.fan_out is not None for m in processor.methods)
+
+
+def test_iter_nodes_handles_deep_trees_without_recursion():
+    chain = "x" + " + x" * 5000
+    source = f"class Deep {{ int f(int x) {{ return {chain}; }} }}"
+    tree = java_parser().parse(source.encode("utf-8"))
+    identifiers = list(iter_nodes(tree.root_node, types={"identifier"}))
+    assert len(identifiers) == 5001 + 3
+    code_facts, _ = extract_java_facts(source)
+    assert code_facts.classes[0].methods[0].name == "f"
+
+
+def test_iter_nodes_prunes_subtrees():
+    source = "class A { void f() { g(); } class Inner { void h() { k(); } } }"
+    tree = java_parser().parse(source.encode("utf-8"))
+    calls = [
+        n.text.decode()
+        for n in iter_nodes(
+            tree.root_node, types={"method_invocation"}, prune={"class_body"}
+        )
+    ]
+    assert calls == []
+    calls = [
+        n.text.decode()
+        for n in iter_nodes(tree.root_node, types={"method_invocation"})
+    ]
+    assert calls == ["g()", "k()"]
@@ -0,0 +1,193 @@
+import os
+import threading
+import time
+from pathlib import Path
+
+from models import PmdFinding
+from utils.extraction import IncrementalExtractor, extract_java_facts, source_edit
+from utils.watch import WatchSession, shift_findings
+
+SOURCE = """public class Orders {
+    private int total;
+
+    public void add(int amount) {
+        total += amount;
+        log(amount);
+    }
+
+    public int total() { return total; }
+
+    void log(int value) { System.out.println(value); }
+}
+
+class Audit {
+    void record(Orders orders) { orders.add(1); }
+}
+"""
+
+
+class FakePmd:
+    def __init__(self):
+        self.calls = []
+
+    def analyze_paths(self, paths, **kwargs):
+        self.calls.append(list(paths))
+        return {
+            str(path): [
+                PmdFinding(
+                    rule="DataClass",
+                    message="The class 'Audit' is suspected to be a Data Class",
+                    file_path=str(path),
+                    line=14,
+                )
+            ]
+            for path in paths
+        }
+
+
+def test_incremental_extractor_matches_full_extraction():
+    extractor = IncrementalExtractor("Orders.java")
+    assert extractor.update(SOURCE) == extract_java_facts(SOURCE, file_path="Orders.java")
+
+    edits = [
+        SOURCE.replace("log(amount);", "log(amount); log(total);"),
+        SOURCE.replace("    private int total;\n", "    private int total;\n    private int count;\n"),
+        SOURCE.replace("void record(Orders orders)", "void record(Orders orders, int n)"),
+        SOURCE.replace("class Audit {", "class Audit extends Base {"),
+        SOURCE.replace("}\n\nclass Audit", "\nclass Audit"),
+    ]
+    for edited in edits:
+        assert extractor.update(edited) == extract_java_facts(edited, file_path="Orders.java")
+
+
+def test_incremental_extractor_rescans_only_edited_member():
+    extractor = IncrementalExtractor()
+    extractor.update(SOURCE)
+    code_facts, _ = extractor.update(SOURCE.replace("log(amount);", "log(amount); log(total);"))
+    assert extractor.rescanned == 1
+    assert extractor.reused > 1
+    orders = next(c for c in code_facts.classes if c.name == "Orders")
+    assert orders.methods[0].fan_out == 1
+
+
+def test_source_edit_describes_single_replacement():
+    edit = source_edit(b"ab\ncd\nef", b"ab\nXY\nZ\nef")
+    assert (edit.start_byte, edit.old_end_byte, edit.new_end_byte) == (3, 5, 7)
+    assert edit.start_point == (1, 0)
+    assert edit.old_end_point == (1, 2)
+    assert edit.new_end_point == (2, 1)
+
+
+def test_shift_findings_moves_lines_below_edit():
+    findings = [
+        PmdFinding(rule="A", message="", file_path="F.java", line=2),
+        PmdFinding(rule="B", message="", file_path="F.java", line=10, end_line=12),
+    ]
+    edit = source_edit(b"a\nb\nc\n", b"a\nb\nnew\nlines\nc\n")
+    shifted = shift_findings(findings, edit)
+    assert shifted[0] is findings[0]
+    assert (shifted[1].line, shifted[1].end_line) == (12, 14)
+
+
+def _write(path: Path, text: str, stamp: int) -> None:
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, ns=(stamp, stamp))
+
+
+def _wait_for_pmd(session: WatchSession):
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        updates = session.poll()
+        if any(u.from_pmd for u in updates):
+            return updates
+        time.sleep(0.01)
+    raise AssertionError("PMD results were not applied")
+
+
+def test_watch_session_refreshes_and_debounces_pmd(tmp_path):
+    now = [100.0]
+    pmd = FakePmd()
+    target = tmp_path / "Orders.java"
+    _write(target, SOURCE, 1_000_000_000)
+    session = WatchSession([tmp_path], pmd=pmd, pmd_debounce=2.0, clock=lambda: now[0])
+    try:
+        first = session.poll()
+        assert [u.path.name for u in first] == ["Orders.java"]
+        assert first[0].evidence.code_facts.total_methods == 4
+
+        # New files are checked by PMD without waiting for the debounce.
+        applied = _wait_for_pmd(session)
+        assert pmd.calls == [[target.resolve()]]
+        audit = applied[0].evidence.correlated_findings[0]
+        assert audit.class_fact.name == "Audit"
+
+        # Adding a line above shifts the stale finding; PMD waits for quiet.
+        _write(target, "// header\n" + SOURCE, 2_000_000_000)
+        (update,) = session.poll()
+        assert update.evidence.pmd_findings[0].line == 15
+        assert update.evidence.correlated_findings[0].class_fact.start_line == 15
+        assert update.recorrelated == 1
+        assert len(pmd.calls) == 1
+
+        assert session.poll() == []
+        now[0] += 2.5
+        _wait_for_pmd(session)
+        assert len(pmd.calls) == 2
+
+        target.unlink()
+        (removed,) = session.poll()
+        assert removed.evidence is None
+        assert session.project().files == []
+    finally:
+        session.close()
+
+
+class GatedPmd(FakePmd):
+    """Blocks until released and, like PMD, fails on paths that are gone."""
+
+    def __init__(self):
+        super().__init__()
+        self.gate = threading.Event()
+
+    def analyze_paths(self, paths, **kwargs):
+        self.gate.wait(5)
+        missing = [str(p) for p in paths if not Path(p).exists()]
+        if missing:
+            raise FileNotFoundError(f"No such file: {missing[0]}")
+        return super().analyze_paths(paths, **kwargs)
+
+
+def test_watch_session_survives_file_deleted_during_pmd_batch(tmp_path):
+    now = [100.0]
+    pmd = GatedPmd()
+    orders, audit = tmp_path / "Orders.java", tmp_path / "Audit.java"
+    _write(orders, SOURCE, 1_000_000_000)
+    _write(audit, SOURCE, 1_000_000_000)
+    session = WatchSession([tmp_path], pmd=pmd, pmd_debounce=2.0, clock=lambda: now[0])
+    try:
+        session.poll()  # both files go to PMD in one batch, held at the gate
+        orders.unlink()
+        _write(audit, "// edited\n" + SOURCE, 2_000_000_000)
+        session.poll()
+        pmd.gate.set()
+
+        deadline = time.monotonic() + 5
+        while "<pmd>" not in session.errors and time.monotonic() < deadline:
+            session.poll()
+            time.sleep(0.01)
+        assert "No such file" in session.errors["<pmd>"]
+
+        now[0] += 2.5
+        _wait_for_pmd(session)
+        assert pmd.calls == [[audit.resolve()]]
+        assert "<pmd>" not in session.errors
+
+        # A file that vanishes between the scan and the submit is dropped.
+        _write(audit, SOURCE, 3_000_000_000)
+        session.poll()
+        audit.unlink()
+        now[0] += 2.5
+        session._schedule_pmd()
+        assert session._pmd_future is None and len(pmd.calls) == 1
+    finally:
+        session.close()
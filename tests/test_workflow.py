@@ -0,0 +1,60 @@
+from pathlib import Path
+
+import pytest
+
+from agent.nodes import deterministic_evidence_node
+from agent.state import initial_state
+from agent.workflow import build_graph
+
+SAMPLE = Path(__file__).resolve().parent / "fixtures/test_input.java"
+
+
+def test_build_graph_evidence_modes():
+    assert build_graph("deterministic") is not None
+    assert build_graph("agent") is not None
+    with pytest.raises(ValueError):
+        build_graph("llm")
+
+
+def test_deterministic_evidence_node_runs_without_llm(monkeypatch):
+    def fail():
+        raise AssertionError("the deterministic evidence stage must not call the LLM")
+
+    monkeypatch.setattr("agent.nodes.get_llm", fail)
+    state = initial_state(
+        file_path=str(SAMPLE), source_code=SAMPLE.read_text(encoding="utf-8")
+    )
+    result = deterministic_evidence_node(state)
+    assert result["file_path"] == str(SAMPLE)
+    assert result["code_facts"] is not None
+    assert result["structural_analysis"] is not None
+
+
+def test_evidence_stays_typed_through_result():
+    from agent.result import state_to_result
+    from models import CodeFact, StructuralAnalysis
+
+    state = initial_state(
+        file_path=str(SAMPLE), source_code=SAMPLE.read_text(encoding="utf-8")
+    )
+    state = deterministic_evidence_node(state)
+    assert isinstance(state["code_facts"], CodeFact)
+    assert isinstance(state["structural_analysis"], StructuralAnalysis)
+
+    result = state_to_result(state)
+    assert result.evidence.code_facts is state["code_facts"]
+    assert result.to_json_dict()["evidence"]["code_facts"]["file_path"] == str(SAMPLE)
+
+
+def test_failed_pmd_run_leaves_single_file_evidence_without_findings(monkeypatch):
+    class FailingPmd:
+        def analyze_source(self, source_code, *, file_name):
+            raise RuntimeError("PMD exited with code 1: bad ruleset")
+
+    monkeypatch.setattr("agent.nodes.design_rule_analyzer", lambda cache: FailingPmd())
+    state = initial_state(
+        file_path=str(SAMPLE), source_code=SAMPLE.read_text(encoding="utf-8")
+    )
+    result = deterministic_evidence_node(state)
+    assert result["pmd_findings"] == []
+    assert result["code_facts"] is not None